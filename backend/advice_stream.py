@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+import orjson
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from db_indexes import ensure_ttl_index
+
+logger = logging.getLogger(__name__)
+
+# Event types pushed to streaming clients
+EVENT_STATUS = "status"
+EVENT_ADVICE = "advice"
+EVENT_COMPLETED = "completed"
+EVENT_FAILED = "failed"
+# The stream closed at its time limit; generation may still be running, so clients fall back to polling
+EVENT_TIMEOUT = "timeout"
+
+TERMINAL_EVENTS = {EVENT_COMPLETED, EVENT_FAILED}
+
+
+class AdviceEventBroker:
+    """Pub/sub of advice generation events, keyed by session id.
+
+    Subscribers are always local queues. With a relay attached, published events are also shared
+    with every other API replica and `python -m worker` process, so a stream gets its events
+    whichever process runs the session's job.
+    """
+
+    def __init__(self, max_queue_size: int = 256):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.relay: Optional["MongoEventRelay"] = None
+
+    @asynccontextmanager
+    async def subscribe(self, session_id: str):
+        """Register a queue for the session's events for the lifetime of the context"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(session_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[session_id]
+
+    def publish(self, session_id: str, event: str, data: Optional[Dict[str, Any]] = None):
+        """Fan an event out to every subscriber of the session without blocking the producer"""
+        message = {"event": event, "data": jsonable_encoder(data or {})}
+        if self.relay:
+            self.relay.publish(session_id, message)
+        self.deliver(session_id, message)
+
+    def deliver(self, session_id: str, message: Dict[str, Any]):
+        """Hand an encoded event to this process's subscribers only"""
+        queues = self._subscribers.get(session_id)
+        if not queues:
+            return
+        event = message["event"]
+        for queue in list(queues):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A stalled client must never hold up advice generation
+                logger.warning(f"Dropping {event} event for slow stream subscriber on session {session_id}")
+
+    def subscriber_count(self, session_id: str) -> int:
+        return len(self._subscribers.get(session_id, ()))
+
+    def subscribed_sessions(self) -> List[str]:
+        return list(self._subscribers)
+
+
+class MongoEventRelay:
+    """Shares broker events between processes through the `advice_events` collection.
+
+    Published events are written in order by one background writer. While this process has
+    stream subscribers, a poller reads other processes' events for those sessions every
+    `poll_interval` seconds and delivers them locally. Each poll re-reads the last `lookback_seconds`
+    (ObjectIds from different hosts are not strictly ordered) and skips events already delivered.
+    Events expire after `ttl_seconds`; streams re-read the session document for anything older.
+    """
+
+    def __init__(self, broker: AdviceEventBroker, collection: AsyncIOMotorCollection, poll_interval: float = 0.25,
+                 lookback_seconds: float = 2, ttl_seconds: int = 600):
+        self.broker = broker
+        self.collection = collection
+        self.poll_interval = poll_interval
+        self.lookback_seconds = lookback_seconds
+        self.ttl_seconds = ttl_seconds
+        self.origin = uuid.uuid4().hex
+        self._outbox: asyncio.Queue = asyncio.Queue()
+        self._seen: "OrderedDict[ObjectId, None]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("session_id", 1), ("_id", 1)])
+        await ensure_ttl_index(self.collection, "created_at", self.ttl_seconds)
+
+    def start(self):
+        self.broker.relay = self
+        self._tasks = [asyncio.create_task(self._write()), asyncio.create_task(self._poll())]
+
+    async def aclose(self):
+        """Detach from the broker and flush events not yet written"""
+        if self.broker.relay is self:
+            self.broker.relay = None
+        try:
+            await asyncio.wait_for(self._outbox.join(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._outbox.qsize()} unshared advice events at shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def publish(self, session_id: str, message: Dict[str, Any]):
+        self._outbox.put_nowait({
+            "session_id": session_id, "origin": self.origin, "created_at": datetime.utcnow(), **message
+        })
+
+    async def _write(self):
+        while True:
+            await self._flush([await self._outbox.get()])
+
+    async def _flush(self, documents: List[Dict[str, Any]]):
+        while not self._outbox.empty():
+            documents.append(self._outbox.get_nowait())
+        try:
+            # One ordered write per burst keeps each session's events in publish order
+            await self.collection.insert_many(documents, ordered=True)
+        except Exception as e:
+            logger.warning(f"Failed to share {len(documents)} advice events: {e}")
+        finally:
+            for _ in documents:
+                self._outbox.task_done()
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            sessions = self.broker.subscribed_sessions()
+            if not sessions:
+                continue
+            since = ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=self.lookback_seconds))
+            try:
+                events = self.collection.find(
+                    {"session_id": {"$in": sessions}, "_id": {"$gt": since}, "origin": {"$ne": self.origin}},
+                    {"session_id": 1, "event": 1, "data": 1}
+                ).sort("_id", 1)
+                async for doc in events:
+                    if doc["_id"] in self._seen:
+                        continue
+                    self._seen[doc["_id"]] = None
+                    self.broker.deliver(doc["session_id"], {"event": doc["event"], "data": doc["data"]})
+            except Exception as e:
+                logger.warning(f"Failed to read shared advice events: {e}")
+            while len(self._seen) > 10_000:
+                self._seen.popitem(last=False)
+
+
+def create_event_relay(broker: AdviceEventBroker, collection: AsyncIOMotorCollection) -> Optional[MongoEventRelay]:
+    """Cross-process event relay configured from the environment; None unless ADVICE_EVENTS_SHARED is true.
+
+    Only needed when a session's job can run in a different process from its stream: several API
+    replicas, or advice generated by `python -m worker`. Otherwise every event would cost a Mongo
+    write that nothing reads.
+    """
+    if os.environ.get('ADVICE_EVENTS_SHARED', 'false').lower() != 'true':
+        return None
+    return MongoEventRelay(
+        broker,
+        collection,
+        poll_interval=float(os.environ.get('ADVICE_EVENTS_POLL_SECONDS', 0.25)),
+        ttl_seconds=int(os.environ.get('ADVICE_EVENTS_TTL_SECONDS', 600))
+    )
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode a single Server-Sent Events frame"""
+    return f"event: {event}\ndata: {orjson.dumps(jsonable_encoder(data)).decode()}\n\n"
+
+
+SSE_KEEPALIVE = ": keepalive\n\n"
+
+advice_broker = AdviceEventBroker()
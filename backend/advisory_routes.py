@@ -1,38 +1,89 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pymongo import ReturnDocument
+import asyncio
+import math
+import os
 import uuid
 import logging
 from datetime import datetime, timedelta
-from typing import List
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Optional, Tuple
 from models import (
     CreateSessionRequest, CreateSessionResponse,
     SubmitProbingAnswersRequest, SubmitProbingAnswersResponse,
-    GetAdviceResponse, AdvisorySession, SessionStatus, InnovatorAdvice
+    GetAdviceResponse, AdvisorySession, SessionStatus, InnovatorAdvice, InnovatorStatus,
+    AdviceJob, PersonaSummary, SessionListResponse, FollowUpRequest, FollowUpResponse, FollowUpThreadResponse,
+    BatchAdviceItem
+)
+from llm_limiter import LlmBackpressureError
+from llm_resilience import LlmDeadlineExceeded
+from follow_up import FollowUpLimitError
+from persona_registry import UnknownPersonaError
+from probing_cache import question_key
+from pagination import InvalidCursorError, fetch_page
+from rate_limit import RateLimitExceeded
+from metrics import ADVICE_SESSION_SECONDS, RATE_LIMITED_REQUESTS, Metric, gauge_family, gauges
+from batch_advice import (
+    NDJSON_MEDIA_TYPE, BatchTooLargeError, charge_items, create_batch_runner, encode_line, file_chunks,
+    read_ndjson_items, spool_body
+)
+from advice_stream import (
+    advice_broker, format_sse, SSE_KEEPALIVE, TERMINAL_EVENTS,
+    EVENT_STATUS, EVENT_ADVICE, EVENT_COMPLETED, EVENT_FAILED, EVENT_TIMEOUT
 )
-from ai_service import AIAdvisoryService
+
+if TYPE_CHECKING:
+    from app_container import AppContainer
 
 router = APIRouter(prefix="/api", tags=["Advisory"])
+# Operational stats sit outside /api, so the ingress never exposes them publicly
+ops_router = APIRouter(prefix="/stats", tags=["Ops"])
 logger = logging.getLogger(__name__)
 
-# Global variables (will be set in main app)
-db: AsyncIOMotorDatabase = None
-ai_service: AIAdvisoryService = None
+# Seconds between keepalive frames on an idle advice stream (also re-checks the DB)
+STREAM_KEEPALIVE_SECONDS = 10
+# Upper bound on how long a single advice stream stays open
+STREAM_MAX_SECONDS = 180
+
+# Per-endpoint projections so hot reads never pull fields they do not use
+SUBMIT_PROJECTION = {"_id": 0, "user_question": 1}
+ADVICE_PROJECTION = {
+    "_id": 0, "status": 1, "user_question": 1, "probing_answers": 1, "advice": 1, "innovator_status": 1
+}
+SESSION_LIST_PROJECTION = {
+    "session_id": 1, "user_question": 1, "status": 1, "personas": 1, "innovator_status": 1,
+    "batch_id": 1, "created_at": 1, "completed_at": 1
+}
+# Largest page GET /sessions will return
+MAX_PAGE_SIZE = 100
 
-def set_dependencies(database: AsyncIOMotorDatabase, ai_svc: AIAdvisoryService):
-    global db, ai_service
-    db = database
-    ai_service = ai_svc
+def get_container(request: Request) -> "AppContainer":
+    """The services the app was started with (database, AI service, caches, job queue)"""
+    return request.app.state.container
 
 @router.post("/sessions", response_model=CreateSessionResponse)
-async def create_session(request: CreateSessionRequest):
+async def create_session(request: CreateSessionRequest, container: "AppContainer" = Depends(get_container)):
     """Create a new advisory session with probing questions"""
     try:
+        ai_service, probing_cache, warm_store = container.ai_service, container.probing_cache, container.warm_store
         session_id = str(uuid.uuid4())
         
-        # Generate probing questions using AI
-        probing_questions, probing_options = await ai_service.generate_probing_questions(
-            request.user_question, session_id
-        )
+        # Popular questions have pinned probing questions whose answer combinations have warm advice
+        warm_probing = None
+        if warm_store and not request.bypass_cache:
+            warm_probing = await warm_store.lookup_probing(request.user_question)
+        
+        # Generate probing questions using AI (served from cache for repeated questions)
+        if warm_probing:
+            probing_questions, probing_options = warm_probing
+        elif probing_cache:
+            probing_questions, probing_options = await probing_cache.generate_probing_questions(
+                request.user_question, session_id, bypass=request.bypass_cache
+            )
+        else:
+            probing_questions, probing_options = await ai_service.generate_probing_questions(
+                request.user_question, session_id
+            )
         
         # Create session object
         session = AdvisorySession(
@@ -40,12 +91,13 @@ async def create_session(request: CreateSessionRequest):
             user_question=request.user_question,
             probing_questions=probing_questions,
             probing_options=probing_options,
-            status=SessionStatus.PENDING
+            status=SessionStatus.PENDING,
+            question_key=question_key(request.user_question)
         )
         
         # Save to database
-        session_dict = session.dict(by_alias=True, exclude={"id"})
-        result = await db.advisory_sessions.insert_one(session_dict)
+        session_dict = session.model_dump(by_alias=True, exclude={"id"})
+        result = await container.db.advisory_sessions.insert_one(session_dict)
         
         logger.info(f"Created advisory session {session_id}")
         
@@ -56,40 +108,126 @@ async def create_session(request: CreateSessionRequest):
             created_at=session.created_at
         )
         
+    except LlmBackpressureError as e:
+        logger.warning(f"Shedding session creation: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Advisory board is at capacity, please retry shortly",
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
     except Exception as e:
         logger.error(f"Error creating session: {e}")
         raise HTTPException(status_code=500, detail="Failed to create advisory session")
 
-@router.post("/sessions/{session_id}/probing-answers", response_model=SubmitProbingAnswersResponse)
-async def submit_probing_answers(session_id: str, request: SubmitProbingAnswersRequest, background_tasks: BackgroundTasks):
-    """Submit probing question answers and trigger advice generation"""
+@router.post("/sessions/batch")
+async def create_batch_sessions(request: Request, concurrency: Optional[int] = Query(None, ge=1),
+                                container: "AppContainer" = Depends(get_container)):
+    """Generate advice for many prepared questions in one call.
+    
+    The body is NDJSON, one {"user_question", "probing_answers", "personas", "ref"} object per line.
+    The response streams NDJSON: one result or error line per item, periodic progress lines and a
+    final summary. Each result is stored as a completed session readable through GET /advice.
+    """
     try:
-        # Find session
-        session_doc = await db.advisory_sessions.find_one({"session_id": session_id})
-        if not session_doc:
-            raise HTTPException(status_code=404, detail="Session not found")
+        body = await spool_body(request.stream(), max_bytes=int(os.environ.get('BATCH_MAX_BYTES', 16 * 1024 * 1024)))
+    except BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    runner = create_batch_runner(container.ai_service, container.db.advisory_sessions, concurrency)
+    items = read_ndjson_items(file_chunks(body), max_items=int(os.environ.get('BATCH_MAX_ITEMS', 10000)))
+    limiter = container.rate_limiter
+    client = getattr(request.state, "rate_limit_client", None)
+    if limiter and client:
+        scope, identity = client
         
-        # Convert ObjectId to string for Pydantic
-        if '_id' in session_doc:
-            session_doc['_id'] = str(session_doc['_id'])
-        session = AdvisorySession(**session_doc)
+        async def charge(item: BatchAdviceItem):
+            # Each item is charged as it is read; once the quota runs out the rest of the batch is not run
+            try:
+                await limiter.charge_advice(scope, identity, item.personas)
+            except RateLimitExceeded as e:
+                RATE_LIMITED_REQUESTS.labels(route="batch", scope=scope, limit=e.limit).inc()
+                raise
+            except Exception as e:
+                logger.warning(f"Rate limit charge failed, allowing batch item: {e}")
         
-        if session.status != SessionStatus.PENDING:
-            raise HTTPException(status_code=400, detail="Session is not in pending state")
+        items = charge_items(items, charge)
+    
+    async def lines():
+        try:
+            async for record in runner.run(items):
+                yield encode_line(record)
+        finally:
+            body.close()
+    
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+@router.get("/sessions", response_model=SessionListResponse)
+async def list_sessions(limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                        status: Optional[SessionStatus] = None, include_advice: bool = False,
+                        container: "AppContainer" = Depends(get_container)):
+    """Session history, newest first, one keyset page at a time.
+
+    Advice bodies are left out unless include_advice is set; fetch them per session from
+    GET /sessions/{session_id}/advice when the user opens one.
+    """
+    query = {"status": status.value} if status else {}
+    projection = SESSION_LIST_PROJECTION
+    if include_advice:
+        projection = {**projection, "advice": 1}
+    try:
+        sessions, next_cursor = await fetch_page(
+            container.db.advisory_sessions, query, projection, "created_at", limit, cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Trusted stored documents, serialized without re-validation like GET /advice
+    return ORJSONResponse({"sessions": sessions, "next_cursor": next_cursor})
+
+@router.get("/personas", response_model=List[PersonaSummary])
+async def list_personas(container: "AppContainer" = Depends(get_container)):
+    """Personas available for per-session selection"""
+    return [
+        PersonaSummary(id=p.id, name=p.name, title=p.title, confidence=p.confidence)
+        for p in container.ai_service.personas.all()
+    ]
+
+@router.post("/sessions/{session_id}/probing-answers", response_model=SubmitProbingAnswersResponse)
+async def submit_probing_answers(session_id: str, request: SubmitProbingAnswersRequest, background_tasks: BackgroundTasks,
+                                 container: "AppContainer" = Depends(get_container)):
+    """Submit probing question answers and trigger advice generation"""
+    try:
+        try:
+            innovator_names = container.ai_service.get_innovator_names(request.personas)
+        except UnknownPersonaError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        persona_ids = request.personas or []
         
-        # Update session with answers and set to processing
+        # pending -> processing as one conditional write: only one concurrent submit can win
         update_data = {
             "probing_answers": request.answers,
-            "status": SessionStatus.PROCESSING.value
+            "personas": persona_ids,
+            "status": SessionStatus.PROCESSING.value,
+            "advice": [],
+            "innovator_status": {name: InnovatorStatus.PENDING.value for name in innovator_names}
         }
-        
-        await db.advisory_sessions.update_one(
-            {"session_id": session_id},
-            {"$set": update_data}
+        session_doc = await container.db.advisory_sessions.find_one_and_update(
+            {"session_id": session_id, "status": SessionStatus.PENDING.value},
+            {"$set": update_data},
+            projection=SUBMIT_PROJECTION,
+            return_document=ReturnDocument.BEFORE
         )
         
-        # Trigger background advice generation
-        background_tasks.add_task(generate_advice_background, session_id, session.user_question, request.answers)
+        if not session_doc:
+            return await _repeat_submission_response(container, session_id)
+        
+        # Hand advice generation to the worker pool; fall back to an in-process task without a queue
+        if container.job_queue:
+            await container.job_queue.enqueue(session_id, session_doc["user_question"], request.answers, persona_ids)
+        else:
+            background_tasks.add_task(
+                generate_advice_background, container, session_id, session_doc["user_question"], request.answers,
+                persona_ids
+            )
         
         logger.info(f"Started advice generation for session {session_id}")
         
@@ -105,34 +243,57 @@ async def submit_probing_answers(session_id: str, request: SubmitProbingAnswersR
         logger.error(f"Error submitting probing answers: {e}")
         raise HTTPException(status_code=500, detail="Failed to submit probing answers")
 
+async def _repeat_submission_response(container: "AppContainer", session_id: str) -> SubmitProbingAnswersResponse:
+    """Answer a submit that lost the pending -> processing transition without starting more work"""
+    session_doc = await container.db.advisory_sessions.find_one({"session_id": session_id}, {"_id": 0, "status": 1})
+    if not session_doc:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    status = session_doc["status"]
+    if status not in (SessionStatus.PROCESSING.value, SessionStatus.COMPLETED.value):
+        raise HTTPException(status_code=400, detail="Session is not in pending state")
+    
+    # Duplicate submission: generation is already running (or done), so report it idempotently
+    logger.info(f"Ignoring duplicate probing answers for session {session_id} ({status})")
+    return SubmitProbingAnswersResponse(
+        session_id=session_id,
+        processing=status == SessionStatus.PROCESSING.value,
+        estimated_completion=datetime.utcnow() + timedelta(seconds=30)
+    )
+
 @router.get("/sessions/{session_id}/advice", response_model=GetAdviceResponse)
-async def get_advice(session_id: str):
+async def get_advice(session_id: str, container: "AppContainer" = Depends(get_container)):
     """Get AI-generated advice for a session"""
     try:
-        # Find session
-        session_doc = await db.advisory_sessions.find_one({"session_id": session_id})
+        # Single projected read; the probing questions/options are never needed here
+        session_doc = await container.db.advisory_sessions.find_one({"session_id": session_id}, ADVICE_PROJECTION)
         if not session_doc:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        # Convert ObjectId to string for Pydantic
-        if '_id' in session_doc:
-            session_doc['_id'] = str(session_doc['_id'])
-        session = AdvisorySession(**session_doc)
-        
-        if session.status == SessionStatus.PENDING:
+        # Status fast path: decide on the raw document before building any models
+        status = session_doc.get("status")
+        advice = session_doc.get("advice") or []
+        if status == SessionStatus.PENDING.value:
             raise HTTPException(status_code=400, detail="Please submit probing answers first")
-        elif session.status == SessionStatus.PROCESSING:
+        elif status == SessionStatus.PROCESSING.value and not advice:
             raise HTTPException(status_code=202, detail="Advice is still being generated")
-        elif session.status == SessionStatus.FAILED:
+        elif status == SessionStatus.FAILED.value:
             raise HTTPException(status_code=500, detail="Advice generation failed")
         
-        return GetAdviceResponse(
-            session_id=session_id,
-            user_question=session.user_question,
-            probing_answers=session.probing_answers,
-            advice=session.advice,
-            status=session.status.value
-        )
+        # Innovators that have already finished are returned while the rest are still running
+        if status == SessionStatus.PROCESSING.value:
+            status = SessionStatus.PARTIAL.value
+        
+        # Stored documents were written from validated models, so skip re-validating them
+        # through response_model (kept for the OpenAPI schema) and serialize directly
+        return ORJSONResponse({
+            "session_id": session_id,
+            "user_question": session_doc["user_question"],
+            "probing_answers": session_doc.get("probing_answers", {}),
+            "advice": advice,
+            "innovator_status": session_doc.get("innovator_status", {}),
+            "status": status
+        })
         
     except HTTPException:
         raise
@@ -140,38 +301,317 @@ async def get_advice(session_id: str):
         logger.error(f"Error getting advice: {e}")
         raise HTTPException(status_code=500, detail="Failed to get advice")
 
-async def generate_advice_background(session_id: str, user_question: str, probing_answers: dict):
-    """Background task to generate advice from innovators"""
-    try:
-        logger.info(f"Generating advice for session {session_id}")
+@router.get("/sessions/{session_id}/advice/stream")
+async def stream_advice(session_id: str, container: "AppContainer" = Depends(get_container)):
+    """Stream advice generation events for a session as Server-Sent Events"""
+    session_doc = await container.db.advisory_sessions.find_one(
+        {"session_id": session_id}, {"_id": 0, "status": 1}
+    )
+    if not session_doc:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return StreamingResponse(
+        advice_event_stream(container, session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def advice_event_stream(container: "AppContainer", session_id: str):
+    """Yield SSE frames for a session until its advice is completed or failed"""
+    sessions = container.db.advisory_sessions
+    # Subscribe before reading the session so no event between the read and the wait is lost
+    async with advice_broker.subscribe(session_id) as queue:
+        sent_innovators = set()
+        
+        def stored_frames(session_doc: dict) -> Tuple[list, bool]:
+            """Frames for persisted advice not yet sent, plus the terminal event once generation has ended"""
+            status = session_doc.get("status")
+            if status == SessionStatus.FAILED.value:
+                return [format_sse(EVENT_FAILED, {"session_id": session_id})], True
+            frames = []
+            for advice in session_doc.get("advice", []):
+                if advice["innovator"] not in sent_innovators:
+                    sent_innovators.add(advice["innovator"])
+                    frames.append(format_sse(EVENT_ADVICE, advice))
+            if status != SessionStatus.COMPLETED.value:
+                return frames, False
+            frames.append(format_sse(EVENT_COMPLETED, {"session_id": session_id, "status": status}))
+            return frames, True
         
-        # Generate advice using AI service
-        advice_data = await ai_service.generate_innovator_advice(
-            user_question, probing_answers, session_id
+        session_doc = await sessions.find_one(
+            {"session_id": session_id}, {"_id": 0, "status": 1, "advice": 1}
         )
+        if not session_doc:
+            yield format_sse(EVENT_FAILED, {"session_id": session_id, "detail": "Session not found"})
+            return
         
-        # Convert to InnovatorAdvice objects
-        advice_objects = [InnovatorAdvice(**advice) for advice in advice_data]
+        yield format_sse(EVENT_STATUS, {"session_id": session_id, "status": session_doc["status"]})
+        frames, finished = stored_frames(session_doc)
+        for frame in frames:
+            yield frame
+        if finished:
+            return
         
-        # Update session with generated advice
-        update_data = {
-            "advice": [advice.dict() for advice in advice_objects],
-            "status": SessionStatus.COMPLETED.value,
-            "completed_at": datetime.utcnow()
-        }
+        deadline = asyncio.get_running_loop().time() + STREAM_MAX_SECONDS
+        while asyncio.get_running_loop().time() < deadline:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield SSE_KEEPALIVE
+                # Generation may have finished without us seeing the events (e.g. another process)
+                session_doc = await sessions.find_one(
+                    {"session_id": session_id}, {"_id": 0, "status": 1, "advice": 1}
+                )
+                frames, finished = stored_frames(session_doc or {"status": SessionStatus.FAILED.value})
+                for frame in frames:
+                    yield frame
+                if finished:
+                    return
+                continue
+            
+            event, data = message["event"], message["data"]
+            if event == EVENT_ADVICE:
+                if data["innovator"] in sent_innovators:
+                    continue
+                sent_innovators.add(data["innovator"])
+            yield format_sse(event, data)
+            if event in TERMINAL_EVENTS:
+                return
         
-        await db.advisory_sessions.update_one(
-            {"session_id": session_id},
-            {"$set": update_data}
+        yield format_sse(EVENT_TIMEOUT, {"session_id": session_id, "detail": "Advice stream timed out"})
+
+@router.post("/sessions/{session_id}/follow-ups/{persona_id}", response_model=FollowUpResponse)
+async def ask_follow_up(session_id: str, persona_id: str, request: FollowUpRequest, background_tasks: BackgroundTasks,
+                        container: "AppContainer" = Depends(get_container)):
+    """Ask one innovator a follow-up question about their advice"""
+    follow_ups = container.follow_ups
+    try:
+        persona = container.ai_service.personas.get(persona_id)
+    except UnknownPersonaError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    # Only this persona's advice entry is read, not the whole board's
+    session_doc = await container.db.advisory_sessions.find_one(
+        {"session_id": session_id},
+        {
+            "_id": 0, "session_id": 1, "user_question": 1, "probing_answers": 1, "personas": 1,
+            f"innovator_status.{persona.name}": 1, "advice": {"$elemMatch": {"innovator": persona.name}}
+        }
+    )
+    if not session_doc:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if session_doc.get("personas") and persona_id not in session_doc["personas"]:
+        raise HTTPException(status_code=400, detail=f"{persona.name} did not advise on this session")
+    advice = session_doc.get("advice") or []
+    if session_doc.get("innovator_status", {}).get(persona.name) != InnovatorStatus.COMPLETED.value or not advice:
+        raise HTTPException(status_code=400, detail=f"Advice from {persona.name} is not ready yet")
+    
+    try:
+        turn_index, turn, compact_due = await follow_ups.ask(
+            session_doc, persona, advice[0]["advice_text"], request.question
         )
+    except FollowUpLimitError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LlmDeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error answering follow-up for {session_id}/{persona_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to answer follow-up")
+    
+    if compact_due:
+        # Summarize older turns after the response is sent so this turn's latency is unaffected
+        background_tasks.add_task(follow_ups.compact, session_id, persona)
+    
+    return FollowUpResponse(
+        session_id=session_id,
+        persona=persona_id,
+        innovator=persona.name,
+        turn=turn_index,
+        question=turn.question,
+        answer=turn.answer,
+        answered_at=turn.answered_at
+    )
+
+@router.get("/sessions/{session_id}/follow-ups/{persona_id}", response_model=FollowUpThreadResponse)
+async def get_follow_ups(session_id: str, persona_id: str, container: "AppContainer" = Depends(get_container)):
+    """Every follow-up turn with one innovator, oldest first"""
+    try:
+        persona = container.ai_service.personas.get(persona_id)
+    except UnknownPersonaError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    turns = await container.follow_ups.history(session_id, persona_id)
+    return ORJSONResponse({"session_id": session_id, "persona": persona_id, "innovator": persona.name, "turns": turns})
+
+@ops_router.get("/probing-cache")
+async def get_probing_cache_stats(container: "AppContainer" = Depends(get_container)):
+    """Hit/miss counters for the probing question cache"""
+    if not container.probing_cache:
+        return {"enabled": False}
+    return {"enabled": True, **container.probing_cache.stats()}
+
+@ops_router.get("/llm-limiter")
+async def get_llm_limiter_stats(container: "AppContainer" = Depends(get_container)):
+    """Admission controller load and queue-wait counters"""
+    return container.ai_service.limiter.stats()
+
+@ops_router.get("/llm-router")
+async def get_llm_router_stats(container: "AppContainer" = Depends(get_container)):
+    """Rolling latency, error rate and circuit state per task and provider/model route"""
+    return container.ai_service.router.stats()
+
+@ops_router.get("/single-flight")
+async def get_single_flight_stats(container: "AppContainer" = Depends(get_container)):
+    """Shared and cached advice call counters"""
+    return container.ai_service.single_flight.stats()
+
+async def generate_advice(container: "AppContainer", session_id: str, user_question: str, probing_answers: dict,
+                          persona_ids: Optional[List[str]] = None):
+    """Generate advice from innovators, persisting each one as it completes; raises on failure"""
+    logger.info(f"Generating advice for session {session_id}")
+    db, ai_service, warm_store = container.db, container.ai_service, container.warm_store
+    
+    # Every write below is conditional on this generation still owning a processing session, so a
+    # worker whose lease was taken over (or a session already finished) cannot clobber the result
+    generation_id = uuid.uuid4().hex
+    owned = {"session_id": session_id, "status": SessionStatus.PROCESSING.value, "generation_id": generation_id}
+    
+    # Start from a clean slate so a retried job never duplicates advice from an earlier attempt
+    result = await db.advisory_sessions.update_one(
+        {"session_id": session_id, "status": SessionStatus.PROCESSING.value},
+        {"$set": {
+            "generation_id": generation_id,
+            "advice": [],
+            "innovator_status": {
+                name: InnovatorStatus.PENDING.value for name in ai_service.get_innovator_names(persona_ids)
+            }
+        }}
+    )
+    if result.matched_count == 0:
+        logger.info(f"Session {session_id} is no longer processing, skipping advice generation")
+        return
+    
+    # Popular combinations are answered from precomputed advice (refreshed in the background when stale)
+    warm = await warm_store.lookup_advice(user_question, probing_answers, persona_ids) if warm_store else None
+    if warm:
+        await _complete_from_warm(container, session_id, owned, warm)
+        return
+    
+    # Push each innovator's advice as soon as it lands so readers never wait on the slowest call
+    async for advice, succeeded in ai_service.iter_innovator_advice(
+        user_question, probing_answers, session_id, persona_ids=persona_ids
+    ):
+        advice_object = InnovatorAdvice(**advice)
+        innovator_status = InnovatorStatus.COMPLETED if succeeded else InnovatorStatus.FAILED
         
-        logger.info(f"Successfully generated advice for session {session_id}")
-        
+        result = await db.advisory_sessions.update_one(owned, {
+            "$push": {"advice": advice_object.model_dump()},
+            "$set": {f"innovator_status.{advice_object.innovator}": innovator_status.value}
+        })
+        if result.matched_count == 0:
+            logger.warning(f"Advice generation for session {session_id} was superseded, stopping")
+            return
+        advice_broker.publish(session_id, EVENT_ADVICE, advice_object.model_dump())
+    
+    # processing -> completed
+    completed_at = datetime.utcnow()
+    session = await db.advisory_sessions.find_one_and_update(owned, {"$set": {
+        "status": SessionStatus.COMPLETED.value,
+        "completed_at": completed_at
+    }}, projection={"_id": 0, "created_at": 1}, return_document=ReturnDocument.BEFORE)
+    if session is None:
+        logger.warning(f"Advice generation for session {session_id} was superseded before completion")
+        return
+    if session.get("created_at"):
+        ADVICE_SESSION_SECONDS.observe((completed_at - session["created_at"]).total_seconds())
+    
+    advice_broker.publish(session_id, EVENT_COMPLETED, {
+        "session_id": session_id,
+        "status": SessionStatus.COMPLETED.value
+    })
+    logger.info(f"Successfully generated advice for session {session_id}")
+
+async def _complete_from_warm(container: "AppContainer", session_id: str, owned: dict, advice: List[dict]):
+    """Store every innovator's precomputed advice and complete the session in one write"""
+    completed_at = datetime.utcnow()
+    session = await container.db.advisory_sessions.find_one_and_update(owned, {"$set": {
+        "advice": advice,
+        "innovator_status": {entry["innovator"]: InnovatorStatus.COMPLETED.value for entry in advice},
+        "status": SessionStatus.COMPLETED.value,
+        "completed_at": completed_at
+    }}, projection={"_id": 0, "created_at": 1}, return_document=ReturnDocument.BEFORE)
+    if session is None:
+        logger.warning(f"Warm advice for session {session_id} was superseded before completion")
+        return
+    if session.get("created_at"):
+        ADVICE_SESSION_SECONDS.observe((completed_at - session["created_at"]).total_seconds())
+    
+    for entry in advice:
+        advice_broker.publish(session_id, EVENT_ADVICE, entry)
+    advice_broker.publish(session_id, EVENT_COMPLETED, {
+        "session_id": session_id,
+        "status": SessionStatus.COMPLETED.value
+    })
+    logger.info(f"Served warm advice for session {session_id}")
+
+async def mark_advice_failed(container: "AppContainer", session_id: str):
+    """Mark a session's advice generation as permanently failed (processing -> failed)"""
+    result = await container.db.advisory_sessions.update_one(
+        {"session_id": session_id, "status": SessionStatus.PROCESSING.value},
+        {"$set": {"status": SessionStatus.FAILED.value}}
+    )
+    if result.modified_count:
+        advice_broker.publish(session_id, EVENT_FAILED, {"session_id": session_id})
+
+def route_metric_families(router_stats: dict) -> List[Metric]:
+    """Per provider/model route health as labelled gauges"""
+    routes = {route: stats for chain in router_stats.values() for route, stats in chain.items()}
+    return [
+        gauge_family(f"llm_route_{key}", f"LLM route rolling {key.replace('_', ' ')}", [
+            ({"route": route}, stats[key]) for route, stats in routes.items() if stats[key] is not None
+        ])
+        for key in ("error_rate", "p50_seconds", "p95_seconds", "circuit_open")
+    ]
+
+async def collect_advisory_metrics(container: "AppContainer") -> List[Metric]:
+    """Scrape-time gauges: job queue depth, stored session statuses and LLM-side cache/limiter counters"""
+    db, ai_service = container.db, container.ai_service
+    job_queue, probing_cache = container.job_queue, container.probing_cache
+    session_counts = [
+        ({"status": status.value}, await db.advisory_sessions.count_documents({"status": status.value}))
+        for status in SessionStatus if status is not SessionStatus.PARTIAL
+    ]
+    families = [gauge_family("advisory_sessions", "Stored advisory sessions by status", session_counts)]
+    if job_queue:
+        families.append(gauge_family(
+            "advice_job_queue_depth", "Advice jobs waiting to be claimed", [({}, await job_queue.depth())]
+        ))
+    if probing_cache:
+        families.extend(gauges("probing_cache", "Probing question cache", probing_cache.stats()))
+    families.extend(gauges("llm_limiter", "LLM admission controller", ai_service.limiter.stats()))
+    families.extend(gauges("single_flight", "Shared advice calls", ai_service.single_flight.stats()))
+    families.extend(route_metric_families(ai_service.router.stats()))
+    return families
+
+def advice_job_handlers(
+    container: "AppContainer"
+) -> Tuple[Callable[[AdviceJob], Awaitable[None]], Callable[[str], Awaitable[None]]]:
+    """Job queue handler and give-up callback for AdviceWorker, bound to the container's services"""
+    async def process_advice_job(job: AdviceJob):
+        # Exceptions propagate so the queue can retry with backoff
+        await generate_advice(container, job.session_id, job.user_question, job.probing_answers, job.personas)
+    
+    async def on_give_up(session_id: str):
+        await mark_advice_failed(container, session_id)
+    
+    return process_advice_job, on_give_up
+
+async def generate_advice_background(container: "AppContainer", session_id: str, user_question: str,
+                                     probing_answers: dict, persona_ids: Optional[List[str]] = None):
+    """Background task to generate advice from innovators"""
+    try:
+        await generate_advice(container, session_id, user_question, probing_answers, persona_ids)
     except Exception as e:
         logger.error(f"Error in background advice generation for session {session_id}: {e}")
         
         # Mark session as failed
-        await db.advisory_sessions.update_one(
-            {"session_id": session_id},
-            {"$set": {"status": SessionStatus.FAILED.value}}
-        )
\ No newline at end of file
+        await mark_advice_failed(container, session_id)
@@ -1,33 +1,29 @@
 import os
 import asyncio
 import logging
-from typing import List, Dict, Tuple
+import time
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional, Any, AsyncIterator
 from datetime import datetime
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-from dotenv import load_dotenv
+from llm_limiter import LlmAdmissionController, LlmBackpressureError, LlmPriority, estimate_tokens
+from llm_clients import LlmClientPool, create_client_pool
+from persona_registry import Persona, PersonaRegistry
+from single_flight import SingleFlight, flight_key
+from llm_resilience import HedgePolicy, LatencyTracker, LlmDeadlineExceeded, hedged
+from model_router import ModelRoute, ModelRouter, create_model_router
+from probing_schema import (
+    JSON_RESPONSE_FORMAT, PROBING_QUESTION_COUNT, ProbingParseResult, ProbingSlot, parse_probing_slots, repair_prompt
+)
+from metrics import (
+    LLM_ADMISSION_WAIT_SECONDS, LLM_REQUEST_SECONDS, LLM_HEDGES, LLM_DEADLINE_EXCEEDED, PROBING_QUESTIONS,
+    INNOVATOR_ADVICE
+)
 
-load_dotenv()
+if TYPE_CHECKING:
+    from emergentintegrations.llm.chat import LlmChat, UserMessage
 
 logger = logging.getLogger(__name__)
 
-class AIAdvisoryService:
-    def __init__(self):
-        self.api_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not self.api_key:
-            raise ValueError("EMERGENT_LLM_KEY not found in environment variables")
-    
-    def _create_chat(self, session_id: str, system_message: str) -> LlmChat:
-        """Create a new LlmChat instance"""
-        return LlmChat(
-            api_key=self.api_key,
-            session_id=session_id,
-            system_message=system_message
-        ).with_model("openai", "gpt-4o")
-    
-    async def generate_probing_questions(self, user_question: str, session_id: str) -> Tuple[List[str], List[List[str]]]:
-        """Generate contextual probing questions based on user's initial question"""
-        try:
-            system_message = """
+PROBING_SYSTEM_MESSAGE = """
             You are an AI assistant that generates strategic probing questions focused on growth and disruption.
             
             Your task: Generate exactly 3 relevant follow-up questions with multiple choice options to help tailor exponential growth advice.
@@ -50,40 +46,211 @@ class AIAdvisoryService:
             Avoid asking about constraints or limitations. Focus on opportunities and growth vectors.
             Make questions specific to their challenge and provide 3 realistic options each, with the 4th always being "Not sure, just go ahead".
             """
+
+SUMMARY_SYSTEM_MESSAGE = """
+            You maintain a running summary of a conversation between a user and a business advisor.
             
-            chat = self._create_chat(session_id + "_probing", system_message)
-            
-            user_message = UserMessage(
-                text=f"User's challenge: {user_question}\n\nGenerate 3 strategic probing questions with 4 multiple choice options each."
+            You are given the summary so far (possibly empty) and the next exchanges. Rewrite the summary so it
+            also covers the new exchanges. Keep the user's goals, facts they shared, and the advisor's concrete
+            recommendations and commitments. Drop pleasantries and repetition. Reply with the summary text only.
+            """
+
+class AIAdvisoryService:
+    def __init__(self, limiter: Optional[LlmAdmissionController] = None, clients: Optional[LlmClientPool] = None,
+                 personas: Optional[PersonaRegistry] = None, single_flight: Optional[SingleFlight] = None,
+                 router: Optional[ModelRouter] = None, hedging: Optional[HedgePolicy] = None):
+        self.api_key = os.environ.get('EMERGENT_LLM_KEY')
+        if not self.api_key:
+            raise ValueError("EMERGENT_LLM_KEY not found in environment variables")
+        # Shared across every call in the process so total LLM load stays bounded
+        self.limiter = limiter or LlmAdmissionController()
+        self.clients = clients or create_client_pool(self.api_key)
+        self.personas = personas or PersonaRegistry.load()
+        # Identical (persona, context) calls in flight at the same time share one LLM request
+        self.single_flight = single_flight or SingleFlight()
+        # Per-task provider/model chains; each route has its own circuit breaker and health stats
+        self.router = router or create_model_router()
+        # Bound each persona's tail latency
+        self.hedging = hedging or HedgePolicy()
+        self.latency_tracker = LatencyTracker()
+        # Time allowed for the first probing call plus any repair of invalid questions
+        self.probing_budget_seconds = float(os.environ.get('PROBING_BUDGET_SECONDS', 8))
+        
+        # Prompts are prepared once here rather than rebuilt for every request
+        self.clients.prepare("probing", PROBING_SYSTEM_MESSAGE)
+        self.clients.prepare("summary", SUMMARY_SYSTEM_MESSAGE)
+        for persona in self.personas.all():
+            self.clients.prepare(persona.id, persona.system_prompt)
+    
+    async def aclose(self):
+        """Release pooled LLM connections"""
+        await self.clients.aclose()
+    
+    def _create_chat(self, session_id: str, system_message: str, route: ModelRoute,
+                     response_format: Optional[Dict[str, Any]] = None) -> "LlmChat":
+        """Create a LlmChat instance on the shared connection pool"""
+        return self.clients.chat(session_id, system_message, route.provider, route.model, response_format)
+    
+    async def _complete(self, chat_session_id: str, system_message: str, user_message: "UserMessage",
+                        priority: LlmPriority, shed: bool = False, persona: str = "",
+                        response_format: Optional[Dict[str, Any]] = None, stall_seconds: Optional[float] = None,
+                        in_flight: Optional[List[ModelRoute]] = None) -> str:
+        """Send along the task's model chain, failing over to the next route when one errors or is tripped.
+
+        Routes in `in_flight` (still busy with an earlier attempt of the same call) are tried last, so a
+        hedge goes to the next route in the chain rather than the one that is stalling.
+        """
+        busy = in_flight if in_flight is not None else []
+        candidates = sorted(self.router.candidates(priority.name.lower()), key=lambda route: route in busy)
+        error = None
+        for route in candidates:
+            chat = self._create_chat(chat_session_id, system_message, route, response_format)
+            busy.append(route)
+            try:
+                return await self._send(
+                    chat, route, system_message, user_message, priority, shed, persona, stall_seconds
+                )
+            except LlmBackpressureError:
+                raise
+            except Exception as e:
+                logger.warning(f"LLM route {route} failed: {e}")
+                error = e
+            finally:
+                busy.remove(route)
+        raise error
+    
+    async def _send(self, chat: "LlmChat", route: ModelRoute, system_message: str, user_message: "UserMessage",
+                    priority: LlmPriority, shed: bool = False, persona: str = "",
+                    stall_seconds: Optional[float] = None) -> str:
+        """Send a message on one route once its circuit and the admission controller allow it.
+
+        A call cancelled after running for `stall_seconds` (outlived by a hedge, or cut off at the
+        deadline) counts as a failure of its route, so a hanging provider trips its breaker.
+        """
+        task = priority.name.lower()
+        health = self.router.health(route)
+        requested_at = time.perf_counter()
+        with health.breaker.guard():
+            async with self.limiter.admit(priority, estimate_tokens(system_message, user_message.text), shed=shed):
+                started = time.perf_counter()
+                LLM_ADMISSION_WAIT_SECONDS.labels(task=task).observe(started - requested_at)
+                outcome = "cancelled"
+                try:
+                    response = await chat.send_message(user_message)
+                    outcome = "ok"
+                    self.latency_tracker.observe(persona or task, time.perf_counter() - started)
+                    return response
+                except Exception:
+                    outcome = "error"
+                    raise
+                finally:
+                    elapsed = time.perf_counter() - started
+                    stalled = outcome == "cancelled" and stall_seconds is not None and elapsed >= stall_seconds
+                    if stalled:
+                        health.breaker.record_failure()
+                    # A call cancelled at its deadline still tells the router how slow the route was
+                    health.observe(elapsed, False if stalled else {"ok": True, "error": False}.get(outcome))
+                    LLM_REQUEST_SECONDS.labels(
+                        task=task, persona=persona, route=str(route), outcome=outcome
+                    ).observe(elapsed)
+    
+    async def _send_within_deadline(self, persona: Persona, chat_session_id: str, system_message: str,
+                                    user_message: "UserMessage", priority: LlmPriority = LlmPriority.ADVICE) -> str:
+        """Persona call bounded by the persona's deadline, hedged once it outlives that persona's usual p95"""
+        deadline = persona.deadline_seconds or self.hedging.deadline_seconds
+        hedge_delay = self.hedging.hedge_delay(self.latency_tracker, persona.id)
+        # Routes each attempt is currently waiting on; hedges start elsewhere in the chain
+        in_flight: List[ModelRoute] = []
+        
+        def attempt():
+            # Each attempt creates fresh chats, so a hedge never shares conversation state with the original
+            return self._complete(chat_session_id, system_message, user_message, priority, persona=persona.id,
+                                  stall_seconds=hedge_delay, in_flight=in_flight)
+        
+        def on_hedge(attempt_index: int):
+            logger.info(f"Hedging slow advice call for {persona.name} (attempt {attempt_index + 1})")
+            LLM_HEDGES.labels(persona=persona.id, result="fired").inc()
+        
+        try:
+            response, winner = await asyncio.wait_for(
+                hedged(attempt, hedge_delay, self.hedging.max_hedges, on_hedge), timeout=deadline
             )
+        except asyncio.TimeoutError:
+            LLM_DEADLINE_EXCEEDED.labels(persona=persona.id).inc()
+            raise LlmDeadlineExceeded(f"No advice from {persona.name} within {deadline:g}s")
+        if winner:
+            LLM_HEDGES.labels(persona=persona.id, result="won").inc()
+        return response
+    
+    async def generate_probing_questions(self, user_question: str, session_id: str) -> Tuple[List[str], List[List[str]]]:
+        """Generate contextual probing questions based on user's initial question"""
+        started = time.monotonic()
+        try:
             
-            response = await chat.send_message(user_message)
+            system_message = self.clients.prompt("probing")
             
-            # Parse JSON response
-            import json
-            try:
-                # Clean the response in case there's extra text
-                response_text = response.strip()
-                
-                # Try to find JSON in the response
-                if '{' in response_text:
-                    start_idx = response_text.find('{')
-                    end_idx = response_text.rfind('}') + 1
-                    json_text = response_text[start_idx:end_idx]
-                    data = json.loads(json_text)
-                    return data["questions"], data["options"]
-                else:
-                    raise json.JSONDecodeError("No JSON found in response", response_text, 0)
-                    
-            except (json.JSONDecodeError, KeyError) as e:
-                logger.error(f"Failed to parse probing questions response: {e}")
-                logger.error(f"Raw response: {response}")
-                # Fallback to default questions
-                return self._get_default_probing_questions()
+            user_message = self.clients.message(
+                f"User's challenge: {user_question}\n\nGenerate 3 strategic probing questions with 4 multiple choice options each."
+            )
+            
+            # Interactive call: jump ahead of advice and fail fast when the queue is too deep
+            response = await self._complete(
+                session_id + "_probing", system_message, user_message, LlmPriority.PROBING, shed=True,
+                response_format=JSON_RESPONSE_FORMAT
+            )
                 
+        except LlmBackpressureError:
+            PROBING_QUESTIONS.labels(result="shed").inc()
+            raise
         except Exception as e:
             logger.error(f"Error generating probing questions: {e}")
+            PROBING_QUESTIONS.labels(result="error_fallback").inc()
             return self._get_default_probing_questions()
+        
+        # Keep every well-formed question; only the broken ones go back to the model
+        try:
+            result = parse_probing_slots(response)
+        except ValueError as e:
+            logger.error(f"Failed to parse probing questions response: {e}")
+            logger.error(f"Raw response: {response}")
+            result = ProbingParseResult([None] * PROBING_QUESTION_COUNT)
+        
+        outcome = "parsed"
+        if not result.complete:
+            outcome = await self._repair_probing_questions(user_question, session_id, result, started)
+        PROBING_QUESTIONS.labels(result=outcome).inc()
+        return result.as_lists()
+    
+    async def _repair_probing_questions(self, user_question: str, session_id: str, result: ProbingParseResult,
+                                        started: float) -> str:
+        """Regenerate only the invalid question slots within the latency budget; defaults fill whatever is left"""
+        missing = result.missing
+        remaining = self.probing_budget_seconds - (time.monotonic() - started)
+        if remaining > 0:
+            try:
+                response = await asyncio.wait_for(self._complete(
+                    session_id + "_probing_repair", self.clients.prompt("probing"),
+                    self.clients.message(repair_prompt(user_question, result)), LlmPriority.PROBING, shed=True,
+                    response_format=JSON_RESPONSE_FORMAT
+                ), timeout=remaining)
+                result.fill(missing, parse_probing_slots(response, count=len(missing)).slots)
+            except Exception as e:
+                logger.warning(f"Probing question repair failed: {e}")
+        if result.complete:
+            return "repaired"
+        
+        unrepaired = result.missing
+        default_questions, default_options = self._get_default_probing_questions()
+        result.fill(unrepaired, [
+            ProbingSlot.model_construct(question=default_questions[index], options=default_options[index])
+            for index in unrepaired
+        ])
+        return "parse_fallback" if len(unrepaired) == PROBING_QUESTION_COUNT else "partial_fallback"
+    
+    def is_default_probing_questions(self, questions: List[str]) -> bool:
+        """Whether any of the questions is a canned fallback rather than LLM output"""
+        defaults = self._get_default_probing_questions()[0]
+        return any(question in defaults for question in questions)
     
     def _get_default_probing_questions(self) -> Tuple[List[str], List[List[str]]]:
         """Fallback probing questions"""
@@ -118,127 +285,102 @@ class AIAdvisoryService:
         
         return questions, options
     
-    async def generate_innovator_advice(self, user_question: str, probing_answers: Dict[str, str], session_id: str) -> List[Dict[str, str]]:
-        """Generate advice from all three innovators"""
-        innovators = [
-            {
-                "name": "Jeff Bezos",
-                "title": "Amazon Founder",
-                "confidence": "94.7%",
-                "persona_prompt": """
-                You are Jeff Bezos. First analyze the specific industry context, then give bold asymmetric strategies.
-                
-                Rules:
-                - Keep response to 2 short paragraphs max
-                - Start by analyzing the specific industry dynamics, competitors, and hidden opportunities
-                - Give industry-specific 10x growth hacks that exploit unique market inefficiencies
-                - Suggest unconventional business models or revenue streams specific to this industry
-                - Propose new venture ideas adjacent to their core business
-                - Focus on asymmetric bets that could create monopolistic advantages
-                - Reference their probing answers with industry-specific context
-                
-                Style: Industry-savvy, bold, focused on specific asymmetric opportunities in their exact market.
-                """
-            },
-            {
-                "name": "Steve Jobs", 
-                "title": "Apple Co-founder",
-                "confidence": "96.2%",
-                "persona_prompt": """
-                You are Steve Jobs. Analyze their industry deeply, then suggest radical product reinventions.
-                
-                Rules:
-                - Keep response to 2 short paragraphs max
-                - Analyze what's fundamentally broken in their specific industry
-                - Suggest bold product concepts that would make current solutions obsolete
-                - Propose new product categories or entirely new user experiences specific to this industry
-                - Give contrarian takes on what the industry thinks is impossible
-                - Suggest adjacent product ventures that could create an ecosystem
-                - Reference their probing answers with industry-specific product insights
-                
-                Style: Contrarian, visionary, focused on industry-specific product revolutions.
-                """
-            },
-            {
-                "name": "Elon Musk",
-                "title": "Tesla & SpaceX CEO", 
-                "confidence": "92.8%",
-                "persona_prompt": """
-                You are Elon Musk. Apply first-principles thinking to their specific industry, then suggest moonshot ventures.
-                
-                Rules:
-                - Keep response to 2 short paragraphs max
-                - Break down their industry using first-principles to identify fundamental inefficiencies
-                - Suggest bold new venture ideas that could disrupt the entire industry ecosystem
-                - Propose exponential technologies or approaches specific to this industry
-                - Give contrarian strategies that challenge core industry assumptions
-                - Suggest portfolio of adjacent ventures that could create market dominance
-                - Reference their probing answers with first-principles analysis of their specific market
-                
-                Style: First-principles focused, contrarian, industry-specific moonshot ventures.
-                """
-            }
-        ]
+    def get_innovator_names(self, persona_ids: Optional[List[str]] = None) -> List[str]:
+        """Names of the innovators that advise on a session (all registered personas by default)"""
+        return [persona.name for persona in self.personas.select(persona_ids)]
+    
+    async def generate_innovator_advice(self, user_question: str, probing_answers: Dict[str, str], session_id: str,
+                                        persona_ids: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """Generate advice from the selected innovators (all of them by default)"""
+        personas = self.personas.select(persona_ids)
         
         # Generate context from probing answers
-        context = self._build_context(user_question, probing_answers)
+        context = self.build_context(user_question, probing_answers)
         
         # Generate advice from each innovator concurrently
-        tasks = []
-        for innovator in innovators:
-            task = self._generate_single_advice(innovator, context, session_id)
-            tasks.append(task)
-        
-        advice_results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Process results
-        advice_list = []
-        for i, result in enumerate(advice_results):
-            if isinstance(result, Exception):
-                logger.error(f"Error generating advice for {innovators[i]['name']}: {result}")
-                # Fallback advice
-                advice_list.append({
-                    "innovator": innovators[i]["name"],
-                    "title": innovators[i]["title"],
-                    "confidence": innovators[i]["confidence"],
-                    "advice_text": f"I apologize, but I'm unable to provide specific advice at this time. However, I encourage you to focus on the fundamentals of your challenge and seek multiple perspectives.",
-                    "generated_at": datetime.utcnow()
-                })
-            else:
-                advice_list.append({
-                    "innovator": innovators[i]["name"],
-                    "title": innovators[i]["title"], 
-                    "confidence": innovators[i]["confidence"],
-                    "advice_text": result,
-                    "generated_at": datetime.utcnow()
-                })
-        
-        return advice_list
+        tasks = [self._generate_innovator_entry(persona, context, session_id) for persona in personas]
+        entries = await asyncio.gather(*tasks)
+        return [advice for advice, _ in entries]
     
-    def _build_context(self, user_question: str, probing_answers: Dict[str, str]) -> str:
-        """Build context string from user question and probing answers"""
-        context = f"User's Challenge: {user_question}\n\n"
-        context += "Key Strategic Context (use this to tailor your advice):\n"
-        
-        for key, answer in probing_answers.items():
-            context += f"- {answer}\n"
-        
-        context += "\nCRITICAL: Analyze the specific industry context first. What are the unique dynamics, competitors, inefficiencies, and hidden opportunities in this exact industry? Then give bold, industry-specific strategies that exploit these insights. Avoid generic business advice.\n"
+    async def iter_innovator_advice(self, user_question: str, probing_answers: Dict[str, str], session_id: str,
+                                    persona_ids: Optional[List[str]] = None) -> AsyncIterator[Tuple[Dict[str, Any], bool]]:
+        """Yield (advice, succeeded) for each innovator in completion order rather than waiting for the slowest"""
+        context = self.build_context(user_question, probing_answers)
+        tasks = [
+            asyncio.ensure_future(self._generate_innovator_entry(persona, context, session_id))
+            for persona in self.personas.select(persona_ids)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _generate_innovator_entry(self, persona: Persona, context: str,
+                                        session_id: str) -> Tuple[Dict[str, Any], bool]:
+        """Generate one innovator's advice entry, falling back to canned advice on failure"""
+        succeeded = True
+        try:
+            advice_text = await self._generate_single_advice(persona, context, session_id)
+        except Exception as e:
+            logger.error(f"Error generating advice for {persona.name}: {e}")
+            succeeded = False
+            advice_text = "I apologize, but I'm unable to provide specific advice at this time. However, I encourage you to focus on the fundamentals of your challenge and seek multiple perspectives."
+        INNOVATOR_ADVICE.labels(persona=persona.id, result="generated" if succeeded else "fallback").inc()
         
-        return context
+        advice = {
+            "innovator": persona.name,
+            "title": persona.title,
+            "confidence": persona.confidence,
+            "advice_text": advice_text,
+            "generated_at": datetime.utcnow()
+        }
+        return advice, succeeded
+    
+    def build_context(self, user_question: str, probing_answers: Dict[str, str]) -> str:
+        """Build the per-request part of the prompt; static instructions live in the persona system prompt"""
+        lines = [
+            f"User's Challenge: {user_question}",
+            "",
+            "Key Strategic Context (use this to tailor your advice):"
+        ]
+        lines.extend(f"- {answer}" for answer in probing_answers.values())
+        return "\n".join(lines) + "\n"
+    
+    def _chat_session_id(self, session_id: str, persona: Persona) -> str:
+        """LlmChat session id for one persona's conversation within an advisory session"""
+        return f"{session_id}_{persona.name.lower().replace(' ', '_')}"
     
-    async def _generate_single_advice(self, innovator: Dict, context: str, session_id: str) -> str:
+    async def generate_follow_up(self, persona: Persona, session_id: str, prompt: str) -> str:
+        """Answer a follow-up question in the persona's conversation; no fallback, failures are raised"""
+        return await self._send_within_deadline(
+            persona, self._chat_session_id(session_id, persona), self.clients.prompt(persona.id),
+            self.clients.message(prompt), priority=LlmPriority.FOLLOW_UP
+        )
+    
+    async def summarize_conversation(self, persona: Persona, session_id: str, prompt: str) -> str:
+        """Fold older follow-up turns into the running summary (low priority, cheap model chain)"""
+        response = await self._complete(
+            self._chat_session_id(session_id, persona) + "_summary", self.clients.prompt("summary"),
+            self.clients.message(prompt), LlmPriority.SUMMARY, persona=persona.id
+        )
+        return response.strip()
+    
+    async def _generate_single_advice(self, persona: Persona, context: str, session_id: str) -> str:
         """Generate advice from a single innovator"""
         try:
-            chat = self._create_chat(f"{session_id}_{innovator['name'].lower().replace(' ', '_')}", innovator["persona_prompt"])
+            system_message = self.clients.prompt(persona.id)
+            chat_session_id = self._chat_session_id(session_id, persona)
             
-            user_message = UserMessage(
-                text=f"{context}\n\nProvide strategic advice for this challenge from your unique perspective and experience."
-            )
+            user_message = self.clients.message(context)
             
-            response = await chat.send_message(user_message)
-            return response
+            key = flight_key(",".join(map(str, self.router.chain("advice"))), system_message, context)
+            # LlmChat.send_message returns the full completion; streams get it in the `advice` event
+            return await self.single_flight.do(
+                key, lambda: self._send_within_deadline(persona, chat_session_id, system_message, user_message)
+            )
             
         except Exception as e:
-            logger.error(f"Error generating advice for {innovator['name']}: {e}")
+            logger.error(f"Error generating advice for {persona.name}: {e}")
             raise e
\ No newline at end of file
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from ai_service import AIAdvisoryService
+from advice_stream import MongoEventRelay, advice_broker, create_event_relay
+from advisory_routes import advice_job_handlers, collect_advisory_metrics
+from db_indexes import ensure_indexes
+from follow_up import FollowUpService, create_follow_up_service
+from job_queue import AdviceJobQueue
+from llm_limiter import create_admission_controller
+from llm_resilience import create_hedge_policy
+from metrics import metrics, Metric, MongoCommandMetrics, MONGO_COMMAND_SECONDS, gauge_family
+from model_router import create_model_router
+from probing_cache import ProbingQuestionCache
+from rate_limit import RateLimiter, create_rate_limiter
+from single_flight import create_single_flight
+from warm_advice import create_warm_advice_scheduler, create_warm_advice_store
+from worker import AdviceWorker, create_job_queue, recover_orphaned_sessions, worker_concurrency
+
+logger = logging.getLogger(__name__)
+
+
+class AppContainer:
+    """Everything the API process owns, built in the lifespan startup and released at shutdown.
+
+    Nothing connects at import time: the Mongo client, AI service, caches, job queue, worker and
+    rate limiter are created by start(). start() returns once Mongo answers and the indexes exist;
+    the LLM client library is imported in the background. readiness() checks only what this
+    process owns; provider reachability is probed in the background (unless `check_llm` is off)
+    and reported as `llm_reachable`, since a provider outage is not fixed by restarting or
+    draining replicas. Routes get the container through `Depends(get_container)`, and the advice
+    job handlers close over it.
+
+    A standalone `python -m worker` calls start_services() instead, which builds the services
+    advice generation needs without the API's rate limiter, scheduler and probes.
+
+    `database` and `ai_service_factory` replace the Mongo database and AIAdvisoryService, for
+    benchmarks that run the app in-process.
+    """
+
+    def __init__(self, database: Optional[AsyncIOMotorDatabase] = None,
+                 ai_service_factory: Optional[Callable[..., AIAdvisoryService]] = None,
+                 probe_timeout: float = 2, llm_check_seconds: float = 30, check_llm: bool = True):
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.db = database
+        self.ai_service_factory = ai_service_factory or AIAdvisoryService
+        self.probe_timeout = probe_timeout
+        # Provider reachability is re-probed this often
+        self.llm_check_seconds = llm_check_seconds
+        self.check_llm = check_llm
+        self.ai_service: Optional[AIAdvisoryService] = None
+        self.probing_cache: Optional[ProbingQuestionCache] = None
+        self.job_queue: Optional[AdviceJobQueue] = None
+        self.follow_ups: Optional[FollowUpService] = None
+        self.rate_limiter: Optional[RateLimiter] = None
+        self.advice_worker: Optional[AdviceWorker] = None
+        self.warm_store = None
+        self.warm_scheduler = None
+        self.event_relay: Optional[MongoEventRelay] = None
+        self.started = False
+        self.llm_reachable: Optional[bool] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def start(self):
+        await self.start_services()
+        self.rate_limiter = await create_rate_limiter(self.db.rate_limits, len(self.ai_service.personas.ids))
+        metrics.add_collector(self.collect_metrics)
+
+        # Run an in-process worker unless advice generation is scaled out to `python -m worker`
+        if os.environ.get('ADVICE_WORKER_EMBEDDED', 'true').lower() == 'true':
+            self.advice_worker = AdviceWorker(
+                self.job_queue, *advice_job_handlers(self), concurrency=worker_concurrency()
+            )
+            self._tasks["advice_worker"] = asyncio.create_task(self.advice_worker.run())
+        elif not self.event_relay:
+            logger.warning("Advice is generated by `python -m worker` but ADVICE_EVENTS_SHARED is off; "
+                           "advice streams will only see the final session state")
+
+        # Mine popular questions and precompute their advice during off-peak hours
+        if self.warm_store:
+            self.warm_scheduler = create_warm_advice_scheduler(self.warm_store)
+            self._tasks["warm_scheduler"] = asyncio.create_task(self.warm_scheduler.run())
+
+        self._tasks["llm_warmup"] = asyncio.create_task(self.warm_llm_client())
+        self.started = True
+
+    async def start_services(self):
+        """Connect to Mongo and build the services shared by the API and advice workers"""
+        if self.db is None:
+            self.client = AsyncIOMotorClient(
+                os.environ['MONGO_URL'],
+                # Connections are opened in the background up to this floor, so the first requests find them ready
+                minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', 4)),
+                event_listeners=[MongoCommandMetrics(MONGO_COMMAND_SECONDS)]
+            )
+            self.db = self.client[os.environ['DB_NAME']]
+        # Fail fast on an unreachable database, and open the first pooled connection before traffic arrives
+        await self.db.command("ping")
+        await ensure_indexes(self.db)
+
+        self.ai_service = self.ai_service_factory(
+            create_admission_controller(), single_flight=create_single_flight(),
+            router=create_model_router(), hedging=create_hedge_policy()
+        )
+        self.probing_cache = ProbingQuestionCache(
+            self.ai_service,
+            self.db.probing_question_cache,
+            ttl_seconds=int(os.environ.get('PROBING_CACHE_TTL_SECONDS', 86400)),
+            max_entries=int(os.environ.get('PROBING_CACHE_MAX_ENTRIES', 1024))
+        )
+        await self.probing_cache.ensure_indexes()
+        self.job_queue = create_job_queue(self.db)
+        await self.job_queue.ensure_indexes()
+        self.follow_ups = create_follow_up_service(self.ai_service, self.db.follow_up_threads)
+        self.warm_store = create_warm_advice_store(self.ai_service, self.db)
+        if self.warm_store:
+            await self.warm_store.ensure_indexes()
+        # Advice streams get their events whichever process (replica or `python -m worker`) runs the job
+        self.event_relay = create_event_relay(advice_broker, self.db.advice_events)
+        if self.event_relay:
+            await self.event_relay.ensure_indexes()
+            self.event_relay.start()
+        await recover_orphaned_sessions(self.db, self.job_queue)
+
+    async def collect_metrics(self) -> List[Metric]:
+        families = await collect_advisory_metrics(self)
+        if self.llm_reachable is not None:
+            families.append(gauge_family(
+                "llm_reachable", "Whether any configured LLM provider answered the last probe",
+                [({}, float(self.llm_reachable))]
+            ))
+        return families
+
+    def llm_providers(self) -> Set[str]:
+        return {route.provider for chain in self.ai_service.router.chains.values() for route in chain}
+
+    async def warm_llm_client(self):
+        """Import the LLM client library off the event loop, then keep provider reachability current"""
+        if not self.check_llm:
+            try:
+                await asyncio.to_thread(self.ai_service.clients.load)
+            except Exception as e:
+                logger.warning(f"LLM client import failed: {e!r}")
+            return
+        while True:
+            await self.check_llm_reachable()
+            await asyncio.sleep(self.llm_check_seconds)
+
+    async def check_llm_reachable(self) -> bool:
+        """Load the LLM client and probe every configured provider; reachable if any of them answers"""
+        started = time.perf_counter()
+        try:
+            reachability = await self.ai_service.clients.warm(self.llm_providers(), timeout=self.probe_timeout)
+        except Exception as e:
+            logger.warning(f"LLM client warm-up failed: {e!r}")
+            reachability = {}
+        if self.llm_reachable is None:
+            logger.info(f"LLM client warmed in {time.perf_counter() - started:.2f}s: {reachability}")
+        self.llm_reachable = any(reachability.values())
+        return self.llm_reachable
+
+    async def readiness(self) -> Dict[str, Any]:
+        """Checks of this process's own dependencies for the readiness probe; `ready` only when all pass"""
+        checks: Dict[str, Any] = {"started": self.started}
+        if self.started:
+            try:
+                await asyncio.wait_for(self.db.command("ping"), self.probe_timeout)
+                checks["mongo"] = True
+            except Exception as e:
+                logger.warning(f"Readiness: Mongo ping failed: {e!r}")
+                checks["mongo"] = False
+        checks["ready"] = all(checks.values())
+        return checks
+
+    async def aclose(self):
+        # Fail readiness first so load balancers stop routing here while in-flight work drains
+        self.started = False
+        metrics.remove_collector(self.collect_metrics)
+        llm_warmup = self._tasks.pop("llm_warmup", None)
+        if llm_warmup:
+            llm_warmup.cancel()
+            await asyncio.gather(llm_warmup, return_exceptions=True)
+        if self.advice_worker:
+            self.advice_worker.stop()
+            await self._tasks.pop("advice_worker")
+            await self.advice_worker.drain()
+            self.advice_worker = None
+        if self.warm_scheduler:
+            self.warm_scheduler.stop()
+            # Abandon a pass in progress; it is picked up again in the next off-peak window
+            warm_scheduler_task = self._tasks.pop("warm_scheduler")
+            warm_scheduler_task.cancel()
+            await asyncio.gather(warm_scheduler_task, return_exceptions=True)
+            self.warm_scheduler = None
+        if self.warm_store:
+            await self.warm_store.aclose()
+        if self.event_relay:
+            await self.event_relay.aclose()
+            self.event_relay = None
+        if self.ai_service:
+            await self.ai_service.aclose()
+        if self.client:
+            self.client.close()
+            # A later start() connects afresh
+            self.client = self.db = None
+        self.llm_reachable = None
+
+
+def create_app_container(**kwargs) -> AppContainer:
+    """App container with its probes configured from the environment"""
+    return AppContainer(
+        probe_timeout=float(os.environ.get('READINESS_TIMEOUT_SECONDS', 2)),
+        llm_check_seconds=float(os.environ.get('LLM_CHECK_SECONDS', 30)),
+        check_llm=os.environ.get('LLM_CHECK_ENABLED', 'true').lower() == 'true',
+        **kwargs
+    )
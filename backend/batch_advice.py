@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import os
+import tempfile
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+import orjson
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from ai_service import AIAdvisoryService
+from models import AdvisorySession, BatchAdviceItem, InnovatorAdvice, InnovatorStatus, SessionStatus
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+READ_CHUNK_BYTES = 64 * 1024
+# Request bodies above this spill from memory to a temporary file
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+# (line number, parsed item or the reason the line was rejected)
+BatchInput = Tuple[int, Union[BatchAdviceItem, str]]
+
+
+async def read_ndjson_items(chunks: AsyncIterable[bytes], max_items: int = 0) -> AsyncIterator[BatchInput]:
+    """Parse NDJSON batch items from a byte stream as it arrives; blank lines are skipped"""
+    buffer = b""
+    index = 0
+
+    def parse(line: bytes) -> Union[BatchAdviceItem, str]:
+        try:
+            return BatchAdviceItem(**orjson.loads(line))
+        except (orjson.JSONDecodeError, TypeError) as e:
+            return f"Invalid JSON: {e}"
+        except ValidationError as e:
+            return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            if max_items and index >= max_items:
+                yield index, f"Batch is limited to {max_items} items"
+                return
+            yield index, parse(line)
+            index += 1
+    if buffer.strip() and not (max_items and index >= max_items):
+        yield index, parse(buffer)
+
+
+async def charge_items(items: AsyncIterable[BatchInput],
+                       charge: Callable[[BatchAdviceItem], Awaitable[None]]) -> AsyncIterator[BatchInput]:
+    """Pass items through as `charge` accepts them; an error from `charge` ends the input at that item"""
+    async for index, item in items:
+        if not isinstance(item, str):
+            await charge(item)
+        yield index, item
+
+
+class BatchTooLargeError(ValueError):
+    """Raised when a batch request body exceeds the configured size"""
+
+
+async def spool_body(chunks: AsyncIterable[bytes], max_bytes: int) -> BinaryIO:
+    """Buffer a request body (in memory while small, on disk beyond that) and rewind it.
+
+    The upload has to be fully received before the response starts streaming: once it does,
+    Starlette listens on the same receive channel for disconnects and would swallow the rest
+    of the body.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise BatchTooLargeError(f"Batch body is larger than {max_bytes} bytes")
+            await asyncio.to_thread(spool.write, chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+async def file_chunks(source: BinaryIO) -> AsyncIterator[bytes]:
+    """Read a file in chunks off the event loop"""
+    while True:
+        chunk = await asyncio.to_thread(source.read, READ_CHUNK_BYTES)
+        if not chunk:
+            return
+        yield chunk
+
+
+def encode_line(record: Dict[str, Any]) -> bytes:
+    return orjson.dumps(record) + b"\n"
+
+
+class BatchAdviceRunner:
+    """Generates advice for many prepared questions with bounded concurrency.
+
+    Items are pulled from the input only as fast as workers free up, finished sessions are
+    written with insert_many in groups, and a result line is produced for each item once
+    its session is stored, so neither side ever holds the whole batch in memory.
+    """
+
+    def __init__(self, ai_service: AIAdvisoryService, sessions: AsyncIOMotorCollection, concurrency: int = 8,
+                 flush_size: int = 100, progress_every: int = 50):
+        self.ai_service = ai_service
+        self.sessions = sessions
+        self.concurrency = concurrency
+        self.flush_size = flush_size
+        self.progress_every = progress_every
+
+    async def run(self, items: AsyncIterable[BatchInput], batch_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield result, error and progress records, then a summary"""
+        batch_id = batch_id or str(uuid.uuid4())
+        started_at = datetime.utcnow()
+        inbox: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        outbox: asyncio.Queue = asyncio.Queue()
+        counts = {"submitted": 0, "completed": 0, "failed": 0}
+        input_errors: List[str] = []
+
+        async def feed():
+            try:
+                async for index, item in items:
+                    counts["submitted"] += 1
+                    await inbox.put((index, item))
+            except Exception as e:
+                # e.g. the client disconnected mid-upload; finish what was already read
+                logger.error(f"Batch {batch_id} input stream failed: {e}")
+                input_errors.append(str(e))
+            for _ in range(self.concurrency):
+                await inbox.put(None)
+
+        async def work():
+            while True:
+                entry = await inbox.get()
+                if entry is None:
+                    await outbox.put(None)
+                    return
+                await outbox.put(await self._process(batch_id, *entry))
+
+        tasks = [asyncio.ensure_future(feed())] + [asyncio.ensure_future(work()) for _ in range(self.concurrency)]
+        yield {"type": "started", "batch_id": batch_id, "concurrency": self.concurrency}
+        try:
+            running = self.concurrency
+            pending: List[Tuple[Dict[str, Any], Optional[dict]]] = []
+            while running:
+                finished = await outbox.get()
+                if finished is None:
+                    running -= 1
+                else:
+                    pending.append(finished)
+                # Write in groups under load; flush right away when nothing else is ready
+                if pending and (len(pending) >= self.flush_size or outbox.empty() or not running):
+                    for record in await self._flush(pending):
+                        counts["completed" if record["type"] == "result" else "failed"] += 1
+                        yield record
+                        done = counts["completed"] + counts["failed"]
+                        if done % self.progress_every == 0:
+                            yield {"type": "progress", **counts}
+                    pending = []
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        for detail in input_errors:
+            yield {"type": "error", "index": None, "detail": f"Input stream ended early: {detail}"}
+        yield {
+            "type": "summary",
+            "batch_id": batch_id,
+            **counts,
+            "elapsed_seconds": round((datetime.utcnow() - started_at).total_seconds(), 3),
+        }
+
+    async def _process(self, batch_id: str, index: int,
+                       item: Union[BatchAdviceItem, str]) -> Tuple[Dict[str, Any], Optional[dict]]:
+        """Generate one item's advice; returns its result line and the session document to store"""
+        if isinstance(item, str):
+            return {"type": "error", "index": index, "detail": item}, None
+
+        session_id = str(uuid.uuid4())
+        try:
+            advice, innovator_status = [], {}
+            async for entry, succeeded in self.ai_service.iter_innovator_advice(
+                item.user_question, item.probing_answers, session_id, persona_ids=item.personas
+            ):
+                advice_object = InnovatorAdvice(**entry)
+                advice.append(advice_object)
+                innovator_status[advice_object.innovator] = (
+                    InnovatorStatus.COMPLETED if succeeded else InnovatorStatus.FAILED
+                )
+        except Exception as e:
+            logger.error(f"Batch {batch_id} item {index} failed: {e}")
+            return {"type": "error", "index": index, "ref": item.ref, "detail": str(e)}, None
+
+        session = AdvisorySession(
+            session_id=session_id,
+            user_question=item.user_question,
+            probing_answers=item.probing_answers,
+            personas=item.personas or [],
+            advice=advice,
+            innovator_status=innovator_status,
+            status=SessionStatus.COMPLETED,
+            batch_id=batch_id,
+            completed_at=datetime.utcnow()
+        )
+        record = {
+            "type": "result",
+            "index": index,
+            "ref": item.ref,
+            "session_id": session_id,
+            "status": SessionStatus.COMPLETED.value,
+            "advice": [a.model_dump() for a in advice],
+            "innovator_status": {name: status.value for name, status in innovator_status.items()},
+        }
+        return record, session.model_dump(by_alias=True, exclude={"id"})
+
+    async def _flush(self, pending: List[Tuple[Dict[str, Any], Optional[dict]]]) -> List[Dict[str, Any]]:
+        """Store a group of finished sessions in one round trip; items that fail to store become errors"""
+        documents = [document for _, document in pending if document is not None]
+        if not documents:
+            return [record for record, _ in pending]
+
+        failed = set()
+        try:
+            await self.sessions.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            logger.error(f"Failed to store {len(failed)} of {len(documents)} batch sessions")
+        except Exception as e:
+            failed = set(range(len(documents)))
+            logger.error(f"Failed to store {len(documents)} batch sessions: {e}")
+
+        records, position = [], 0
+        for record, document in pending:
+            if document is not None:
+                if position in failed:
+                    record = {"type": "error", "index": record["index"], "ref": record["ref"],
+                              "detail": "Failed to store session"}
+                position += 1
+            records.append(record)
+        return records
+
+
+def create_batch_runner(ai_service: AIAdvisoryService, sessions: AsyncIOMotorCollection,
+                        concurrency: Optional[int] = None) -> BatchAdviceRunner:
+    """Batch runner configured from the environment (BATCH_CONCURRENCY caps per-request overrides)"""
+    limit = int(os.environ.get('BATCH_CONCURRENCY', 8))
+    return BatchAdviceRunner(
+        ai_service,
+        sessions,
+        concurrency=max(1, min(concurrency or limit, limit)),
+        flush_size=int(os.environ.get('BATCH_FLUSH_SIZE', 100))
+    )
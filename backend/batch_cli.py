@@ -0,0 +1,71 @@
+"""Generate advice for a file of prepared questions without going through HTTP.
+
+Input is NDJSON, one item per line:
+
+    {"user_question": "...", "probing_answers": {"0": "..."}, "personas": ["jobs"], "ref": "row-17"}
+
+Results stream out as NDJSON (one line per item, plus progress and a summary) and every
+item is stored as a completed session, exactly like POST /api/sessions/batch:
+
+    cd backend && python -m batch_cli questions.ndjson --output results.ndjson --concurrency 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from batch_advice import create_batch_runner, encode_line, file_chunks, read_ndjson_items
+
+
+async def main(args) -> int:
+    from ai_service import AIAdvisoryService
+    from llm_limiter import create_admission_controller
+    from single_flight import create_single_flight
+    from llm_resilience import create_hedge_policy
+    from model_router import create_model_router
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    ai_service = AIAdvisoryService(
+        create_admission_controller(), single_flight=create_single_flight(),
+        router=create_model_router(), hedging=create_hedge_policy()
+    )
+    runner = create_batch_runner(ai_service, db.advisory_sessions, args.concurrency)
+
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    failed = 0
+    try:
+        async for record in runner.run(read_ndjson_items(file_chunks(source))):
+            output.write(encode_line(record))
+            output.flush()
+            if record["type"] in ("progress", "summary"):
+                logging.info(f"{record['type']}: {record['completed']} completed, {record['failed']} failed")
+                failed = record["failed"]
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if output is not sys.stdout.buffer:
+            output.close()
+        await ai_service.aclose()
+        client.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="NDJSON file of items, or - for stdin")
+    parser.add_argument("--output", default="-", help="where to write NDJSON results (default stdout)")
+    parser.add_argument("--concurrency", type=int, help="items in flight at once (capped by BATCH_CONCURRENCY)")
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,170 @@
+"""Cold start of the API process, from spawn to passing its readiness probe.
+
+Each run is a fresh interpreter (`--child`), so nothing is already in sys.modules. The
+child records three phases:
+
+- import: `import server` (the app, its routes and everything they import),
+- startup: the lifespan startup, i.e. AppContainer.start() - Mongo ping, indexes, services,
+- ready: until GET /readyz first returns 200.
+
+The parent adds spawn_to_ready, which also covers interpreter start. Mongo is
+mongomock-motor unless --mongo-url is given. The AI service is StubAdvisoryService,
+as in load_test, and the background provider probes go to a local stub LLM server,
+so the numbers are the process's own cost rather than the LLM library's or the network's.
+With --importtime, the slowest imports of one extra run are listed.
+
+    cd backend && python -m benchmarks.bench_cold_start --runs 10
+    cd backend && python -m benchmarks.bench_cold_start --runs 5 --importtime --budget-seconds 3
+
+Exits 1 if the p95 spawn_to_ready exceeds --budget-seconds.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+PHASES = ("import_seconds", "startup_seconds", "ready_seconds", "spawn_to_ready_seconds")
+
+
+async def child(args) -> None:
+    started = time.perf_counter()
+    import server
+    imported = time.perf_counter()
+    heavy_after_import = "emergentintegrations.llm.chat" in sys.modules
+
+    import httpx
+    from app_container import create_app_container
+    from benchmarks.stub_services import StubAdvisoryService
+    database = None
+    if not args.mongo_url:
+        from mongomock_motor import AsyncMongoMockClient
+        database = AsyncMongoMockClient()["bench_cold_start"]
+    server.app.state.container = create_app_container(
+        database=database, ai_service_factory=lambda limiter=None, **kwargs: StubAdvisoryService(limiter=limiter, **kwargs)
+    )
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        lifespan_started = time.perf_counter()
+        async with server.app.router.lifespan_context(server.app):
+            serving = time.perf_counter()
+            while (await client.get("/readyz")).status_code != 200:
+                if time.perf_counter() - serving > args.ready_timeout:
+                    raise SystemExit(f"Not ready after {args.ready_timeout}s: {(await client.get('/readyz')).json()}")
+                await asyncio.sleep(0.005)
+            ready = time.perf_counter()
+            ready_at = time.time()
+
+    print(json.dumps({
+        "import_seconds": imported - started,
+        "startup_seconds": serving - lifespan_started,
+        "ready_seconds": ready - serving,
+        "ready_at": ready_at,
+        "llm_client_imported_by_server": heavy_after_import,
+    }))
+
+
+def spawn(args, llm_url: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    env = {
+        **os.environ,
+        "LLM_HEALTHCHECK_URL": llm_url,
+        "EMERGENT_LLM_KEY": os.environ.get("EMERGENT_LLM_KEY", "benchmark-key"),
+        "WARM_ADVICE_ENABLED": "false",
+    }
+    if args.mongo_url:
+        env.update(MONGO_URL=args.mongo_url, DB_NAME="bench_cold_start")
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), "-m", "benchmarks.bench_cold_start",
+               "--child", "--ready-timeout", str(args.ready_timeout)]
+    if args.mongo_url:
+        command += ["--mongo-url", args.mongo_url]
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Cold start run failed:\n{result.stderr[-2000:]}")
+    return result
+
+
+def slowest_imports(stderr: str, top: int) -> List[Dict[str, float]]:
+    """Modules by cumulative import time (including what they import) from `-X importtime` output"""
+    modules = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)$", line)
+        if match:
+            modules.append({
+                "module": match.group(3), "depth": len(match.group(2)) // 2,
+                "cumulative_ms": round(int(match.group(1)) / 1000, 1),
+            })
+    return sorted(modules, key=lambda module: module["cumulative_ms"], reverse=True)[:top]
+
+
+async def parent(args) -> int:
+    from benchmarks.stub_llm_server import StubLlmServer
+    # Imported here, not at the top, so the child's `import server` timing starts from a clean slate
+    from llm_resilience import percentile
+    llm = StubLlmServer()
+    await llm.start()
+    samples: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+    llm_client_eager = False
+    try:
+        for _ in range(args.runs):
+            spawned_at = time.time()
+            result = await asyncio.to_thread(spawn, args, f"{llm.base_url}/v1/models")
+            run = json.loads(result.stdout.strip().splitlines()[-1])
+            run["spawn_to_ready_seconds"] = run["ready_at"] - spawned_at
+            llm_client_eager |= run["llm_client_imported_by_server"]
+            for phase in PHASES:
+                samples[phase].append(run[phase])
+        imports = None
+        if args.importtime:
+            result = await asyncio.to_thread(spawn, args, f"{llm.base_url}/v1/models", True)
+            imports = slowest_imports(result.stderr, args.top)
+    finally:
+        await llm.stop()
+
+    report = {
+        "config": {"runs": args.runs, "mongo": "mongod" if args.mongo_url else "mongomock"},
+        "llm_client_imported_by_server": llm_client_eager,
+        **{
+            phase: {
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "max_ms": round(max(values) * 1000, 1),
+            }
+            for phase, values in samples.items()
+        },
+    }
+    if imports is not None:
+        report["slowest_imports"] = imports
+    print(json.dumps(report, indent=2))
+
+    p95 = percentile(samples["spawn_to_ready_seconds"], 95)
+    if args.budget_seconds and p95 > args.budget_seconds:
+        print(f"FAIL: p95 spawn to ready {p95:.2f}s exceeds {args.budget_seconds}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mongo-url", help="real mongod; default is in-memory mongomock-motor")
+    parser.add_argument("--ready-timeout", type=float, default=30)
+    parser.add_argument("--importtime", action="store_true", help="list the slowest imports")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-seconds", type=float, help="fail if p95 spawn-to-ready exceeds this")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        asyncio.run(child(args))
+        return 0
+    return asyncio.run(parent(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
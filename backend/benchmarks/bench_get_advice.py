@@ -0,0 +1,130 @@
+"""Per-request CPU cost of GET /api/sessions/{id}/advice for a completed session.
+
+Seeds one completed session (mongomock-motor, so no mongod is needed) and then:
+
+- polls the real endpoint through the ASGI stack, recording process CPU time per
+  request (routing, middleware, the Mongo read and serialization), and
+- times the response-building step alone both ways: validating the stored document
+  into GetAdviceResponse and encoding it like FastAPI's response_model path
+  (jsonable_encoder + json.dumps), against encoding the trusted document with orjson.
+
+    cd backend && python -m benchmarks.bench_get_advice --requests 2000 --personas 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import httpx
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+import server  # noqa: E402
+from app_container import create_app_container  # noqa: E402
+from benchmarks.stub_services import StubAdvisoryService  # noqa: E402
+from models import AdvisorySession, GetAdviceResponse, InnovatorAdvice, InnovatorStatus, SessionStatus  # noqa: E402
+
+
+def completed_session(personas: int, advice_chars: int) -> AdvisorySession:
+    names = [f"Innovator {i}" for i in range(personas)]
+    return AdvisorySession(
+        session_id=str(uuid.uuid4()),
+        user_question="How should I grow my B2B SaaS beyond the first hundred customers?",
+        probing_questions=["Who is your customer?", "What is your budget?", "What is your timeline?"],
+        probing_options=[["A", "B", "C", "Not sure, just go ahead"]] * 3,
+        probing_answers={"0": "A", "1": "B", "2": "C"},
+        personas=names,
+        advice=[
+            InnovatorAdvice(innovator=name, title=f"{name}'s take", confidence="High",
+                            advice_text=("Focus on the one thing that matters. " * advice_chars)[:advice_chars])
+            for name in names
+        ],
+        innovator_status={name: InnovatorStatus.COMPLETED for name in names},
+        status=SessionStatus.COMPLETED,
+        completed_at=datetime.utcnow()
+    )
+
+
+def cpu_per_call(fn: Callable[[], object], calls: int) -> List[float]:
+    samples = []
+    for _ in range(calls):
+        started = time.process_time()
+        fn()
+        samples.append(time.process_time() - started)
+    return samples
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_us": round(statistics.fmean(ordered) * 1e6, 1),
+        "p50_us": round(ordered[len(ordered) // 2] * 1e6, 1),
+        "p95_us": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1e6, 1),
+    }
+
+
+def serialization(document: dict, calls: int) -> Dict[str, Dict[str, float]]:
+    """Response building only: model validation + jsonable_encoder + json vs orjson on the raw document"""
+    document = {**document, "status": SessionStatus.COMPLETED.value}
+
+    def validated():
+        response = GetAdviceResponse(**document)
+        json.dumps(jsonable_encoder(response)).encode()
+
+    def trusted():
+        orjson.dumps(document)
+
+    assert orjson.loads(orjson.dumps(document)) == json.loads(json.dumps(jsonable_encoder(GetAdviceResponse(**document))))
+    return {
+        "validated_json": summarize(cpu_per_call(validated, calls)),
+        "trusted_orjson": summarize(cpu_per_call(trusted, calls)),
+    }
+
+
+async def main(args) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+    from mongomock_motor import AsyncMongoMockClient
+    db = AsyncMongoMockClient()['bench_get_advice']
+    server.app.state.container = create_app_container(
+        database=db, ai_service_factory=lambda limiter=None, **kwargs: StubAdvisoryService(limiter=limiter, **kwargs)
+    )
+
+    session = completed_session(args.personas, args.advice_chars)
+    await db.advisory_sessions.insert_one(session.model_dump(by_alias=True, exclude={"id"}))
+    url = f"/api/sessions/{session.session_id}/advice"
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with server.app.router.lifespan_context(server.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for _ in range(args.warmup):
+                (await client.get(url)).raise_for_status()
+            samples = []
+            for _ in range(args.requests):
+                started = time.process_time()
+                response = await client.get(url)
+                samples.append(time.process_time() - started)
+                response.raise_for_status()
+            document = response.json()
+
+    report = {
+        "config": {"requests": args.requests, "personas": args.personas, "advice_chars": args.advice_chars},
+        "response_bytes": len(response.content),
+        "endpoint": summarize(samples),
+        "serialization": serialization(document, args.requests),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--personas", type=int, default=5, help="innovators with advice in the session")
+    parser.add_argument("--advice-chars", type=int, default=1500, help="length of each advice text")
+    asyncio.run(main(parser.parse_args()))
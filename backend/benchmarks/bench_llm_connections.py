@@ -0,0 +1,151 @@
+"""Connections opened by production LLM calls, with and without the shared HTTP pool.
+
+Every call goes through the production path: AIAdvisoryService -> LlmClientPool.chat() ->
+LlmChat.send_message -> litellm. The OpenAI provider is pointed at the local stub LLM
+server (OPENAI_API_BASE), so the numbers isolate client-side connection handling from
+provider latency. Two modes are compared:
+
+- unshared: litellm.aclient_session is cleared, so litellm manages its own clients,
+- shared: LlmClientPool has installed its keep-alive client as litellm.aclient_session.
+
+Only the OpenAI route is measured: litellm ignores aclient_session for other providers.
+
+Besides the stub's count of accepted TCP connections, a request hook on the pool's client
+counts the calls that actually went through it. The run fails if the shared mode's calls
+did not use it or never reached the stub.
+
+    cd backend && python -m benchmarks.bench_llm_connections --calls 200 --concurrency 8
+
+Pass --certfile/--keyfile to serve TLS and include handshake cost.
+"""
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import sys
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.stub_llm_server import StubLlmServer
+
+
+async def _run(calls: int, concurrency: int, call: Callable[[], Awaitable[None]]) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies
+
+
+def _summary(latencies: List[float], server: StubLlmServer, elapsed: float, via_pool: int) -> Dict:
+    ordered = sorted(latencies)
+    return {
+        "calls": len(latencies),
+        "stub_requests": server.requests,
+        "connections_opened": server.connections,
+        "requests_via_shared_client": via_pool,
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3),
+        "calls_per_sec": round(len(latencies) / elapsed, 1),
+    }
+
+
+async def main(args) -> int:
+    ssl_context, verify = None, True
+    if args.certfile:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(args.certfile, args.keyfile)
+        verify = False
+
+    server = StubLlmServer(latency_ms=args.latency_ms, ssl_context=ssl_context)
+    await server.start()
+    # Route the production call path to the stub: one OpenAI route, no failover, nothing cached
+    os.environ.update(OPENAI_API_BASE=f"{server.base_url}/v1", OPENAI_BASE_URL=f"{server.base_url}/v1",
+                      LLM_ROUTE_SUMMARY="openai:gpt-4o-mini")
+    os.environ.setdefault('EMERGENT_LLM_KEY', 'benchmark-key')
+
+    from ai_service import AIAdvisoryService
+    from llm_clients import LlmClientPool
+    from llm_limiter import LlmAdmissionController
+
+    pool = LlmClientPool(os.environ['EMERGENT_LLM_KEY'], max_connections=args.concurrency)
+    if not verify:
+        await pool.http_client.aclose()
+        pool.http_client = httpx.AsyncClient(verify=False, limits=httpx.Limits(
+            max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+        ))
+    via_pool = 0
+
+    async def count_request(request: httpx.Request):
+        nonlocal via_pool
+        via_pool += 1
+
+    pool.http_client.event_hooks["request"].append(count_request)
+    service = AIAdvisoryService(LlmAdmissionController(max_concurrent=args.concurrency), clients=pool)
+    persona = service.personas.all()[0]
+    pool.load()
+    import litellm
+    if not verify:
+        litellm.ssl_verify = False
+
+    async def call():
+        await service.summarize_conversation(persona, str(uuid.uuid4()), "User: hi\nAdvisor: hello")
+
+    results = {"litellm_session_installed": pool.installed}
+    try:
+        for mode in ("unshared", "shared"):
+            litellm.aclient_session = pool.http_client if mode == "shared" else None
+            server.reset_counters()
+            via_pool = 0
+            started = time.perf_counter()
+            latencies = await _run(args.calls, args.concurrency, call)
+            results[mode] = _summary(latencies, server, time.perf_counter() - started, via_pool)
+    finally:
+        await service.aclose()
+        await server.stop()
+
+    before, after = results["unshared"], results["shared"]
+    results["setup_overhead_saved_ms_per_call"] = round(before["mean_ms"] - after["mean_ms"], 3)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'mode':<10}{'calls':>7}{'stub':>7}{'conns':>7}{'pooled':>8}{'mean ms':>10}{'p50 ms':>10}"
+              f"{'p95 ms':>10}{'calls/s':>10}")
+        for name in ("unshared", "shared"):
+            r = results[name]
+            print(f"{name:<10}{r['calls']:>7}{r['stub_requests']:>7}{r['connections_opened']:>7}"
+                  f"{r['requests_via_shared_client']:>8}{r['mean_ms']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}"
+                  f"{r['calls_per_sec']:>10}")
+        print(f"connection setup saved per call: {results['setup_overhead_saved_ms_per_call']} ms")
+
+    if not pool.installed or after["requests_via_shared_client"] < after["calls"]:
+        print("FAIL: LLM calls did not go through LlmClientPool's shared client", file=sys.stderr)
+        return 1
+    if after["stub_requests"] < after["calls"]:
+        print("FAIL: LLM calls did not reach the stub server; check the provider base URL", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0, help="simulated provider latency")
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    parser.add_argument("--json", action="store_true", help="emit machine-readable results")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,231 @@
+"""End-to-end load test of the advisory flow against the real FastAPI app.
+
+Drives `server.app` in-process (create session -> submit probing answers -> poll
+advice) with many concurrent virtual users. The LLM is replaced by the
+deterministic StubAdvisoryService, so latency and failures are whatever the
+command line asks for; everything else (routes, cache, admission control, job
+queue, embedded worker) is the production code. Runs against a local mongod
+(--mongo-url) or the in-memory mongomock-motor stand-in:
+
+    cd backend && python -m benchmarks.load_test --sessions 200 --concurrency 20
+    cd backend && python -m benchmarks.load_test --output run.json --baseline main.json
+
+Reports p50/p95/p99 per endpoint, sessions/sec and time-to-first-advice as JSON.
+With --baseline, exits 1 if any p95 regressed by more than --tolerance.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+# Every virtual user shares one client address; per-client limits would cap the run, not measure it
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+
+import server  # noqa: E402
+from app_container import create_app_container  # noqa: E402
+from benchmarks.stub_services import StubAdvisoryService, fixed_latency, lognormal_latency  # noqa: E402
+from llm_resilience import percentile  # noqa: E402
+
+ENDPOINTS = ("create_session", "submit_answers", "get_advice")
+TERMINAL_STATUSES = {"completed", "failed"}
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples, default=0) * 1000, 2),
+    }
+
+
+class LoadRecorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.status_codes: Dict[str, Counter] = defaultdict(Counter)
+        self.time_to_first_advice: List[float] = []
+        self.time_to_complete: List[float] = []
+        self.outcomes: Counter = Counter()
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        self.status_codes[endpoint][response.status_code] += 1
+        return response
+
+
+def _database(mongo_url: Optional[str], db_name: str):
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return AsyncIOMotorClient(mongo_url)[db_name]
+    from mongomock_motor import AsyncMongoMockClient
+    return AsyncMongoMockClient()[db_name]
+
+
+def install_stubs(args, db) -> List[StubAdvisoryService]:
+    """Point server.py at the benchmark database and stub LLM; returns the services it creates"""
+    if args.latency_sigma > 0:
+        latency = lognormal_latency(args.latency_ms / 1000, args.latency_sigma)
+    else:
+        latency = fixed_latency(args.latency_ms / 1000)
+
+    created = []
+
+    def stub_service(limiter=None, **kwargs):
+        service = StubAdvisoryService(latency=latency, failure_rate=args.failure_rate, seed=args.seed,
+                                      limiter=limiter, **kwargs)
+        created.append(service)
+        return service
+
+    server.app.state.container = create_app_container(database=db, ai_service_factory=stub_service)
+    return created
+
+
+async def run_session(client: httpx.AsyncClient, recorder: LoadRecorder, index: int, args) -> None:
+    question = f"How should I grow business #{index % args.distinct_questions}?"
+    response = await recorder.request(client, "create_session", "POST", "/api/sessions",
+                                      json={"user_question": question})
+    if response.status_code != 200:
+        recorder.outcomes[f"create_{response.status_code}"] += 1
+        return
+    session = response.json()
+    session_id = session["session_id"]
+    answers = {str(i): options[0] for i, options in enumerate(session["probing_options"])}
+
+    submitted_at = time.perf_counter()
+    response = await recorder.request(client, "submit_answers", "POST", f"/api/sessions/{session_id}/probing-answers",
+                                      json={"answers": answers})
+    if response.status_code != 200:
+        recorder.outcomes[f"submit_{response.status_code}"] += 1
+        return
+
+    first_advice_at = None
+    deadline = submitted_at + args.session_timeout
+    while time.perf_counter() < deadline:
+        response = await recorder.request(client, "get_advice", "GET", f"/api/sessions/{session_id}/advice")
+        body = response.json() if response.status_code == 200 else {}
+        if first_advice_at is None and body.get("advice"):
+            first_advice_at = time.perf_counter()
+            recorder.time_to_first_advice.append(first_advice_at - submitted_at)
+        if body.get("status") in TERMINAL_STATUSES or response.status_code == 500:
+            recorder.time_to_complete.append(time.perf_counter() - submitted_at)
+            recorder.outcomes[body.get("status", "failed")] += 1
+            # Innovators that got the canned fallback instead of stub LLM advice
+            recorder.outcomes["fallback_advice"] += sum(
+                1 for status in body.get("innovator_status", {}).values() if status == "failed"
+            )
+            return
+        await asyncio.sleep(args.poll_interval)
+    recorder.outcomes["timed_out"] += 1
+
+
+async def main(args) -> int:
+    logging.getLogger().setLevel(logging.WARNING)
+    db = _database(args.mongo_url, args.db_name)
+    services = install_stubs(args, db)
+    await db.advisory_sessions.delete_many({})
+    await db.advice_jobs.delete_many({})
+    await db.probing_question_cache.delete_many({})
+
+    recorder = LoadRecorder()
+    pending = iter(range(args.sessions))
+
+    async def virtual_user(client: httpx.AsyncClient):
+        for index in pending:
+            await run_session(client, recorder, index, args)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with server.app.router.lifespan_context(server.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(virtual_user(client) for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+
+    completed = recorder.outcomes["completed"]
+    report = {
+        "run_id": str(uuid.uuid4()),
+        "config": {
+            key: getattr(args, key) for key in (
+                "sessions", "concurrency", "latency_ms", "latency_sigma", "failure_rate",
+                "distinct_questions", "poll_interval", "seed"
+            )
+        },
+        "mongo": "mongod" if args.mongo_url else "mongomock",
+        "elapsed_seconds": round(elapsed, 3),
+        "sessions_per_second": round(completed / elapsed, 2) if elapsed else 0.0,
+        "outcomes": dict(recorder.outcomes),
+        "endpoints": {
+            endpoint: {**summarize(recorder.latencies[endpoint]),
+                       "status_codes": {str(k): v for k, v in recorder.status_codes[endpoint].items()}}
+            for endpoint in ENDPOINTS
+        },
+        "time_to_first_advice": summarize(recorder.time_to_first_advice),
+        "time_to_complete": summarize(recorder.time_to_complete),
+        "llm_calls": dict(sum((service.calls for service in services), Counter())),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+    # Completed sessions alone prove nothing: LLM errors still complete them with fallback advice
+    llm_calls = report["llm_calls"]
+    ok = llm_calls.get("probing", 0) > 0 and llm_calls.get("advice", 0) > 0
+    if args.failure_rate == 0:
+        ok = ok and completed == args.sessions and recorder.outcomes["fallback_advice"] == 0
+    if args.baseline:
+        regressions = compare(report, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        ok = ok and not regressions
+    print("PASS" if ok else "FAIL", file=sys.stderr)
+    return 0 if ok else 1
+
+
+def compare(report: dict, baseline_path: str, tolerance: float) -> List[str]:
+    """p95 latencies that grew more than `tolerance` (a fraction) over a previous run"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    current = {**report["endpoints"], "time_to_first_advice": report["time_to_first_advice"]}
+    previous = {**baseline["endpoints"], "time_to_first_advice": baseline["time_to_first_advice"]}
+    regressions = []
+    for name, stats in current.items():
+        before = previous.get(name, {}).get("p95_ms")
+        if before and stats["p95_ms"] > before * (1 + tolerance):
+            regressions.append(f"{name} p95 {before}ms -> {stats['p95_ms']}ms")
+    if report["sessions_per_second"] < baseline["sessions_per_second"] * (1 - tolerance):
+        regressions.append(f"sessions/sec {baseline['sessions_per_second']} -> {report['sessions_per_second']}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100, help="total sessions to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--latency-ms", type=float, default=200, help="median stub LLM latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="lognormal spread; 0 for fixed latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of stub LLM calls that raise")
+    parser.add_argument("--distinct-questions", type=int, default=sys.maxsize,
+                        help="cycle through this many questions (exercises the probing cache and single-flight)")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="advice polling interval in seconds")
+    parser.add_argument("--session-timeout", type=float, default=60, help="give up on a session after this long")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mongo-url", help="use a real mongod instead of mongomock-motor")
+    parser.add_argument("--db-name", default="load_test")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report from a previous run to compare p95s against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 regression as a fraction")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,119 @@
+"""Minimal OpenAI-compatible chat completions server for local benchmarks.
+
+Speaks just enough HTTP/1.1 (with keep-alive) to answer POST /v1/chat/completions
+after a configurable delay, and counts the TCP connections it accepts so benchmarks
+can show how many handshakes a client performed.
+
+    python -m benchmarks.stub_llm_server --port 8765 --latency-ms 50
+"""
+import argparse
+import asyncio
+import json
+import ssl
+import time
+from typing import Optional
+
+
+class StubLlmServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0,
+                 reply: str = "Stub advice.", ssl_context: Optional[ssl.SSLContext] = None):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.reply = reply
+        self.ssl_context = ssl_context
+        self.connections = 0
+        self.requests = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    @property
+    def base_url(self) -> str:
+        scheme = "https" if self.ssl_context else "http"
+        return f"{scheme}://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, ssl=self.ssl_context)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def reset_counters(self):
+        self.connections = 0
+        self.requests = 0
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                self.requests += 1
+                if self.latency_ms:
+                    await asyncio.sleep(self.latency_ms / 1000)
+                payload = self._completion(body)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Connection: keep-alive\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    def _completion(self, body: bytes) -> bytes:
+        try:
+            model = json.loads(body or b"{}").get("model", "stub")
+        except ValueError:
+            model = "stub"
+        return json.dumps({
+            "id": f"chatcmpl-stub-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.reply},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }).encode()
+
+
+async def _serve(args):
+    ssl_context = None
+    if args.certfile:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(args.certfile, args.keyfile)
+    server = StubLlmServer(args.host, args.port, args.latency_ms, ssl_context=ssl_context)
+    await server.start()
+    print(f"Stub LLM listening on {server.base_url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    asyncio.run(_serve(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""Deterministic stand-ins for the LLM-backed pieces of the backend, for benchmarks."""
+import asyncio
+import json
+import math
+import os
+import random
+import types
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+# AIAdvisoryService refuses to start without a key; the stub never sends it anywhere
+os.environ.setdefault('EMERGENT_LLM_KEY', 'stub')
+
+from ai_service import AIAdvisoryService  # noqa: E402
+from llm_clients import LlmClientPool  # noqa: E402
+
+LatencySampler = Callable[[], float]
+
+
+def fixed_latency(seconds: float) -> LatencySampler:
+    return lambda: seconds
+
+
+def lognormal_latency(median_seconds: float, sigma: float = 0.5, rng: Optional[random.Random] = None) -> LatencySampler:
+    """Right-skewed latency like real LLM calls: most near the median, a long slow tail"""
+    rng = rng or random.Random()
+    mu = math.log(median_seconds)
+    return lambda: rng.lognormvariate(mu, sigma)
+
+
+class StubUserMessage:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubClientPool(LlmClientPool):
+    """LlmClientPool that never imports the LLM client library; chats come from StubAdvisoryService"""
+
+    def load(self):
+        return types.SimpleNamespace(UserMessage=StubUserMessage, LlmChat=None)
+
+
+class StubChat:
+    """Mimics LlmChat.send_message with injectable latency and failures"""
+
+    def __init__(self, service: "StubAdvisoryService", session_id: str, route):
+        self.service = service
+        self.session_id = session_id
+        self.route = route
+
+    async def send_message(self, user_message) -> str:
+        service = self.service
+        kind = "probing" if "_probing" in self.session_id else "advice"
+        service.calls[kind] += 1
+        await asyncio.sleep(service.latency())
+        if self.route.provider in service.failing_providers or service.rng.random() < service.failure_rate:
+            service.calls[f"{kind}_failed"] += 1
+            raise RuntimeError("Stub LLM failure")
+        if kind == "probing":
+            options = [["A", "B", "C", "Not sure, just go ahead"]] * 3
+            if service.rng.random() < service.malformed_rate:
+                # One slot with unusable options, as a model occasionally returns
+                options = [["A", "B", "C", "Not sure, just go ahead"], [], ["A", "B", "C", "Not sure, just go ahead"]]
+                service.calls["probing_malformed"] += 1
+            return json.dumps({
+                "questions": ["Which market?", "Which growth model?", "Which innovation approach?"],
+                "options": options
+            })
+        return f"Stub advice for {self.session_id}."
+
+
+class StubAdvisoryService(AIAdvisoryService):
+    """AIAdvisoryService with the network call replaced; admission control, personas and parsing stay real"""
+
+    def __init__(self, latency: LatencySampler = fixed_latency(0), failure_rate: float = 0.0,
+                 seed: Optional[int] = None, failing_providers: Iterable[str] = (), malformed_rate: float = 0.0,
+                 **kwargs):
+        kwargs.setdefault("clients", StubClientPool("stub"))
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        # Providers whose every call fails, to exercise model-route failover
+        self.failing_providers = set(failing_providers)
+        # Fraction of probing responses with one invalid question slot, to exercise repair
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()
+
+    def _create_chat(self, session_id: str, system_message: str, route, response_format=None) -> StubChat:
+        return StubChat(self, session_id, route)
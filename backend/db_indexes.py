@@ -0,0 +1,49 @@
+import logging
+import os
+
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Mongo error codes for an existing index with the same key but different options
+INDEX_CONFLICT_CODES = {85, 86}
+
+
+def session_ttl_seconds() -> int:
+    """How long sessions (and their jobs) are kept before the TTL index removes them"""
+    return int(os.environ.get('SESSION_TTL_SECONDS', 24 * 60 * 60))
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase):
+    """Create the indexes the session hot path relies on (idempotent, run on startup)"""
+    session_ttl = session_ttl_seconds()
+    sessions = db.advisory_sessions
+    await sessions.create_index("session_id", unique=True)
+    # Session history pages newest first by (created_at, _id), optionally within one status; the
+    # status-prefixed index also serves orphan recovery and the per-status metrics gauge
+    await sessions.create_index([("created_at", DESCENDING), ("_id", DESCENDING)])
+    await sessions.create_index([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+    await ensure_ttl_index(sessions, "created_at", session_ttl)
+    # A job is useless once its session has expired
+    await ensure_ttl_index(db.advice_jobs, "created_at", session_ttl)
+    # Follow-up conversations: one thread per (session, persona), expiring with the session
+    await db.follow_up_threads.create_index([("session_id", ASCENDING), ("persona_id", ASCENDING)], unique=True)
+    await ensure_ttl_index(db.follow_up_threads, "created_at", session_ttl)
+    await db.status_checks.create_index([("timestamp", DESCENDING), ("_id", DESCENDING)])
+    logger.info("Advisory session indexes ensured")
+
+
+async def ensure_ttl_index(collection: AsyncIOMotorCollection, field: str, expire_after_seconds: int):
+    """Create a TTL index, updating the expiry in place if the index already exists with another value"""
+    try:
+        await collection.create_index(field, expireAfterSeconds=expire_after_seconds)
+    except OperationFailure as e:
+        if e.code not in INDEX_CONFLICT_CODES:
+            raise
+        await collection.database.command({
+            "collMod": collection.name,
+            "index": {"keyPattern": {field: 1}, "expireAfterSeconds": expire_after_seconds}
+        })
+        logger.info(f"Updated TTL on {collection.name}.{field} to {expire_after_seconds}s")
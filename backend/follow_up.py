@@ -0,0 +1,223 @@
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from ai_service import AIAdvisoryService
+from llm_limiter import estimate_tokens
+from metrics import FOLLOW_UP_PROMPT_TOKENS, FOLLOW_UP_SUMMARIES
+from models import FollowUpTurn
+from persona_registry import Persona
+
+logger = logging.getLogger(__name__)
+
+# Newest turns read on each question; the token budget normally trims the window well before this
+WINDOW_MAX_TURNS = 20
+
+
+class FollowUpLimitError(Exception):
+    """Raised when a persona conversation already has the maximum number of turns"""
+
+
+def select_window(turns: List[Dict[str, Any]], first_index: int, summarized_turns: int,
+                  budget_tokens: int) -> List[Dict[str, Any]]:
+    """The newest turns not yet folded into the summary that fit the token budget, oldest first.
+
+    `turns` is a tail of the conversation starting at absolute turn `first_index`.
+    """
+    window: List[Dict[str, Any]] = []
+    used = 0
+    for index in range(len(turns) - 1, -1, -1):
+        if first_index + index < summarized_turns:
+            break
+        used += turns[index].get("tokens", 0)
+        if used > budget_tokens and window:
+            break
+        window.append(turns[index])
+    window.reverse()
+    return window
+
+
+def follow_up_prompt(context: str, advice_text: str, summary: str, window: List[Dict[str, Any]],
+                     question: str) -> str:
+    lines = [context, "Your earlier advice:", advice_text, ""]
+    if summary:
+        lines.extend(["Summary of our follow-up conversation so far:", summary, ""])
+    if window:
+        lines.append("Recent follow-up exchanges:")
+        for turn in window:
+            lines.extend([f"User: {turn['question']}", f"You: {turn['answer']}"])
+        lines.append("")
+    lines.extend([
+        f"The user's follow-up question: {question}",
+        "Answer it directly in your own voice, building on your earlier advice rather than repeating it.",
+    ])
+    return "\n".join(lines)
+
+
+def summary_prompt(summary: str, turns: List[Dict[str, Any]], max_words: int) -> str:
+    lines = ["Summary so far:", summary or "(none)", "", "New exchanges:"]
+    for turn in turns:
+        lines.extend([f"User: {turn['question']}", f"Advisor: {turn['answer']}"])
+    lines.extend(["", f"Write the updated summary in at most {max_words} words."])
+    return "\n".join(lines)
+
+
+class FollowUpService:
+    """Per-persona follow-up conversations on a finished advisory session.
+
+    Each (session, persona) pair has one thread document holding every turn, a running summary
+    and how many turns that summary covers. `turn_count` counts turns answered or in progress and
+    is reserved before the model is called, so concurrent questions cannot overrun `max_turns`;
+    `answered_turns` counts the turns stored so far. A question is answered from the session context,
+    the persona's advice, the summary and the newest unsummarized turns that fit
+    `context_tokens`, so prompt size stays flat however long the conversation gets. Once the
+    unsummarized turns outgrow the budget, compact() folds the oldest of them into the summary;
+    it is meant to run after the response has been sent.
+    """
+
+    def __init__(self, ai_service: AIAdvisoryService, threads: AsyncIOMotorCollection,
+                 context_tokens: int = 1500, summary_words: int = 150, max_turns: int = 100):
+        self.ai_service = ai_service
+        self.threads = threads
+        self.context_tokens = context_tokens
+        self.summary_words = summary_words
+        self.max_turns = max_turns
+
+    async def ask(self, session_doc: Dict[str, Any], persona: Persona, advice_text: str,
+                  question: str) -> Tuple[int, FollowUpTurn, bool]:
+        """Answer and store one turn; returns its index, the turn, and whether compact() is due"""
+        asked_at = datetime.utcnow()
+        session_id = session_doc["session_id"]
+        query = {"session_id": session_id, "persona_id": persona.id}
+        thread = await self._reserve_turn(query, asked_at)
+        if thread is None:
+            raise FollowUpLimitError(f"Conversation with {persona.name} is limited to {self.max_turns} follow-ups")
+
+        try:
+            tail = thread.get("turns", [])
+            answered_turns = thread.get("answered_turns", 0)
+            summarized_turns = thread.get("summarized_turns", 0)
+            window = select_window(tail, answered_turns - len(tail), summarized_turns, self.context_tokens)
+            context = self.ai_service.build_context(session_doc["user_question"], session_doc.get("probing_answers", {}))
+            prompt = follow_up_prompt(context, advice_text, thread.get("summary", ""), window, question)
+            FOLLOW_UP_PROMPT_TOKENS.labels(persona=persona.id).observe(estimate_tokens(prompt, completion_tokens=0))
+            answer = await self.ai_service.generate_follow_up(persona, session_id, prompt)
+        except BaseException:
+            # A question that got no answer does not count against the limit
+            await self.threads.update_one(query, {"$inc": {"turn_count": -1}})
+            raise
+
+        turn = FollowUpTurn(
+            question=question, answer=answer, tokens=estimate_tokens(question, answer, completion_tokens=0),
+            asked_at=asked_at
+        )
+        before = await self.threads.find_one_and_update(
+            query,
+            {"$push": {"turns": turn.model_dump()}, "$inc": {"answered_turns": 1}, "$set": {"updated_at": turn.answered_at}},
+            projection={"_id": 0, "answered_turns": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        index = before["answered_turns"]
+
+        unsummarized = [t for i, t in enumerate(tail) if answered_turns - len(tail) + i >= summarized_turns]
+        due = (
+            answered_turns - summarized_turns >= WINDOW_MAX_TURNS
+            or sum(t.get("tokens", 0) for t in unsummarized) + turn.tokens > self.context_tokens
+        )
+        return index, turn, due
+
+    async def _reserve_turn(self, query: Dict[str, str], asked_at: datetime) -> Optional[Dict[str, Any]]:
+        """Count one more turn against max_turns; the thread as it was before, or None at the limit"""
+        below_limit = {**query, "turn_count": {"$lt": self.max_turns}}
+        projection = {
+            "_id": 0, "summary": 1, "summarized_turns": 1, "answered_turns": 1, "turns": {"$slice": -WINDOW_MAX_TURNS}
+        }
+        try:
+            thread = await self.threads.find_one_and_update(
+                below_limit,
+                {
+                    "$inc": {"turn_count": 1},
+                    "$setOnInsert": {"summary": "", "summarized_turns": 0, "answered_turns": 0, "created_at": asked_at},
+                },
+                projection=projection,
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+            # No thread before this question
+            return thread or {}
+        except DuplicateKeyError:
+            # The upsert found no thread below the limit: either it is at the limit, or a concurrent first question created it
+            return await self.threads.find_one_and_update(
+                below_limit, {"$inc": {"turn_count": 1}}, projection=projection, return_document=ReturnDocument.BEFORE
+            )
+
+    async def history(self, session_id: str, persona_id: str) -> List[Dict[str, Any]]:
+        thread = await self.threads.find_one(
+            {"session_id": session_id, "persona_id": persona_id}, {"_id": 0, "turns": 1}
+        )
+        return thread.get("turns", []) if thread else []
+
+    async def compact(self, session_id: str, persona: Persona) -> bool:
+        """Fold the oldest unsummarized turns into the summary until the rest fit half the budget.
+
+        Safe to run concurrently: the summary is only replaced if no other compaction got there first.
+        """
+        query = {"session_id": session_id, "persona_id": persona.id}
+        thread = await self.threads.find_one(
+            query, {"_id": 0, "summary": 1, "summarized_turns": 1, "turns.tokens": 1}
+        )
+        if not thread:
+            return False
+        summarized_turns = thread.get("summarized_turns", 0)
+        tokens = [turn.get("tokens", 0) for turn in thread.get("turns", [])]
+        fold_end = self._fold_end(tokens, summarized_turns)
+        if fold_end <= summarized_turns:
+            return False
+
+        try:
+            folded = await self.threads.find_one(
+                query, {"_id": 0, "turns": {"$slice": [summarized_turns, fold_end - summarized_turns]}}
+            )
+            summary = await self.ai_service.summarize_conversation(
+                persona, session_id, summary_prompt(thread.get("summary", ""), folded["turns"], self.summary_words)
+            )
+        except Exception as e:
+            logger.warning(f"Follow-up summary for {session_id}/{persona.id} failed: {e}")
+            FOLLOW_UP_SUMMARIES.labels(result="error").inc()
+            return False
+
+        result = await self.threads.update_one(
+            {**query, "summarized_turns": summarized_turns},
+            {"$set": {"summary": summary, "summarized_turns": fold_end}}
+        )
+        FOLLOW_UP_SUMMARIES.labels(result="updated" if result.modified_count else "superseded").inc()
+        return bool(result.modified_count)
+
+    def _fold_end(self, tokens: List[int], summarized_turns: int) -> int:
+        """Index of the first turn to keep verbatim after compaction (== summarized_turns when none is due)"""
+        remaining = tokens[summarized_turns:]
+        if sum(remaining) <= self.context_tokens and len(remaining) < WINDOW_MAX_TURNS:
+            return summarized_turns
+        # Leave headroom so the next few turns do not each trigger another summary
+        end = summarized_turns
+        while end < len(tokens) - 1 and (
+            sum(tokens[end:]) > self.context_tokens // 2 or len(tokens) - end > WINDOW_MAX_TURNS // 2
+        ):
+            end += 1
+        return end
+
+
+def create_follow_up_service(ai_service: AIAdvisoryService, threads: AsyncIOMotorCollection) -> FollowUpService:
+    """Follow-up service configured from the environment"""
+    return FollowUpService(
+        ai_service,
+        threads,
+        context_tokens=int(os.environ.get('FOLLOW_UP_CONTEXT_TOKENS', 1500)),
+        summary_words=int(os.environ.get('FOLLOW_UP_SUMMARY_WORDS', 150)),
+        max_turns=int(os.environ.get('FOLLOW_UP_MAX_TURNS', 100))
+    )
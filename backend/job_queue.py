@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+
+from models import AdviceJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class AdviceJobQueue:
+    """Mongo-backed queue of advice generation jobs with leased claims and retry backoff"""
+
+    def __init__(self, collection: AsyncIOMotorCollection, lease_seconds: int = 90, max_attempts: int = 3,
+                 backoff_base_seconds: float = 5, backoff_max_seconds: float = 300):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        # Wakes workers in this process as soon as a job is enqueued instead of waiting for the next poll
+        self.job_available = asyncio.Event()
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("session_id", unique=True)
+        await self.collection.create_index([("status", 1), ("available_at", 1)])
+        await self.collection.create_index([("status", 1), ("lease_expires_at", 1)])
+
+    async def enqueue(self, session_id: str, user_question: str, probing_answers: Dict[str, str],
+                      personas: Optional[List[str]] = None, reset: bool = False) -> None:
+        """Queue advice generation for a session; a session never has more than one job"""
+        now = datetime.utcnow()
+        job = AdviceJob(
+            job_id=str(uuid.uuid4()),
+            session_id=session_id,
+            user_question=user_question,
+            probing_answers=probing_answers,
+            personas=personas or [],
+            max_attempts=self.max_attempts
+        )
+        job_dict = job.model_dump(by_alias=True, exclude={"id"})
+
+        if reset:
+            # Re-run a job that already finished (used when recovering orphaned sessions)
+            requeue = {
+                "status": JobStatus.QUEUED.value,
+                "user_question": user_question,
+                "probing_answers": probing_answers,
+                "personas": personas or [],
+                "attempts": 0,
+                "available_at": now,
+                "lease_expires_at": None,
+                "worker_id": None,
+                "last_error": None,
+                "updated_at": now
+            }
+            on_insert = {k: v for k, v in job_dict.items() if k not in requeue}
+            update = {"$set": requeue, "$setOnInsert": on_insert}
+        else:
+            update = {"$setOnInsert": job_dict}
+
+        await self.collection.update_one({"session_id": session_id}, update, upsert=True)
+        self.job_available.set()
+
+    async def claim(self, worker_id: str) -> Optional[AdviceJob]:
+        """Atomically lease the next runnable job, including ones whose previous lease expired"""
+        now = datetime.utcnow()
+        doc = await self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": JobStatus.QUEUED.value, "available_at": {"$lte": now}},
+                    {
+                        "status": JobStatus.LEASED.value,
+                        "lease_expires_at": {"$lte": now},
+                        "attempts": {"$lt": self.max_attempts}
+                    }
+                ]
+            },
+            {
+                "$set": {
+                    "status": JobStatus.LEASED.value,
+                    "worker_id": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("available_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if not doc:
+            return None
+        doc["_id"] = str(doc["_id"])
+        return AdviceJob.model_validate(doc)
+
+    async def renew_lease(self, job: AdviceJob) -> bool:
+        """Extend the lease while the job is still running; False if another worker took it over"""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"job_id": job.job_id, "worker_id": job.worker_id, "status": JobStatus.LEASED.value},
+            {"$set": {"lease_expires_at": now + timedelta(seconds=self.lease_seconds), "updated_at": now}}
+        )
+        return result.modified_count == 1
+
+    async def complete(self, job: AdviceJob) -> None:
+        await self.collection.update_one(
+            {"job_id": job.job_id, "worker_id": job.worker_id},
+            {"$set": {
+                "status": JobStatus.COMPLETED.value,
+                "lease_expires_at": None,
+                "updated_at": datetime.utcnow()
+            }}
+        )
+
+    async def fail(self, job: AdviceJob, error: str) -> bool:
+        """Record a failed attempt; returns True if the job will be retried"""
+        now = datetime.utcnow()
+        retry = job.attempts < job.max_attempts
+        update = {"last_error": error, "lease_expires_at": None, "updated_at": now}
+        if retry:
+            delay = min(self.backoff_base_seconds * (2 ** (job.attempts - 1)), self.backoff_max_seconds)
+            update.update({"status": JobStatus.QUEUED.value, "available_at": now + timedelta(seconds=delay)})
+        else:
+            update["status"] = JobStatus.FAILED.value
+
+        await self.collection.update_one({"job_id": job.job_id, "worker_id": job.worker_id}, {"$set": update})
+        return retry
+
+    async def reap_expired(self) -> list:
+        """Fail jobs whose lease expired on their last attempt; returns their session ids"""
+        now = datetime.utcnow()
+        expired = {
+            "status": JobStatus.LEASED.value,
+            "lease_expires_at": {"$lte": now},
+            "attempts": {"$gte": self.max_attempts}
+        }
+        session_ids = [doc["session_id"] async for doc in self.collection.find(expired, {"session_id": 1})]
+        if session_ids:
+            await self.collection.update_many(
+                {**expired, "session_id": {"$in": session_ids}},
+                {"$set": {"status": JobStatus.FAILED.value, "last_error": "Lease expired", "updated_at": now}}
+            )
+        return session_ids
+
+    async def get_job(self, session_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"session_id": session_id}, {"_id": 0, "status": 1})
+
+    async def depth(self) -> int:
+        """Number of jobs waiting to be claimed"""
+        return await self.collection.count_documents({"status": JobStatus.QUEUED.value})
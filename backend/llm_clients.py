@@ -0,0 +1,133 @@
+import asyncio
+import importlib
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional
+
+import httpx
+
+if TYPE_CHECKING:
+    from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+logger = logging.getLogger(__name__)
+
+# Probed for reachability; any HTTP response, even 401, means the provider can be reached.
+# LLM_HEALTHCHECK_URL replaces all of them when calls go through a single gateway.
+PROVIDER_HEALTH_URLS = {
+    "openai": "https://api.openai.com/v1/models",
+    "anthropic": "https://api.anthropic.com/v1/models",
+    "gemini": "https://generativelanguage.googleapis.com/v1beta/models",
+}
+
+
+class LlmClientPool:
+    """Shared keep-alive HTTP connections and prepared system prompts for LlmChat.
+
+    LlmChat keeps per-conversation history, so instances are still created per call;
+    what is shared is everything expensive underneath them: the HTTP client (connection
+    pool, TLS sessions) and the system prompts, which are prepared once at startup. litellm
+    only sends OpenAI-route calls through the shared client; Anthropic and Gemini calls use
+    litellm's own cached clients. The shared client also carries the provider probes.
+
+    emergentintegrations (and litellm, boto3, google-genai behind it) takes seconds to import,
+    so it is only loaded by load(), which warm() runs off the event loop after startup; the
+    first chat() loads it inline if warm() has not got there yet.
+    """
+
+    def __init__(self, api_key: str, provider: str = "openai", model: str = "gpt-4o",
+                 max_connections: int = 32, keepalive_expiry: float = 120, timeout: float = 60,
+                 health_urls: Optional[Dict[str, str]] = None):
+        self.api_key = api_key
+        self.provider = provider
+        self.model = model
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=timeout
+        )
+        self.health_urls = health_urls or PROVIDER_HEALTH_URLS
+        self._prompts: Dict[str, str] = {}
+        self._chat_module = None
+        self._load_lock = threading.Lock()
+        self.installed = False
+
+    def load(self):
+        """Import the LLM client library and route it through the shared HTTP client; idempotent"""
+        with self._load_lock:
+            if self._chat_module is None:
+                module = importlib.import_module("emergentintegrations.llm.chat")
+                self.installed = self._install_http_client()
+                self._chat_module = module
+        return self._chat_module
+
+    def _install_http_client(self) -> bool:
+        """Route LlmChat's OpenAI-route litellm requests through the shared client.
+
+        litellm.aclient_session is only handed to the OpenAI SDK client; other providers go
+        through litellm's own HTTP handlers, which keep their own connections alive.
+        """
+        try:
+            import litellm
+        except ImportError:
+            logger.warning("litellm not available; LLM calls will not share HTTP connections")
+            return False
+        litellm.aclient_session = self.http_client
+        return True
+
+    def prepare(self, key: str, system_message: str) -> str:
+        """Register a system prompt once; later calls with the same key reuse the stored string"""
+        return self._prompts.setdefault(key, system_message)
+
+    def prompt(self, key: str) -> str:
+        return self._prompts[key]
+
+    def chat(self, session_id: str, system_message: str, provider: Optional[str] = None,
+             model: Optional[str] = None, response_format: Optional[Dict[str, Any]] = None) -> "LlmChat":
+        """Lightweight LlmChat bound to the shared connection pool"""
+        chat = (self._chat_module or self.load()).LlmChat(
+            api_key=self.api_key,
+            session_id=session_id,
+            system_message=system_message
+        ).with_model(provider or self.provider, model or self.model)
+        # Releases without with_params still work; the prompt itself asks for JSON
+        if response_format and hasattr(chat, "with_params"):
+            chat = chat.with_params(response_format=response_format)
+        return chat
+
+    def message(self, text: str) -> "UserMessage":
+        return (self._chat_module or self.load()).UserMessage(text=text)
+
+    async def probe(self, provider: str, timeout: float = 3) -> bool:
+        """Whether the provider answers HTTP at all; also leaves a warm connection in the pool"""
+        url = os.environ.get('LLM_HEALTHCHECK_URL') or self.health_urls.get(provider)
+        if not url:
+            return True
+        try:
+            await self.http_client.get(url, timeout=timeout)
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"LLM provider {provider} unreachable: {e!r}")
+            return False
+
+    async def warm(self, providers: Iterable[str], timeout: float = 3) -> Dict[str, bool]:
+        """Load the client library and open a connection to each provider; returns reachability"""
+        await asyncio.to_thread(self.load)
+        providers = sorted(set(providers))
+        results = await asyncio.gather(*(self.probe(provider, timeout) for provider in providers))
+        return dict(zip(providers, results))
+
+    async def aclose(self):
+        await self.http_client.aclose()
+
+
+def create_client_pool(api_key: str) -> LlmClientPool:
+    """Client pool configured from the environment"""
+    return LlmClientPool(
+        api_key,
+        max_connections=int(os.environ.get('LLM_MAX_CONNECTIONS', 32)),
+        keepalive_expiry=float(os.environ.get('LLM_KEEPALIVE_SECONDS', 120))
+    )
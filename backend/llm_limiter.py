@@ -0,0 +1,197 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LlmPriority(IntEnum):
+    """Lower values are admitted first"""
+    PROBING = 0
+    FOLLOW_UP = 1
+    ADVICE = 2
+    # Background conversation summaries; nobody is waiting on them
+    SUMMARY = 3
+
+
+class LlmBackpressureError(Exception):
+    """Raised instead of queueing when the LLM admission queue is too deep"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM admission queue is full, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "future", "enqueued_at")
+
+    def __init__(self, priority: int, seq: int, tokens: int, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LlmAdmissionController:
+    """Bounds in-flight LLM calls and token spend per minute, admitting waiters in priority order"""
+
+    def __init__(self, max_concurrent: int = 8, tokens_per_minute: int = 0, max_queue_depth: int = 32):
+        self.max_concurrent = max_concurrent
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue_depth = max_queue_depth
+
+        self._in_flight = 0
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._refill_timer: Optional[asyncio.TimerHandle] = None
+        # Smoothed call duration, used to size Retry-After hints
+        self._avg_call_seconds = 5.0
+
+        self.counters: Dict[str, float] = {
+            "admitted": 0,
+            "rejected": 0,
+            "queued": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    @asynccontextmanager
+    async def admit(self, priority: LlmPriority, estimated_tokens: int = 0, shed: bool = False):
+        """Hold an LLM slot for the duration of the context.
+
+        With shed=True the caller is rejected with LlmBackpressureError instead of
+        queueing behind max_queue_depth other waiters.
+        """
+        tokens = min(estimated_tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+        wait_started = time.monotonic()
+
+        if not self._queue and self._can_start(tokens):
+            self._start(tokens)
+        else:
+            if shed and len(self._queue) >= self.max_queue_depth:
+                self.counters["rejected"] += 1
+                raise LlmBackpressureError(self.retry_after())
+            await self._wait(priority, tokens)
+
+        waited = time.monotonic() - wait_started
+        self.counters["admitted"] += 1
+        self.counters["wait_seconds_total"] += waited
+        self.counters["wait_seconds_max"] = max(self.counters["wait_seconds_max"], waited)
+
+        call_started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._avg_call_seconds = 0.8 * self._avg_call_seconds + 0.2 * (time.monotonic() - call_started)
+            self._in_flight -= 1
+            self._dispatch()
+
+    def retry_after(self) -> float:
+        """Rough time until a newly queued call would be admitted"""
+        backlog = len(self._queue) + self._in_flight
+        return max(1.0, backlog * self._avg_call_seconds / max(self.max_concurrent, 1))
+
+    def stats(self) -> Dict[str, float]:
+        self._refill()
+        admitted = self.counters["admitted"]
+        return {
+            **self.counters,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._queue),
+            "wait_seconds_avg": self.counters["wait_seconds_total"] / admitted if admitted else 0.0,
+            "tokens_available": round(self._tokens) if self.tokens_per_minute else None,
+        }
+
+    async def _wait(self, priority: LlmPriority, tokens: int):
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(int(priority), next(self._seq), tokens, future)
+        heapq.heappush(self._queue, waiter)
+        self.counters["queued"] += 1
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as we were cancelled; hand it back
+                self._in_flight -= 1
+                self._dispatch()
+            elif waiter in self._queue:
+                # _dispatch may already have popped the cancelled waiter before this task resumed
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+            raise
+
+    def _can_start(self, tokens: int) -> bool:
+        if self._in_flight >= self.max_concurrent:
+            return False
+        if self.tokens_per_minute:
+            self._refill()
+            return self._tokens >= tokens
+        return True
+
+    def _start(self, tokens: int):
+        self._in_flight += 1
+        if self.tokens_per_minute:
+            self._tokens -= tokens
+
+    def _dispatch(self):
+        """Admit queued waiters, highest priority first, while capacity and token budget allow"""
+        while self._queue:
+            head = self._queue[0]
+            if head.future.done():
+                heapq.heappop(self._queue)
+                continue
+            if not self._can_start(head.tokens):
+                if self._in_flight < self.max_concurrent:
+                    self._schedule_refill(head.tokens)
+                return
+            heapq.heappop(self._queue)
+            self._start(head.tokens)
+            head.future.set_result(None)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.tokens_per_minute),
+            self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60
+        )
+        self._refilled_at = now
+
+    def _schedule_refill(self, tokens: int):
+        """Re-run dispatch once the bucket holds enough tokens for the head waiter"""
+        if self._refill_timer is not None:
+            return
+        deficit = tokens - self._tokens
+        delay = max(deficit * 60 / self.tokens_per_minute, 0.01)
+
+        def fire():
+            self._refill_timer = None
+            self._dispatch()
+
+        self._refill_timer = asyncio.get_running_loop().call_later(delay, fire)
+
+
+def estimate_tokens(*texts: str, completion_tokens: int = 600) -> int:
+    """Cheap token estimate (~4 characters per token) plus the expected completion size"""
+    return sum(len(text) for text in texts) // 4 + completion_tokens
+
+
+def create_admission_controller() -> LlmAdmissionController:
+    """Process-wide admission controller configured from the environment"""
+    return LlmAdmissionController(
+        max_concurrent=int(os.environ.get('LLM_MAX_CONCURRENT', 8)),
+        tokens_per_minute=int(os.environ.get('LLM_TOKENS_PER_MINUTE', 0)),
+        max_queue_depth=int(os.environ.get('LLM_MAX_QUEUE_DEPTH', 32))
+    )
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Type, TypeVar
+
+from llm_limiter import LlmBackpressureError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def percentile(samples: Iterable[float], pct: float) -> float:
+    """Nearest-rank percentile of unsorted samples; 0.0 when there are none"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(max(math.ceil(pct / 100 * len(ordered)) - 1, 0), len(ordered) - 1)]
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM provider circuit is open, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class LlmDeadlineExceeded(Exception):
+    """Raised when a call (including its hedges) does not finish within its deadline"""
+
+
+class CircuitBreaker:
+    """Fails fast once the provider keeps failing, letting a single trial call through after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30,
+                 ignore: Tuple[Type[BaseException], ...] = ()):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        # Errors that say nothing about provider health (e.g. our own backpressure)
+        self.ignore = ignore
+        self.state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.counters: Dict[str, int] = {"opened": 0, "rejected": 0, "failures": 0, "successes": 0}
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Wrap one provider call: raises CircuitOpenError when open, records the outcome otherwise"""
+        trial = self._before_call()
+        try:
+            yield
+        except self.ignore:
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        else:
+            self.record_success()
+        finally:
+            if trial:
+                self._trial_in_flight = False
+
+    def record_success(self):
+        self.counters["successes"] += 1
+        self._consecutive_failures = 0
+        if self.state != self.CLOSED:
+            logger.info("LLM circuit closed")
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self.counters["failures"] += 1
+        self._consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.counters["opened"] += 1
+                logger.warning(f"LLM circuit opened after {self._consecutive_failures} consecutive failures")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def retry_after(self) -> float:
+        return max(self._opened_at + self.reset_seconds - time.monotonic(), 0.0)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **self.counters,
+            "open": int(self.state == self.OPEN),
+            "half_open": int(self.state == self.HALF_OPEN),
+            "consecutive_failures": self._consecutive_failures,
+        }
+
+    def _before_call(self) -> bool:
+        """Returns True when this call is the half-open trial"""
+        if self.state == self.OPEN and self.retry_after() == 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.CLOSED:
+            return False
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.counters["rejected"] += 1
+        raise CircuitOpenError(self.retry_after() or self.reset_seconds)
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call durations per key, for percentile-based hedge delays"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, key: str, seconds: float):
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: str, pct: float) -> Optional[float]:
+        """Nearest-rank percentile, or None until enough samples have been seen"""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        return percentile(samples, pct)
+
+
+class HedgePolicy:
+    """Per-call deadline and when to fire duplicate (hedged) requests"""
+
+    def __init__(self, deadline_seconds: float = 25, max_hedges: int = 1, percentile: float = 95,
+                 initial_delay_seconds: float = 10, min_delay_seconds: float = 1):
+        self.deadline_seconds = deadline_seconds
+        self.max_hedges = max_hedges
+        self.percentile = percentile
+        # Used until the tracker has enough samples for a key
+        self.initial_delay_seconds = initial_delay_seconds
+        self.min_delay_seconds = min_delay_seconds
+
+    def hedge_delay(self, tracker: LatencyTracker, key: str) -> float:
+        observed = tracker.percentile(key, self.percentile)
+        return max(observed if observed is not None else self.initial_delay_seconds, self.min_delay_seconds)
+
+
+async def hedged(attempt: Callable[[], Awaitable[T]], delay: float, max_hedges: int = 1,
+                 on_hedge: Optional[Callable[[int], None]] = None) -> Tuple[T, int]:
+    """Run attempt(), starting another copy each time `delay` passes without a result.
+
+    Returns the first successful result and the index of the attempt that produced it; losers are
+    cancelled. Raises the last error once every attempt has failed.
+    """
+    tasks: List[asyncio.Future] = [asyncio.ensure_future(attempt())]
+    index_of = {tasks[0]: 0}
+    started = 1
+    error: Optional[BaseException] = None
+    try:
+        while tasks:
+            can_hedge = started <= max_hedges
+            done, _ = await asyncio.wait(
+                tasks, timeout=delay if can_hedge else None, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                tasks.remove(task)
+                if task.exception() is None:
+                    return task.result(), index_of[task]
+                error = task.exception()
+            if not done and can_hedge:
+                if on_hedge:
+                    on_hedge(started)
+                task = asyncio.ensure_future(attempt())
+                index_of[task] = started
+                tasks.append(task)
+                started += 1
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def create_circuit_breaker() -> CircuitBreaker:
+    """Provider circuit breaker configured from the environment"""
+    return CircuitBreaker(
+        failure_threshold=int(os.environ.get('LLM_BREAKER_FAILURES', 5)),
+        reset_seconds=float(os.environ.get('LLM_BREAKER_RESET_SECONDS', 30)),
+        ignore=(LlmBackpressureError,)
+    )
+
+
+def create_hedge_policy() -> HedgePolicy:
+    """Advice call deadline and hedging configured from the environment"""
+    return HedgePolicy(
+        deadline_seconds=float(os.environ.get('ADVICE_DEADLINE_SECONDS', 25)),
+        max_hedges=int(os.environ.get('ADVICE_MAX_HEDGES', 1)),
+        percentile=float(os.environ.get('ADVICE_HEDGE_PERCENTILE', 95))
+    )
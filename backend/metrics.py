@@ -0,0 +1,164 @@
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily, Metric
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds for in-process and database work
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# LLM calls and whole sessions take seconds to minutes
+SLOW_BUCKETS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0)
+
+Collector = Callable[[], Awaitable[List[Metric]]]
+
+
+def scrape_registry() -> CollectorRegistry:
+    """The counters and histograms to expose: this process's, or with PROMETHEUS_MULTIPROC_DIR set,
+    the sum over every process writing to that directory (e.g. `uvicorn --workers N`)"""
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+class _Snapshot:
+    """prometheus_client collector serving metric families that were gathered beforehand"""
+
+    def __init__(self, families: List[Metric]):
+        self.families = families
+
+    def collect(self) -> List[Metric]:
+        return self.families
+
+
+class MetricsRegistry:
+    """Scrape output: the prometheus_client metrics below plus async collectors that read live
+    state (Mongo counts, cache and limiter stats) at scrape time.
+
+    prometheus_client collectors are synchronous, so the async ones are awaited first and their
+    families rendered from a snapshot. In multiprocess mode those live gauges come from whichever
+    process serves the scrape.
+    """
+
+    def __init__(self):
+        self._collectors: List[Collector] = []
+
+    def add_collector(self, collector: Collector):
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def remove_collector(self, collector: Collector):
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    async def collect(self) -> List[Metric]:
+        families = []
+        for collector in self._collectors:
+            try:
+                families.extend(await collector())
+            except Exception as e:
+                # One broken source must not take down the whole scrape
+                logger.error(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+        return families
+
+    async def render(self) -> bytes:
+        """Prometheus text exposition format (version 0.0.4)"""
+        live = CollectorRegistry(auto_describe=False)
+        live.register(_Snapshot(await self.collect()))
+        return generate_latest(scrape_registry()) + generate_latest(live)
+
+
+def gauge_family(name: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> GaugeMetricFamily:
+    """A gauge computed at scrape time, from (labels, value) samples that all share one label set"""
+    samples = list(samples)
+    label_names = list(samples[0][0]) if samples else []
+    family = GaugeMetricFamily(name, help, labels=label_names)
+    for labels, value in samples:
+        family.add_metric([str(labels[label]) for label in label_names], float(value))
+    return family
+
+
+def gauges(prefix: str, help: str, stats: Dict[str, Any]) -> List[GaugeMetricFamily]:
+    """Expose a component's stats() dict as one gauge per numeric entry"""
+    return [
+        GaugeMetricFamily(f"{prefix}_{key}", f"{help} ({key})", value=float(value))
+        for key, value in stats.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    ]
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command the Mongo client sends, by command name and outcome"""
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.histogram.labels(command=event.command_name, outcome="ok").observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.histogram.labels(command=event.command_name, outcome="error").observe(event.duration_micros / 1e6)
+
+
+metrics = MetricsRegistry()
+
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds", "LLM provider call latency, excluding admission queue wait",
+    ("task", "persona", "route", "outcome"), buckets=SLOW_BUCKETS
+)
+LLM_ADMISSION_WAIT_SECONDS = Histogram(
+    "llm_admission_wait_seconds", "Time from requesting an LLM slot until the call starts",
+    ("task",), buckets=DEFAULT_BUCKETS
+)
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total", "Duplicate advice requests fired after the hedge delay, and how many won",
+    ("persona", "result")
+)
+LLM_DEADLINE_EXCEEDED = Counter(
+    "llm_deadline_exceeded_total", "Advice calls abandoned at their deadline",
+    ("persona",)
+)
+PROBING_QUESTIONS = Counter(
+    "probing_questions_total", "Probing question generations by result (parsed, repaired or which fallback)",
+    ("result",)
+)
+INNOVATOR_ADVICE = Counter(
+    "innovator_advice_total", "Innovator advice entries by result (generated or fallback)",
+    ("persona", "result")
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command round-trip latency",
+    ("command", "outcome"), buckets=DEFAULT_BUCKETS
+)
+ADVICE_SESSION_SECONDS = Histogram(
+    "advice_session_duration_seconds", "Session created_at to completed_at",
+    buckets=SLOW_BUCKETS
+)
+FOLLOW_UP_PROMPT_TOKENS = Histogram(
+    "follow_up_prompt_tokens", "Estimated prompt tokens per follow-up question",
+    ("persona",), buckets=(250, 500, 750, 1000, 1500, 2000, 3000, 4000, 6000, 8000)
+)
+FOLLOW_UP_SUMMARIES = Counter(
+    "follow_up_summaries_total", "Follow-up conversation compactions by result (updated, superseded or error)",
+    ("result",)
+)
+WARM_ADVICE_LOOKUPS = Counter(
+    "warm_advice_lookups_total", "Warm probing/advice lookups by result (hit, stale or miss)",
+    ("kind", "result")
+)
+RATE_LIMITED_REQUESTS = Counter(
+    "rate_limited_requests_total", "LLM endpoint requests rejected before reaching the advisory service",
+    ("route", "scope", "limit")
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "API request latency by route template",
+    ("method", "route", "status"), buckets=DEFAULT_BUCKETS
+)
@@ -0,0 +1,156 @@
+import logging
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from llm_resilience import CircuitBreaker, create_circuit_breaker, percentile
+
+logger = logging.getLogger(__name__)
+
+# Provider/model chains per task, tried in order. All three providers work with the Emergent universal key.
+DEFAULT_CHAINS = {
+    "probing": "openai:gpt-4o-mini,gemini:gemini-2.0-flash,anthropic:claude-3-5-haiku-20241022",
+    "advice": "openai:gpt-4o,anthropic:claude-sonnet-4-20250514,gemini:gemini-2.5-pro",
+    "follow_up": "openai:gpt-4o,anthropic:claude-sonnet-4-20250514,gemini:gemini-2.5-pro",
+    "summary": "openai:gpt-4o-mini,gemini:gemini-2.0-flash,anthropic:claude-3-5-haiku-20241022",
+}
+
+
+class ModelRoute(NamedTuple):
+    provider: str
+    model: str
+
+    @classmethod
+    def parse(cls, spec: str) -> "ModelRoute":
+        """Parse "provider:model" """
+        provider, sep, model = spec.strip().partition(":")
+        if not sep or not provider or not model:
+            raise ValueError(f"Invalid model route {spec!r}, expected provider:model")
+        return cls(provider, model)
+
+    def __str__(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+
+def parse_chain(spec: str) -> List[ModelRoute]:
+    return [ModelRoute.parse(part) for part in spec.split(",") if part.strip()]
+
+
+class RouteHealth:
+    """Rolling latency and error rate of one provider/model, plus its circuit breaker"""
+
+    def __init__(self, route: ModelRoute, breaker: CircuitBreaker, window_seconds: float = 300,
+                 max_samples: int = 200):
+        self.route = route
+        self.breaker = breaker
+        self.window_seconds = window_seconds
+        # (observed_at, seconds, ok); ok is None for calls cancelled before they finished
+        self._samples: Deque[Tuple[float, float, Optional[bool]]] = deque(maxlen=max_samples)
+
+    def observe(self, seconds: float, ok: Optional[bool]):
+        self._samples.append((time.monotonic(), seconds, ok))
+
+    def error_rate(self, min_samples: int) -> Optional[float]:
+        outcomes = [ok for _, _, ok in self._recent() if ok is not None]
+        if len(outcomes) < min_samples:
+            return None
+        return outcomes.count(False) / len(outcomes)
+
+    def latency(self, pct: float, min_samples: int) -> Optional[float]:
+        """Nearest-rank latency percentile; cancelled calls count with the time they had run so far"""
+        durations = [seconds for _, seconds, _ in self._recent()]
+        if len(durations) < min_samples:
+            return None
+        return percentile(durations, pct)
+
+    def stats(self, min_samples: int) -> Dict[str, Optional[float]]:
+        recent = self._recent()
+        return {
+            "calls": len(recent),
+            "error_rate": self.error_rate(min_samples),
+            "p50_seconds": self.latency(50, min_samples),
+            "p95_seconds": self.latency(95, min_samples),
+            "circuit_open": int(self.breaker.state == CircuitBreaker.OPEN),
+        }
+
+    def _recent(self) -> List[Tuple[float, float, Optional[bool]]]:
+        horizon = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < horizon:
+            self._samples.popleft()
+        return list(self._samples)
+
+
+class ModelRouter:
+    """Orders each task's provider/model chain by health so calls fail over away from slow or failing routes"""
+
+    def __init__(self, chains: Dict[str, List[ModelRoute]],
+                 breaker_factory: Callable[[], CircuitBreaker] = CircuitBreaker, max_error_rate: float = 0.5,
+                 slow_factor: float = 2.0, min_samples: int = 10, window_seconds: float = 300):
+        for task, chain in chains.items():
+            if not chain:
+                raise ValueError(f"Model chain for {task} is empty")
+        self.chains = chains
+        self.max_error_rate = max_error_rate
+        # A route is slow when its median is this many times the fastest healthy route's
+        self.slow_factor = slow_factor
+        self.min_samples = min_samples
+        self._health: Dict[ModelRoute, RouteHealth] = {}
+        for chain in chains.values():
+            for route in chain:
+                if route not in self._health:
+                    self._health[route] = RouteHealth(route, breaker_factory(), window_seconds)
+
+    def chain(self, task: str) -> List[ModelRoute]:
+        return self.chains[task]
+
+    def health(self, route: ModelRoute) -> RouteHealth:
+        return self._health[route]
+
+    def candidates(self, task: str) -> List[ModelRoute]:
+        """The task's chain in configured order, with open-circuit, error-prone and slow routes moved to the back"""
+        chain = self.chains[task]
+        medians = {route: self._health[route].latency(50, self.min_samples) for route in chain}
+        healthy_medians = [
+            median for route, median in medians.items()
+            if median is not None and not self._failing(route)
+        ]
+        fastest = min(healthy_medians, default=None)
+
+        def rank(route: ModelRoute) -> int:
+            if self._health[route].breaker.state == CircuitBreaker.OPEN:
+                return 2
+            if self._failing(route):
+                return 1
+            median = medians[route]
+            if fastest is not None and median is not None and median > fastest * self.slow_factor:
+                return 1
+            return 0
+
+        return sorted(chain, key=rank)
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+        return {
+            task: {str(route): self._health[route].stats(self.min_samples) for route in chain}
+            for task, chain in self.chains.items()
+        }
+
+    def _failing(self, route: ModelRoute) -> bool:
+        error_rate = self._health[route].error_rate(self.min_samples)
+        return error_rate is not None and error_rate >= self.max_error_rate
+
+
+def create_model_router() -> ModelRouter:
+    """Router with per-task chains from LLM_ROUTE_<TASK> (comma-separated provider:model)"""
+    chains = {
+        task: parse_chain(os.environ.get(f'LLM_ROUTE_{task.upper()}') or default)
+        for task, default in DEFAULT_CHAINS.items()
+    }
+    for task, chain in chains.items():
+        logger.info(f"LLM route for {task}: {', '.join(map(str, chain))}")
+    return ModelRouter(
+        chains,
+        breaker_factory=create_circuit_breaker,
+        max_error_rate=float(os.environ.get('LLM_ROUTE_MAX_ERROR_RATE', 0.5)),
+        slow_factor=float(os.environ.get('LLM_ROUTE_SLOW_FACTOR', 2.0))
+    )
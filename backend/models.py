@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Optional
 from datetime import datetime
 from enum import Enum
@@ -8,6 +8,13 @@ class SessionStatus(str, Enum):
     PROCESSING = "processing" 
     COMPLETED = "completed"
     FAILED = "failed"
+    # Reported by get_advice while some innovators have finished; never stored
+    PARTIAL = "partial"
+
+class InnovatorStatus(str, Enum):
+    PENDING = "pending"
+    COMPLETED = "completed"
+    FAILED = "failed"
 
 class InnovatorAdvice(BaseModel):
     innovator: str
@@ -23,20 +30,25 @@ class AdvisorySession(BaseModel):
     probing_questions: List[str] = []
     probing_options: List[List[str]] = []
     probing_answers: Dict[str, str] = {}
+    personas: List[str] = []
     advice: List[InnovatorAdvice] = []
+    innovator_status: Dict[str, InnovatorStatus] = {}
     status: SessionStatus = SessionStatus.PENDING
+    # Set for sessions generated by the batch API
+    batch_id: Optional[str] = None
+    # Hash of the normalized question, used to mine popular questions for warm advice
+    question_key: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
     
-    class Config:
-        populate_by_name = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    # Datetimes serialize to ISO 8601 by default in Pydantic v2
+    model_config = ConfigDict(populate_by_name=True)
 
 # Request/Response models
 class CreateSessionRequest(BaseModel):
     user_question: str = Field(..., min_length=1, max_length=500)
+    # Skip the probing question cache and always ask the LLM
+    bypass_cache: bool = False
 
 class CreateSessionResponse(BaseModel):
     session_id: str
@@ -46,15 +58,101 @@ class CreateSessionResponse(BaseModel):
 
 class SubmitProbingAnswersRequest(BaseModel):
     answers: Dict[str, str]
+    # Persona ids to consult (see GET /api/personas); all personas when omitted
+    personas: Optional[List[str]] = None
 
 class SubmitProbingAnswersResponse(BaseModel):
     session_id: str
     processing: bool = True
     estimated_completion: datetime
 
+class PersonaSummary(BaseModel):
+    id: str
+    name: str
+    title: str
+    confidence: str
+
 class GetAdviceResponse(BaseModel):
     session_id: str
     user_question: str
     probing_answers: Dict[str, str]
     advice: List[InnovatorAdvice]
-    status: str
\ No newline at end of file
+    innovator_status: Dict[str, InnovatorStatus] = {}
+    status: str
+
+class SessionSummary(BaseModel):
+    """A session in the history listing; advice is only included on request"""
+    session_id: str
+    user_question: str
+    status: SessionStatus
+    personas: List[str] = []
+    innovator_status: Dict[str, InnovatorStatus] = {}
+    batch_id: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    advice: Optional[List[InnovatorAdvice]] = None
+
+class SessionListResponse(BaseModel):
+    sessions: List[SessionSummary]
+    # Pass back as ?cursor= for the next (older) page; null on the last page
+    next_cursor: Optional[str] = None
+
+class FollowUpTurn(BaseModel):
+    question: str
+    answer: str
+    # Estimated prompt tokens for this exchange, recorded once so windows are sized without re-counting
+    tokens: int = 0
+    asked_at: datetime
+    answered_at: datetime = Field(default_factory=datetime.utcnow)
+
+class FollowUpRequest(BaseModel):
+    question: str = Field(..., min_length=1, max_length=1000)
+
+class FollowUpResponse(BaseModel):
+    session_id: str
+    persona: str
+    innovator: str
+    turn: int
+    question: str
+    answer: str
+    answered_at: datetime
+
+class FollowUpThreadResponse(BaseModel):
+    session_id: str
+    persona: str
+    innovator: str
+    turns: List[FollowUpTurn] = []
+
+class BatchAdviceItem(BaseModel):
+    """One line of a batch request (NDJSON)"""
+    user_question: str = Field(..., min_length=1, max_length=500)
+    probing_answers: Dict[str, str] = {}
+    personas: Optional[List[str]] = None
+    # Caller's own identifier, echoed back on the result line
+    ref: Optional[str] = None
+
+# Advice generation job queue
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    LEASED = "leased"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class AdviceJob(BaseModel):
+    id: Optional[str] = Field(default=None, alias="_id")
+    job_id: str
+    session_id: str
+    user_question: str
+    probing_answers: Dict[str, str] = {}
+    personas: List[str] = []
+    status: JobStatus = JobStatus.QUEUED
+    attempts: int = 0
+    max_attempts: int = 3
+    available_at: datetime = Field(default_factory=datetime.utcnow)
+    lease_expires_at: Optional[datetime] = None
+    worker_id: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    model_config = ConfigDict(populate_by_name=True)
@@ -0,0 +1,69 @@
+import base64
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import DESCENDING
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a page cursor that was not produced by encode_cursor"""
+
+
+def encode_cursor(sort_value: datetime, doc_id: ObjectId) -> str:
+    """Opaque cursor for the position just after a document, newest first"""
+    raw = f"{sort_value.isoformat()}|{doc_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        sort_value, doc_id = raw.split("|")
+        return datetime.fromisoformat(sort_value), ObjectId(doc_id)
+    except (ValueError, InvalidId, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+
+
+def keyset_filter(sort_field: str, cursor: str) -> Dict:
+    """Documents strictly after the cursor in (sort_field, _id) descending order"""
+    sort_value, doc_id = decode_cursor(cursor)
+    return {"$or": [
+        {sort_field: {"$lt": sort_value}},
+        {sort_field: sort_value, "_id": {"$lt": doc_id}},
+    ]}
+
+
+async def fetch_page(collection: AsyncIOMotorCollection, query: Dict, projection: Dict, sort_field: str,
+                     limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """One page of documents, newest first, and the cursor for the next page (None on the last).
+
+    Pages are addressed by the last (sort_field, _id) seen rather than by offset, so every page is an
+    index range scan on (sort_field desc, _id desc) no matter how deep it is. Documents are streamed
+    off the Motor cursor; only the page itself is held.
+    """
+    if cursor:
+        after = keyset_filter(sort_field, cursor)
+        query = {"$and": [query, after]} if query else after
+    # The sort key and _id are always read so the next cursor can be built, then dropped if unasked
+    keep_sort_field = projection.get(sort_field) == 1
+    projection = {**projection, sort_field: 1, "_id": 1}
+
+    documents = collection.find(query, projection).sort(
+        [(sort_field, DESCENDING), ("_id", DESCENDING)]
+    ).limit(limit + 1).batch_size(limit + 1)
+
+    page: List[Dict] = []
+    next_cursor = None
+    async for doc in documents:
+        if len(page) == limit:
+            # There is at least one more document, so the page ends at the previous one
+            next_cursor = encode_cursor(last_sort_value, last_id)
+            break
+        last_sort_value, last_id = doc[sort_field], doc.pop("_id")
+        if not keep_sort_field:
+            del doc[sort_field]
+        page.append(doc)
+    return page, next_cursor
@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = Path(__file__).parent / "personas.json"
+
+
+class UnknownPersonaError(ValueError):
+    """Raised when a request selects a persona id that is not registered"""
+
+
+class Persona(BaseModel):
+    id: str
+    name: str
+    title: str
+    confidence: str
+    # Fully static system prompt: persona rules followed by the shared advice instructions.
+    # It never contains request data, so it is a byte-identical prefix across requests.
+    system_prompt: str
+    # Overrides ADVICE_DEADLINE_SECONDS for personas that are known to run long
+    deadline_seconds: Optional[float] = None
+
+    model_config = ConfigDict(frozen=True)
+
+
+class PersonaRegistry:
+    """Innovator personas loaded once from a data file, in display order"""
+
+    def __init__(self, personas: List[Persona]):
+        if not personas:
+            raise ValueError("Persona registry is empty")
+        self._personas: Dict[str, Persona] = {persona.id: persona for persona in personas}
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "PersonaRegistry":
+        """Load from `path`, PERSONA_REGISTRY_PATH, or the bundled personas.json"""
+        registry_path = Path(path or os.environ.get('PERSONA_REGISTRY_PATH') or DEFAULT_REGISTRY_PATH)
+        with open(registry_path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        shared = "\n".join(data.get("shared_instructions", []))
+        personas = []
+        for entry in data["personas"]:
+            prompt = "\n".join(entry["prompt"])
+            personas.append(Persona(
+                id=entry["id"],
+                name=entry["name"],
+                title=entry["title"],
+                confidence=entry["confidence"],
+                system_prompt=f"{prompt}\n\n{shared}" if shared else prompt,
+                deadline_seconds=entry.get("deadline_seconds")
+            ))
+        logger.info(f"Loaded {len(personas)} personas from {registry_path}")
+        return cls(personas)
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._personas)
+
+    def all(self) -> List[Persona]:
+        return list(self._personas.values())
+
+    def get(self, persona_id: str) -> Persona:
+        try:
+            return self._personas[persona_id]
+        except KeyError:
+            raise UnknownPersonaError(f"Unknown persona: {persona_id}")
+
+    def select(self, persona_ids: Optional[List[str]] = None) -> List[Persona]:
+        """Requested personas in registry order; all of them when none are requested"""
+        if not persona_ids:
+            return self.all()
+        unknown = [persona_id for persona_id in persona_ids if persona_id not in self._personas]
+        if unknown:
+            raise UnknownPersonaError(f"Unknown personas: {', '.join(unknown)}")
+        return [persona for persona in self._personas.values() if persona.id in persona_ids]
@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import math
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from ai_service import AIAdvisoryService
+from db_indexes import ensure_ttl_index
+
+logger = logging.getLogger(__name__)
+
+# Optional embedding function for the similarity tier: text -> vector
+Embedder = Callable[[str], Awaitable[List[float]]]
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_question(user_question: str) -> str:
+    """Canonical form of a question: case, accents, punctuation and spacing folded away"""
+    text = unicodedata.normalize("NFKC", user_question).casefold()
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def question_key(user_question: str) -> str:
+    """Stable cache key for the normalized question"""
+    return hashlib.sha256(normalize_question(user_question).encode("utf-8")).hexdigest()
+
+
+def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ProbingQuestionCache:
+    """Two-tier (in-process LRU + Mongo TTL collection) cache in front of generate_probing_questions"""
+
+    def __init__(self, ai_service: AIAdvisoryService, collection: AsyncIOMotorCollection,
+                 ttl_seconds: int = 86400, max_entries: int = 1024,
+                 embedder: Optional[Embedder] = None, similarity_threshold: float = 0.92):
+        self.ai_service = ai_service
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        # key -> (expires_at, questions, options, embedding)
+        self._entries: "OrderedDict[str, Tuple[float, List[str], List[List[str]], Optional[List[float]]]]" = OrderedDict()
+        self.counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "mongo_hits": 0,
+            "similarity_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+        }
+
+    async def ensure_indexes(self):
+        """TTL index so Mongo evicts entries on its own; a changed PROBING_CACHE_TTL_SECONDS is applied in place"""
+        await ensure_ttl_index(self.collection, "created_at", self.ttl_seconds)
+
+    async def generate_probing_questions(self, user_question: str, session_id: str,
+                                         bypass: bool = False) -> Tuple[List[str], List[List[str]]]:
+        """Drop-in replacement for AIAdvisoryService.generate_probing_questions that serves repeats from cache"""
+        if bypass:
+            self.counters["bypassed"] += 1
+            return await self.ai_service.generate_probing_questions(user_question, session_id)
+
+        key = question_key(user_question)
+
+        cached = self._get_memory(key)
+        if cached:
+            self.counters["memory_hits"] += 1
+            return cached
+
+        try:
+            doc = await self.collection.find_one(
+                {"_id": key}, {"probing_questions": 1, "probing_options": 1, "embedding": 1}
+            )
+        except Exception as e:
+            logger.warning(f"Probing cache lookup failed, generating instead: {e}")
+            doc = None
+        if doc:
+            self.counters["mongo_hits"] += 1
+            self._put_memory(key, doc["probing_questions"], doc["probing_options"], doc.get("embedding"))
+            return doc["probing_questions"], doc["probing_options"]
+
+        embedding = None
+        if self.embedder:
+            embedding, similar = await self._find_similar(user_question)
+            if similar:
+                self.counters["similarity_hits"] += 1
+                return similar
+
+        self.counters["misses"] += 1
+        questions, options = await self.ai_service.generate_probing_questions(user_question, session_id)
+
+        # Fallback questions mean the LLM call failed; let the next request try again
+        if not self.ai_service.is_default_probing_questions(questions):
+            await self._store(key, user_question, questions, options, embedding)
+        return questions, options
+
+    def stats(self) -> Dict[str, int]:
+        hits = self.counters["memory_hits"] + self.counters["mongo_hits"] + self.counters["similarity_hits"]
+        return {**self.counters, "hits": hits, "entries": len(self._entries)}
+
+    def _get_memory(self, key: str) -> Optional[Tuple[List[str], List[List[str]]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, questions, options, _ = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return questions, options
+
+    def _put_memory(self, key: str, questions: List[str], options: List[List[str]],
+                    embedding: Optional[List[float]] = None):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, questions, options, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _find_similar(self, user_question: str) -> Tuple[Optional[List[float]], Optional[Tuple[List[str], List[List[str]]]]]:
+        """Embed the question and return the closest in-process entry above the similarity threshold"""
+        try:
+            embedding = await self.embedder(normalize_question(user_question))
+        except Exception as e:
+            logger.warning(f"Probing cache embedding failed, skipping similarity tier: {e}")
+            return None, None
+
+        now = time.monotonic()
+        best_score, best_entry = 0.0, None
+        for expires_at, questions, options, candidate in self._entries.values():
+            if candidate is None or expires_at < now:
+                continue
+            score = _cosine_similarity(embedding, candidate)
+            if score > best_score:
+                best_score, best_entry = score, (questions, options)
+
+        if best_entry and best_score >= self.similarity_threshold:
+            return embedding, best_entry
+        return embedding, None
+
+    async def _store(self, key: str, user_question: str, questions: List[str], options: List[List[str]],
+                     embedding: Optional[List[float]]):
+        self._put_memory(key, questions, options, embedding)
+        doc = {
+            "normalized_question": normalize_question(user_question),
+            "probing_questions": questions,
+            "probing_options": options,
+            "created_at": datetime.utcnow()
+        }
+        if embedding is not None:
+            doc["embedding"] = embedding
+        try:
+            await self.collection.replace_one({"_id": key}, doc, upsert=True)
+        except Exception as e:
+            logger.warning(f"Failed to persist probing cache entry: {e}")
@@ -0,0 +1,111 @@
+import re
+from typing import List, Optional, Tuple
+
+import orjson
+from pydantic import BaseModel, TypeAdapter, ValidationError, field_validator
+
+PROBING_QUESTION_COUNT = 3
+NOT_SURE_OPTION = "Not sure, just go ahead"
+
+# JSON mode request for providers that support it (passed through to litellm)
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+
+class ProbingSlot(BaseModel):
+    """One probing question with its multiple choice options"""
+    question: str
+    options: List[str]
+
+    @field_validator("question")
+    @classmethod
+    def question_not_blank(cls, value: str) -> str:
+        value = value.strip()
+        if not value:
+            raise ValueError("question is blank")
+        return value
+
+    @field_validator("options")
+    @classmethod
+    def options_with_not_sure(cls, value: List[str]) -> List[str]:
+        options = [option.strip() for option in value if option.strip() and option.strip() != NOT_SURE_OPTION]
+        if len(options) < 2:
+            raise ValueError("needs at least two real options")
+        return options[:3] + [NOT_SURE_OPTION]
+
+
+# Built once at import; validating raw dicts against it is the hot path
+_SLOT_ADAPTER = TypeAdapter(ProbingSlot)
+
+
+class ProbingParseResult:
+    """Valid slots by position; None marks a slot the response did not get right"""
+
+    def __init__(self, slots: List[Optional[ProbingSlot]]):
+        self.slots = slots
+
+    @property
+    def missing(self) -> List[int]:
+        return [index for index, slot in enumerate(self.slots) if slot is None]
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    def fill(self, indices: List[int], slots: List[Optional[ProbingSlot]]):
+        for index, slot in zip(indices, slots):
+            if slot is not None:
+                self.slots[index] = slot
+
+    def as_lists(self) -> Tuple[List[str], List[List[str]]]:
+        return [slot.question for slot in self.slots], [slot.options for slot in self.slots]
+
+
+def load_json_object(text: str) -> dict:
+    """Parse a model response as a JSON object, tolerating code fences and chatter around it"""
+    text = _CODE_FENCE.sub("", text.strip())
+    try:
+        data = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise
+        data = orjson.loads(text[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object")
+    return data
+
+
+def parse_probing_slots(text: str, count: int = PROBING_QUESTION_COUNT) -> ProbingParseResult:
+    """Validate {"questions": [...], "options": [[...], ...]} slot by slot, keeping whatever is usable.
+
+    Raises ValueError (orjson.JSONDecodeError is one) only when the response is not a JSON object at all.
+    """
+    data = load_json_object(text)
+    questions = data.get("questions") if isinstance(data.get("questions"), list) else []
+    options = data.get("options") if isinstance(data.get("options"), list) else []
+
+    slots: List[Optional[ProbingSlot]] = []
+    for index in range(count):
+        try:
+            slots.append(_SLOT_ADAPTER.validate_python({
+                "question": questions[index] if index < len(questions) else "",
+                "options": options[index] if index < len(options) else [],
+            }))
+        except ValidationError:
+            slots.append(None)
+    return ProbingParseResult(slots)
+
+
+def repair_prompt(user_question: str, result: ProbingParseResult) -> str:
+    """Ask for just the missing slots, showing the good ones so they are not repeated"""
+    kept = [f"- {slot.question}" for slot in result.slots if slot is not None]
+    lines = [
+        f"User's challenge: {user_question}",
+        "",
+        f"Generate {len(result.missing)} more strategic probing question(s) with 4 multiple choice options each.",
+    ]
+    if kept:
+        lines.extend(["Do not repeat these questions:", *kept])
+    return "\n".join(lines)
@@ -0,0 +1,234 @@
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Pattern, Set, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 24 * 60 * 60
+
+# Endpoints that fan out to the LLM; everything else is a cheap read and is not limited
+LLM_ROUTES: List[Tuple[str, Pattern, str]] = [
+    ("POST", re.compile(r"^/api/sessions/batch$"), "batch"),
+    ("POST", re.compile(r"^/api/sessions$"), "create_session"),
+    ("POST", re.compile(r"^/api/sessions/[^/]+/probing-answers$"), "submit_answers"),
+    ("POST", re.compile(r"^/api/sessions/[^/]+/follow-ups/[^/]+$"), "follow_up"),
+]
+
+# Upfront token estimates (prompt + completion) charged against the daily quota before any LLM call
+PROBING_TOKENS = 1200
+ADVICE_TOKENS_PER_PERSONA = 1500
+FOLLOW_UP_TOKENS = 2500
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a client is over its request rate or daily token quota"""
+
+    def __init__(self, limit: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded ({limit}), retry after {retry_after:.0f}s")
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+class WindowCounter:
+    """In-process counters per key over fixed windows, with a sliding estimate across the window boundary"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> [window index, previous window total, current window total]
+        self._windows: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def add(self, key: str, window_seconds: int, amount: float, sliding: bool = True) -> float:
+        """Add `amount` to the key's current window; returns the usage including it"""
+        now = time.time()
+        index = int(now // window_seconds)
+        entry = self._windows.get(key)
+        if entry is None or entry[0] < index - 1:
+            entry = [index, 0.0, 0.0]
+        elif entry[0] == index - 1:
+            entry = [index, entry[2], 0.0]
+        entry[2] += amount
+        self._windows[key] = entry
+        self._windows.move_to_end(key)
+        while len(self._windows) > self.max_keys:
+            self._windows.popitem(last=False)
+        return _usage(entry[1], entry[2], now, window_seconds, sliding)
+
+
+class MongoWindowCounter:
+    """The same counters in a shared collection, so every replica enforces one limit per client"""
+
+    def __init__(self, collection: AsyncIOMotorCollection):
+        self.collection = collection
+        # A finished window never changes again, so each replica reads it at most once per key
+        self._previous: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def add(self, key: str, window_seconds: int, amount: float, sliding: bool = True) -> float:
+        now = time.time()
+        index = int(now // window_seconds)
+        doc = await self.collection.find_one_and_update(
+            {"_id": f"{key}|{index}"},
+            {
+                "$inc": {"count": amount},
+                "$setOnInsert": {"expires_at": datetime.utcfromtimestamp((index + 2) * window_seconds)},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        previous = await self._previous_total(key, index - 1) if sliding else 0.0
+        return _usage(previous, doc["count"], now, window_seconds, sliding)
+
+    async def _previous_total(self, key: str, index: int) -> float:
+        cached = self._previous.get(key)
+        if cached is not None and cached[0] == index:
+            return cached[1]
+        doc = await self.collection.find_one({"_id": f"{key}|{index}"}, {"count": 1})
+        total = doc["count"] if doc else 0.0
+        self._previous[key] = (index, total)
+        self._previous.move_to_end(key)
+        while len(self._previous) > 100_000:
+            self._previous.popitem(last=False)
+        return total
+
+
+def _usage(previous: float, current: float, now: float, window_seconds: int, sliding: bool) -> float:
+    if not sliding:
+        return current
+    # Weight the previous window by how much of it still overlaps the trailing window
+    return previous * (1 - (now % window_seconds) / window_seconds) + current
+
+
+class RateLimiter:
+    """Per-IP and per-API-key request rates and daily token quotas for the LLM endpoints.
+
+    Requests with a configured API key are limited per key; everyone else per client IP. Costs
+    are estimated from the endpoint before the handler runs, so an over-limit client never
+    reaches AIAdvisoryService. Rejected requests are not counted against the client. Batch
+    items are charged one at a time through charge_advice() as the batch reads them.
+
+    Behind `proxy_hops` trusted proxies, the client IP is the entry that many places from the
+    right of X-Forwarded-For; entries further left are whatever the client chose to send.
+    """
+
+    def __init__(self, counter, ip_per_minute: int = 20, key_per_minute: int = 120,
+                 ip_daily_tokens: int = 200_000, key_daily_tokens: int = 2_000_000,
+                 api_keys: Optional[Set[str]] = None, proxy_hops: int = 0, persona_count: int = 4):
+        self.counter = counter
+        self.limits = {
+            "ip": (ip_per_minute, ip_daily_tokens),
+            "api_key": (key_per_minute, key_daily_tokens),
+        }
+        # Only keys we issued get the higher limits; anything else could be rotated to dodge the IP limit
+        self.api_keys = {_digest(key) for key in (api_keys or set())}
+        self.proxy_hops = proxy_hops
+        self.persona_count = persona_count
+
+    def classify(self, method: str, path: str) -> Optional[str]:
+        for route_method, pattern, name in LLM_ROUTES:
+            if method == route_method and pattern.match(path):
+                return name
+        return None
+
+    def client(self, request: Request) -> Tuple[str, str]:
+        """(scope, identity) the request is limited under; API keys are stored only as digests"""
+        api_key = request.headers.get("x-api-key")
+        if api_key and _digest(api_key) in self.api_keys:
+            return "api_key", _digest(api_key)
+        if self.proxy_hops:
+            forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",")]
+            # Fewer entries than trusted proxies means the request bypassed them; use the peer address
+            if len(forwarded) >= self.proxy_hops and forwarded[-self.proxy_hops]:
+                return "ip", forwarded[-self.proxy_hops]
+        return "ip", request.client.host if request.client else "unknown"
+
+    def estimated_tokens(self, route: str) -> int:
+        if route == "create_session":
+            return PROBING_TOKENS
+        if route == "submit_answers":
+            return ADVICE_TOKENS_PER_PERSONA * self.persona_count
+        if route == "follow_up":
+            return FOLLOW_UP_TOKENS
+        # Batches are charged per item as they are read, see charge_advice()
+        return 0
+
+    async def check(self, route: str, request: Request) -> Tuple[str, str]:
+        """Count the request against its client's limits; raises RateLimitExceeded without counting it"""
+        scope, identity = self.client(request)
+        per_minute, daily_tokens = self.limits[scope]
+        rate_key = f"rate:{scope}:{identity}"
+        if per_minute and await self.counter.add(rate_key, 60, 1) > per_minute:
+            await self.counter.add(rate_key, 60, -1)
+            raise RateLimitExceeded("requests_per_minute", 60 - time.time() % 60)
+
+        try:
+            await self.charge(scope, identity, self.estimated_tokens(route))
+        except RateLimitExceeded:
+            await self.counter.add(rate_key, 60, -1)
+            raise
+        return scope, identity
+
+    async def charge(self, scope: str, identity: str, tokens: int):
+        """Add tokens to the client's daily quota; raises RateLimitExceeded without charging them"""
+        daily_tokens = self.limits[scope][1]
+        quota_key = f"tokens:{scope}:{identity}"
+        if daily_tokens and await self.counter.add(quota_key, DAY_SECONDS, tokens, sliding=False) > daily_tokens:
+            await self.counter.add(quota_key, DAY_SECONDS, -tokens, sliding=False)
+            raise RateLimitExceeded("daily_tokens", DAY_SECONDS - time.time() % DAY_SECONDS)
+
+    async def charge_advice(self, scope: str, identity: str, personas: Optional[List[str]] = None):
+        """Charge one advice generation (a batch item) for the given personas, or all of them"""
+        await self.charge(scope, identity, ADVICE_TOKENS_PER_PERSONA * (len(personas or []) or self.persona_count))
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:32]
+
+
+async def create_rate_limiter(collection: AsyncIOMotorCollection, persona_count: int) -> Optional[RateLimiter]:
+    """Rate limiter configured from the environment; None when RATE_LIMIT_ENABLED is false.
+
+    The limiter stays off until RATE_LIMIT_PROXY_HOPS or RATE_LIMIT_TRUST_PROXY says how many
+    proxies are in front of the API: guessing wrong either lets clients pick their own IP or
+    limits everyone behind the ingress as one client. RATE_LIMIT_STORE=mongo shares counters
+    between replicas through `collection`; the default keeps them in process.
+    """
+    if os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() != 'true':
+        return None
+    hops = os.environ.get('RATE_LIMIT_PROXY_HOPS')
+    trust_proxy = os.environ.get('RATE_LIMIT_TRUST_PROXY')
+    if hops is None and trust_proxy is None:
+        logger.warning(
+            "Rate limiting is off: set RATE_LIMIT_PROXY_HOPS (0 when clients connect directly) "
+            "or RATE_LIMIT_TRUST_PROXY to enable it"
+        )
+        return None
+    if hops is None:
+        # RATE_LIMIT_TRUST_PROXY alone means a single proxy in front of the API
+        hops = 1 if trust_proxy.lower() == 'true' else 0
+    if os.environ.get('RATE_LIMIT_STORE', 'memory').lower() == 'mongo':
+        counter = MongoWindowCounter(collection)
+        await counter.ensure_indexes()
+    else:
+        counter = WindowCounter()
+    api_keys = {key.strip() for key in os.environ.get('RATE_LIMIT_API_KEYS', '').split(",") if key.strip()}
+    return RateLimiter(
+        counter,
+        ip_per_minute=int(os.environ.get('RATE_LIMIT_IP_PER_MINUTE', 20)),
+        key_per_minute=int(os.environ.get('RATE_LIMIT_KEY_PER_MINUTE', 120)),
+        ip_daily_tokens=int(os.environ.get('RATE_LIMIT_IP_DAILY_TOKENS', 200_000)),
+        key_daily_tokens=int(os.environ.get('RATE_LIMIT_KEY_DAILY_TOKENS', 2_000_000)),
+        api_keys=api_keys,
+        proxy_hops=int(hops),
+        persona_count=persona_count
+    )
@@ -1,28 +1,49 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from dotenv import load_dotenv
+from prometheus_client import CONTENT_TYPE_LATEST
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from contextlib import asynccontextmanager
 import logging
+import math
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 import uuid
+import time
 from datetime import datetime
-from ai_service import AIAdvisoryService
-from advisory_routes import router as advisory_router, set_dependencies
+from app_container import create_app_container
+from pagination import InvalidCursorError, fetch_page
+from metrics import metrics, HTTP_REQUEST_SECONDS, RATE_LIMITED_REQUESTS
+from rate_limit import RateLimitExceeded
+from advisory_routes import ops_router, router as advisory_router
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the app container before serving and release it after the last request"""
+    container = app.state.container
+    try:
+        started = time.perf_counter()
+        await container.start()
+        logger.info(f"Innovation Board API started successfully in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        logger.error(f"Startup failed: {e}")
+        await container.aclose()
+        raise e
+    try:
+        yield
+    finally:
+        await container.aclose()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+# Benchmarks swap in a container built on their own database and stub LLM before startup
+app.state.container = create_app_container()
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -43,27 +64,109 @@ async def root():
     return {"message": "Innovation Board API - Neural Advisory System Online"}
 
 @api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
+async def create_status_check(input: StatusCheckCreate, request: Request):
+    status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    _ = await request.app.state.container.db.status_checks.insert_one(status_obj.model_dump())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(request: Request, limit: int = Query(100, ge=1, le=1000), cursor: Optional[str] = None):
+    """Status checks, newest first; the next page's cursor is in the X-Next-Cursor header"""
+    try:
+        status_checks, next_cursor = await fetch_page(
+            request.app.state.container.db.status_checks, {}, {"id": 1, "client_name": 1, "timestamp": 1}, "timestamp", limit, cursor
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ORJSONResponse(status_checks, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+# Probes, metrics and stats sit outside /api so they are never rate limited or exposed through the ingress prefix
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(await metrics.render(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/healthz")
+async def healthz(request: Request):
+    """Liveness: the process is up and its event loop is responsive; checks no dependencies.
+
+    `llm_reachable` is the last background probe of the LLM providers, for dashboards; it never
+    fails this probe or readiness.
+    """
+    return {"status": "ok", "llm_reachable": request.app.state.container.llm_reachable}
+
+@app.get("/readyz")
+async def readyz(request: Request):
+    """Readiness: startup finished and Mongo answers a ping"""
+    checks = await request.app.state.container.readiness()
+    return ORJSONResponse(checks, status_code=200 if checks["ready"] else 503)
 
 # Include the routers in the main app
 app.include_router(api_router)
 app.include_router(advisory_router)
-
+app.include_router(ops_router)
+
+class RequestGuardMiddleware:
+    """Rate limits the LLM endpoints and times every request, as one pure ASGI layer.
+
+    Over-limit clients are rejected before the handler (and any LLM call) runs. Latency is
+    recorded when the response starts, like the time to headers, so long streams do not skew it.
+    Unlike BaseHTTPMiddleware, the response body (SSE, NDJSON) passes straight through.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+
+        async def send_timed(message: Message):
+            if message["type"] == "http.response.start":
+                # Label by route template so per-session URLs collapse into one series
+                route = scope.get("route")
+                HTTP_REQUEST_SECONDS.labels(
+                    method=scope["method"], route=getattr(route, "path", "unmatched"), status=message["status"]
+                ).observe(time.perf_counter() - started)
+            await send(message)
+
+        rejection = await self.check_rate_limit(Request(scope))
+        if rejection:
+            await rejection(scope, receive, send_timed)
+            return
+        await self.app(scope, receive, send_timed)
+
+    async def check_rate_limit(self, request: Request) -> Optional[ORJSONResponse]:
+        """The 429 response for an over-limit client, or None to let the request through"""
+        limiter = request.app.state.container.rate_limiter
+        route = limiter.classify(request.method, request.url.path) if limiter else None
+        if not route:
+            return None
+        try:
+            # The batch endpoint charges its items against the same client as it reads them
+            request.state.rate_limit_client = await limiter.check(route, request)
+        except RateLimitExceeded as e:
+            scope, _ = limiter.client(request)
+            RATE_LIMITED_REQUESTS.labels(route=route, scope=scope, limit=e.limit).inc()
+            return ORJSONResponse(
+                {"detail": str(e)}, status_code=429, headers={"Retry-After": str(math.ceil(e.retry_after))}
+            )
+        except Exception as e:
+            # A shared-store outage must not take the API down with it
+            logger.warning(f"Rate limit check failed, allowing request: {e}")
+        return None
+
+app.add_middleware(RequestGuardMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
 
 # Configure logging
@@ -72,18 +175,3 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize AI service and set dependencies"""
-    try:
-        ai_service = AIAdvisoryService()
-        set_dependencies(db, ai_service)
-        logger.info("Innovation Board API started successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize AI service: {e}")
-        raise e
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def flight_key(*parts: str) -> str:
+    """Hash of the inputs that fully determine an LLM call's output"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution, optionally caching the result briefly.
+
+    The execution is cancelled once every caller waiting on it has been cancelled, so an LLM call
+    nobody is waiting for does not keep holding an admission slot.
+    """
+
+    def __init__(self, result_ttl_seconds: float = 0, max_results: int = 1024):
+        self.result_ttl_seconds = result_ttl_seconds
+        self.max_results = max_results
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self._results: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.counters: Dict[str, int] = {"executions": 0, "shared": 0, "cache_hits": 0, "abandoned": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return fn()'s result, sharing one execution among every concurrent caller with this key"""
+        cached = self._results.get(key)
+        if cached is not None:
+            expires_at, result = cached
+            if expires_at > time.monotonic():
+                self.counters["cache_hits"] += 1
+                return result
+            del self._results[key]
+
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            self.counters["shared"] += 1
+        else:
+            self.counters["executions"] += 1
+            # Owned by the flight, not the first caller, so one caller cancelling never fails the rest
+            flight = asyncio.ensure_future(fn())
+            self._in_flight[key] = flight
+            flight.add_done_callback(lambda done: self._land(key, done))
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(flight)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if not flight.done():
+                    # The last waiter is gone; a later caller starts a fresh execution
+                    self.counters["abandoned"] += 1
+                    self._in_flight.pop(key, None)
+                    flight.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "in_flight": len(self._in_flight), "cached_results": len(self._results)}
+
+    def _land(self, key: str, flight: asyncio.Future):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if flight.cancelled() or flight.exception() is not None or not self.result_ttl_seconds:
+            return
+        self._results[key] = (time.monotonic() + self.result_ttl_seconds, flight.result())
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+
+def create_single_flight() -> SingleFlight:
+    """Single-flight group configured from the environment"""
+    return SingleFlight(result_ttl_seconds=float(os.environ.get('ADVICE_RESULT_CACHE_SECONDS', 60)))
@@ -0,0 +1,355 @@
+"""Precomputed advice for the most frequently asked question + answer combinations.
+
+An off-peak pass mines recently completed sessions for popular combinations and pre-generates
+their advice into the `warm_advice` collection. Session creation and advice generation serve a
+hit immediately; a hit older than WARM_ADVICE_FRESH_SECONDS is still served, and one background
+refresh regenerates it (stale-while-revalidate). Run a pass by hand with:
+
+    python -m warm_advice
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import orjson
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from ai_service import AIAdvisoryService
+from db_indexes import session_ttl_seconds
+from metrics import WARM_ADVICE_LOOKUPS
+from models import SessionStatus
+from probing_cache import normalize_question, question_key
+
+logger = logging.getLogger(__name__)
+
+# Coordination document in the same collection, so only one process mines per interval
+MINING_LEASE_ID = "__mining_lease__"
+
+
+def warm_key(user_question: str, probing_answers: Dict[str, str], persona_ids: Optional[List[str]] = None) -> str:
+    """Stable key for a normalized question, its answers and the persona selection"""
+    answers = {index: answer.strip() for index, answer in probing_answers.items()}
+    digest = hashlib.sha256()
+    digest.update(normalize_question(user_question).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(orjson.dumps(answers, option=orjson.OPT_SORT_KEYS))
+    digest.update(b"\0")
+    digest.update(",".join(sorted(persona_ids or [])).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def in_off_peak(now: datetime, start_hour: int, end_hour: int) -> bool:
+    """Whether `now` (UTC) falls in [start_hour, end_hour), which may wrap past midnight"""
+    if start_hour <= end_hour:
+        return start_hour <= now.hour < end_hour
+    return now.hour >= start_hour or now.hour < end_hour
+
+
+class WarmAdviceStore:
+    """Warm probing questions and advice keyed by question, answers and personas, with stale-while-revalidate"""
+
+    def __init__(self, ai_service: AIAdvisoryService, collection: AsyncIOMotorCollection,
+                 sessions: AsyncIOMotorCollection, fresh_seconds: int = 86400, max_age_seconds: int = 7 * 86400,
+                 refresh_lease_seconds: int = 300):
+        self.ai_service = ai_service
+        self.collection = collection
+        self.sessions = sessions
+        self.fresh_seconds = fresh_seconds
+        # Entries that are neither re-mined nor refreshed for this long are dropped by a TTL index
+        self.max_age_seconds = max_age_seconds
+        self.refresh_lease_seconds = refresh_lease_seconds
+        self._refreshing: Set[asyncio.Task] = set()
+        self.counters: Dict[str, int] = {"precomputed": 0, "refreshed": 0, "refresh_failed": 0}
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("question_key", 1), ("count", DESCENDING)])
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def lookup_probing(self, user_question: str) -> Optional[Tuple[List[str], List[List[str]]]]:
+        """Probing questions of the most popular warm entry for this question.
+
+        These stay pinned to the set the entry was mined with, so the answers users pick match
+        the warm advice keys; only the advice is ever regenerated.
+        """
+        try:
+            doc = await self.collection.find_one(
+                {"question_key": question_key(user_question)},
+                {"_id": 0, "probing_questions": 1, "probing_options": 1},
+                sort=[("count", DESCENDING)]
+            )
+        except Exception as e:
+            logger.warning(f"Warm probing lookup failed, generating instead: {e}")
+            doc = None
+        WARM_ADVICE_LOOKUPS.labels(kind="probing", result="hit" if doc else "miss").inc()
+        if not doc:
+            return None
+        return doc["probing_questions"], doc["probing_options"]
+
+    async def lookup_advice(self, user_question: str, probing_answers: Dict[str, str],
+                            persona_ids: Optional[List[str]] = None) -> Optional[List[Dict[str, Any]]]:
+        """Stored advice for this exact combination, scheduling a background refresh when stale"""
+        key = warm_key(user_question, probing_answers, persona_ids)
+        try:
+            doc = await self.collection.find_one({"_id": key}, {"_id": 0, "advice": 1, "refreshed_at": 1})
+        except Exception as e:
+            logger.warning(f"Warm advice lookup failed, generating instead: {e}")
+            doc = None
+        # An entry generated for a different persona line-up (e.g. the registry changed) is no use
+        expected = set(self.ai_service.get_innovator_names(persona_ids))
+        if not doc or {advice["innovator"] for advice in doc["advice"]} != expected:
+            WARM_ADVICE_LOOKUPS.labels(kind="advice", result="miss").inc()
+            return None
+
+        stale = doc["refreshed_at"] < datetime.utcnow() - timedelta(seconds=self.fresh_seconds)
+        WARM_ADVICE_LOOKUPS.labels(kind="advice", result="stale" if stale else "hit").inc()
+        if stale:
+            task = asyncio.ensure_future(self.refresh(key))
+            self._refreshing.add(task)
+            task.add_done_callback(self._refreshing.discard)
+        return doc["advice"]
+
+    async def refresh(self, key: str) -> bool:
+        """Regenerate one entry's advice; the lease keeps concurrent stale hits to a single refresh"""
+        now = datetime.utcnow()
+        doc = await self.collection.find_one_and_update(
+            {"_id": key, "$or": [{"refreshing_until": None}, {"refreshing_until": {"$lt": now}}]},
+            {"$set": {"refreshing_until": now + timedelta(seconds=self.refresh_lease_seconds)}},
+            projection={"_id": 0, "user_question": 1, "probing_answers": 1, "personas": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not doc:
+            return False
+        try:
+            advice = await self._generate(key, doc["user_question"], doc["probing_answers"], doc["personas"])
+        except Exception as e:
+            logger.warning(f"Warm advice refresh for {key[:12]} failed: {e}")
+            advice = None
+        if advice is None:
+            self.counters["refresh_failed"] += 1
+            await self.collection.update_one({"_id": key}, {"$set": {"refreshing_until": None}})
+            return False
+        await self.collection.update_one({"_id": key}, {"$set": {
+            "advice": advice,
+            "refreshed_at": datetime.utcnow(),
+            "expires_at": datetime.utcnow() + timedelta(seconds=self.max_age_seconds),
+            "refreshing_until": None,
+        }})
+        self.counters["refreshed"] += 1
+        return True
+
+    async def mine(self, lookback_seconds: int, min_count: int, top_n: int) -> List[Dict[str, Any]]:
+        """Most frequent (question, answers, personas) combinations among recent completed sessions"""
+        since = datetime.utcnow() - timedelta(seconds=lookback_seconds)
+        pipeline = [
+            {"$match": {
+                "status": SessionStatus.COMPLETED.value,
+                "created_at": {"$gte": since},
+                "question_key": {"$type": "string"},
+                # Batch jobs are prepared offline and say nothing about interactive demand
+                "batch_id": None,
+            }},
+            {"$group": {
+                "_id": {"question_key": "$question_key", "probing_answers": "$probing_answers", "personas": "$personas"},
+                "count": {"$sum": 1},
+                "user_question": {"$last": "$user_question"},
+                "probing_questions": {"$last": "$probing_questions"},
+                "probing_options": {"$last": "$probing_options"},
+            }},
+            {"$match": {"count": {"$gte": min_count}}},
+            {"$sort": {"count": -1}},
+            {"$limit": top_n},
+        ]
+        return [
+            {**group["_id"], **{field: value for field, value in group.items() if field != "_id"}}
+            async for group in self.sessions.aggregate(pipeline)
+        ]
+
+    async def precompute(self, candidate: Dict[str, Any]) -> bool:
+        """Store (or re-rank) one mined combination, generating advice unless a fresh entry exists"""
+        key = warm_key(candidate["user_question"], candidate["probing_answers"], candidate["personas"])
+        now = datetime.utcnow()
+        ranking = {"count": candidate["count"], "expires_at": now + timedelta(seconds=self.max_age_seconds)}
+        fresh = await self.collection.update_one(
+            {"_id": key, "refreshed_at": {"$gte": now - timedelta(seconds=self.fresh_seconds)}}, {"$set": ranking}
+        )
+        if fresh.matched_count:
+            return False
+
+        advice = await self._generate(key, candidate["user_question"], candidate["probing_answers"], candidate["personas"])
+        if advice is None:
+            return False
+        await self.collection.replace_one({"_id": key}, {
+            "question_key": candidate["question_key"],
+            "normalized_question": normalize_question(candidate["user_question"]),
+            "user_question": candidate["user_question"],
+            "probing_questions": candidate["probing_questions"],
+            "probing_options": candidate["probing_options"],
+            "probing_answers": candidate["probing_answers"],
+            "personas": candidate["personas"],
+            "advice": advice,
+            "refreshed_at": now,
+            "refreshing_until": None,
+            **ranking,
+        }, upsert=True)
+        self.counters["precomputed"] += 1
+        return True
+
+    async def run_once(self, lookback_seconds: int, min_count: int, top_n: int, concurrency: int = 2) -> int:
+        """Mine and precompute popular combinations; returns how many entries were (re)generated"""
+        candidates = await self.mine(lookback_seconds, min_count, top_n)
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one(candidate: Dict[str, Any]) -> bool:
+            async with slots:
+                try:
+                    return await self.precompute(candidate)
+                except Exception as e:
+                    logger.warning(f"Warm advice precompute failed for {candidate['question_key'][:12]}: {e}")
+                    return False
+
+        generated = sum(await asyncio.gather(*(one(candidate) for candidate in candidates)))
+        logger.info(f"Warm advice pass: {len(candidates)} popular combinations, {generated} generated")
+        return generated
+
+    async def claim_run(self, owner: str, lease_seconds: int) -> bool:
+        """Take the mining lease so a single process runs each off-peak pass"""
+        now = datetime.utcnow()
+        try:
+            await self.collection.find_one_and_update(
+                {"_id": MINING_LEASE_ID, "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]},
+                {"$set": {"lease_until": now + timedelta(seconds=lease_seconds), "owner": owner}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The lease document exists and has not expired: another process is mining
+            return False
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "refreshing": len(self._refreshing)}
+
+    async def aclose(self):
+        for task in list(self._refreshing):
+            task.cancel()
+        await asyncio.gather(*self._refreshing, return_exceptions=True)
+
+    async def _generate(self, key: str, user_question: str, probing_answers: Dict[str, str],
+                        persona_ids: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Advice from every selected persona, or None if any of them fell back to canned advice"""
+        advice = []
+        async for entry, succeeded in self.ai_service.iter_innovator_advice(
+            user_question, probing_answers, f"warm_{key[:16]}", persona_ids=persona_ids or None
+        ):
+            if not succeeded:
+                return None
+            advice.append(entry)
+        return advice
+
+
+class WarmAdviceScheduler:
+    """Runs a warm advice pass at most once per interval, and only inside the off-peak hours"""
+
+    def __init__(self, store: WarmAdviceStore, start_hour: int = 2, end_hour: int = 6, interval_seconds: int = 3600,
+                 lookback_seconds: int = 86400, min_count: int = 3, top_n: int = 50, concurrency: int = 2):
+        self.store = store
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.interval_seconds = interval_seconds
+        self.lookback_seconds = lookback_seconds
+        self.min_count = min_count
+        self.top_n = top_n
+        self.concurrency = concurrency
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stopping = asyncio.Event()
+
+    async def run(self):
+        while not self._stopping.is_set():
+            if in_off_peak(datetime.utcnow(), self.start_hour, self.end_hour):
+                try:
+                    if await self.store.claim_run(self.owner, self.interval_seconds):
+                        await self.store.run_once(self.lookback_seconds, self.min_count, self.top_n, self.concurrency)
+                except Exception as e:
+                    logger.error(f"Warm advice pass failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self):
+        self._stopping.set()
+
+
+def create_warm_advice_store(ai_service: AIAdvisoryService, db: AsyncIOMotorDatabase) -> Optional[WarmAdviceStore]:
+    """Warm advice store configured from the environment, or None unless WARM_ADVICE_ENABLED is set"""
+    if os.environ.get('WARM_ADVICE_ENABLED', 'false').lower() != 'true':
+        return None
+    return WarmAdviceStore(
+        ai_service,
+        db.warm_advice,
+        db.advisory_sessions,
+        fresh_seconds=int(os.environ.get('WARM_ADVICE_FRESH_SECONDS', 86400)),
+        max_age_seconds=int(os.environ.get('WARM_ADVICE_MAX_AGE_SECONDS', 7 * 86400))
+    )
+
+
+def create_warm_advice_scheduler(store: WarmAdviceStore) -> WarmAdviceScheduler:
+    """Off-peak scheduler; WARM_ADVICE_HOURS is a UTC hour range such as 2-6"""
+    start_hour, _, end_hour = os.environ.get('WARM_ADVICE_HOURS', '2-6').partition("-")
+    # Mining reads advisory_sessions, which only keeps SESSION_TTL_SECONDS of history
+    session_ttl = session_ttl_seconds()
+    lookback_seconds = int(os.environ.get('WARM_ADVICE_LOOKBACK_SECONDS', session_ttl))
+    if lookback_seconds > session_ttl:
+        logger.warning(f"WARM_ADVICE_LOOKBACK_SECONDS={lookback_seconds} exceeds SESSION_TTL_SECONDS={session_ttl}; "
+                       f"only the last {session_ttl}s of sessions can be mined")
+    return WarmAdviceScheduler(
+        store,
+        start_hour=int(start_hour),
+        end_hour=int(end_hour),
+        interval_seconds=int(os.environ.get('WARM_ADVICE_INTERVAL_SECONDS', 3600)),
+        lookback_seconds=lookback_seconds,
+        min_count=int(os.environ.get('WARM_ADVICE_MIN_COUNT', 3)),
+        top_n=int(os.environ.get('WARM_ADVICE_TOP_N', 50)),
+        concurrency=int(os.environ.get('WARM_ADVICE_CONCURRENCY', 2))
+    )
+
+
+async def main():
+    """Run one warm advice pass now, regardless of the off-peak window"""
+    from llm_limiter import create_admission_controller
+    from single_flight import create_single_flight
+    from llm_resilience import create_hedge_policy
+    from model_router import create_model_router
+
+    load_dotenv(Path(__file__).parent / '.env')
+    os.environ['WARM_ADVICE_ENABLED'] = 'true'
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    ai_service = AIAdvisoryService(
+        create_admission_controller(), single_flight=create_single_flight(),
+        router=create_model_router(), hedging=create_hedge_policy()
+    )
+    store = create_warm_advice_store(ai_service, db)
+    scheduler = create_warm_advice_scheduler(store)
+    try:
+        await store.ensure_indexes()
+        await store.run_once(scheduler.lookback_seconds, scheduler.min_count, scheduler.top_n, scheduler.concurrency)
+    finally:
+        await ai_service.aclose()
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(main())
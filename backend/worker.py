@@ -0,0 +1,202 @@
+"""Advice generation worker.
+
+Runs inside the API process by default; start standalone workers with:
+
+    python -m worker
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, Set
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from job_queue import AdviceJobQueue
+from models import AdviceJob, JobStatus, SessionStatus
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AdviceJob], Awaitable[None]]
+FailureHandler = Callable[[str], Awaitable[None]]
+
+
+class AdviceWorker:
+    """Claims advice jobs from the queue and runs up to `concurrency` of them at a time"""
+
+    def __init__(self, queue: AdviceJobQueue, handler: JobHandler, on_exhausted: FailureHandler,
+                 concurrency: int = 4, poll_interval: float = 1.0, worker_id: Optional[str] = None):
+        self.queue = queue
+        self.handler = handler
+        self.on_exhausted = on_exhausted
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._slots = asyncio.Semaphore(concurrency)
+        self._running: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    @property
+    def active_jobs(self) -> int:
+        return len(self._running)
+
+    async def run(self):
+        """Claim and dispatch jobs until stop() is called"""
+        logger.info(f"Advice worker {self.worker_id} started with concurrency {self.concurrency}")
+        while await self._acquire_slot():
+            try:
+                job = await self.queue.claim(self.worker_id)
+            except Exception as e:
+                logger.error(f"Failed to claim advice job: {e}")
+                job = None
+            if job is None:
+                self._slots.release()
+                await self._wait_for_work()
+                await self._reap_expired()
+                continue
+            task = asyncio.create_task(self._process(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _acquire_slot(self) -> bool:
+        """Wait for a free slot; False (holding no slot) once stop() has been called"""
+        if self._slots.locked() and not self._stopping.is_set():
+            # Every slot is busy: wake up on stop() rather than when the next running job ends
+            acquire = asyncio.ensure_future(self._slots.acquire())
+            stopping = asyncio.ensure_future(self._stopping.wait())
+            await asyncio.wait({acquire, stopping}, return_when=asyncio.FIRST_COMPLETED)
+            stopping.cancel()
+            if not acquire.done():
+                acquire.cancel()
+                await asyncio.gather(acquire, return_exceptions=True)
+            if acquire.cancelled():
+                return False
+        elif not self._stopping.is_set():
+            await self._slots.acquire()
+        else:
+            return False
+        if self._stopping.is_set():
+            self._slots.release()
+            return False
+        return True
+
+    def stop(self):
+        self._stopping.set()
+        self.queue.job_available.set()
+
+    async def drain(self, timeout: float = 30):
+        """Wait for in-flight jobs; unfinished ones are picked up again once their lease expires"""
+        if self._running:
+            await asyncio.wait(self._running, timeout=timeout)
+
+    async def _wait_for_work(self):
+        self.queue.job_available.clear()
+        try:
+            await asyncio.wait_for(self.queue.job_available.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _reap_expired(self):
+        try:
+            for session_id in await self.queue.reap_expired():
+                logger.error(f"Advice job for session {session_id} exhausted its attempts")
+                await self.on_exhausted(session_id)
+        except Exception as e:
+            logger.error(f"Failed to reap expired advice jobs: {e}")
+
+    async def _process(self, job: AdviceJob):
+        heartbeat = asyncio.create_task(self._keep_lease(job))
+        try:
+            await self.handler(job)
+            await self.queue.complete(job)
+        except Exception as e:
+            logger.error(f"Advice job for session {job.session_id} failed (attempt {job.attempts}/{job.max_attempts}): {e}")
+            if not await self.queue.fail(job, str(e)):
+                await self.on_exhausted(job.session_id)
+        finally:
+            heartbeat.cancel()
+            self._slots.release()
+
+    async def _keep_lease(self, job: AdviceJob):
+        interval = max(self.queue.lease_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            if not await self.queue.renew_lease(job):
+                logger.warning(f"Lost lease on advice job for session {job.session_id}")
+                return
+
+
+async def recover_orphaned_sessions(db: AsyncIOMotorDatabase, queue: AdviceJobQueue) -> int:
+    """Re-queue sessions left in processing without a live job (e.g. after a crash or deploy)"""
+    recovered = 0
+    processing = db.advisory_sessions.find(
+        {"status": SessionStatus.PROCESSING.value},
+        {"_id": 0, "session_id": 1, "user_question": 1, "probing_answers": 1, "personas": 1}
+    )
+    async for session in processing:
+        job = await queue.get_job(session["session_id"])
+        if job and job["status"] in (JobStatus.QUEUED.value, JobStatus.LEASED.value):
+            continue
+        await queue.enqueue(
+            session["session_id"], session["user_question"], session.get("probing_answers", {}),
+            personas=session.get("personas"), reset=job is not None
+        )
+        recovered += 1
+    if recovered:
+        logger.info(f"Re-queued {recovered} orphaned processing sessions")
+    return recovered
+
+
+def create_job_queue(db: AsyncIOMotorDatabase) -> AdviceJobQueue:
+    """Job queue configured from the environment"""
+    return AdviceJobQueue(
+        db.advice_jobs,
+        lease_seconds=int(os.environ.get('ADVICE_JOB_LEASE_SECONDS', 90)),
+        max_attempts=int(os.environ.get('ADVICE_JOB_MAX_ATTEMPTS', 3)),
+        backoff_base_seconds=float(os.environ.get('ADVICE_JOB_BACKOFF_SECONDS', 5))
+    )
+
+
+def worker_concurrency() -> int:
+    return int(os.environ.get('ADVICE_WORKER_CONCURRENCY', 4))
+
+
+async def main():
+    from prometheus_client import start_http_server
+
+    from app_container import create_app_container
+    from advisory_routes import advice_job_handlers
+    from metrics import scrape_registry
+
+    load_dotenv(Path(__file__).parent / '.env')
+    # The same services as the API process, without its rate limiter, scheduler or embedded worker
+    container = create_app_container()
+    await container.start_services()
+    # This process's LLM and Mongo metrics are not in any API replica's /metrics; serve them for their own scrape target
+    metrics_port = int(os.environ.get('WORKER_METRICS_PORT', 0))
+    if metrics_port:
+        start_http_server(metrics_port, registry=scrape_registry())
+        logger.info(f"Serving worker metrics on :{metrics_port}/metrics")
+
+    worker = AdviceWorker(container.job_queue, *advice_job_handlers(container), concurrency=worker_concurrency())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+        await worker.drain()
+    finally:
+        await container.aclose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(main())
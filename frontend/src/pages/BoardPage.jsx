@@ -127,9 +127,17 @@ const BoardPage = () => {
           description: "AI is generating personalized advice from legendary minds."
         });
         
-        // Start polling for advice
-        console.log('🔄 Starting advice polling...');
-        const adviceResponse = await api.pollForAdvice(sessionId);
+        // Stream advice as each innovator finishes (falls back to polling)
+        console.log('🔄 Starting advice stream...');
+        const adviceResponse = await api.streamAdvice(sessionId, {
+          onAdvice: (item) => {
+            setAdvice((current) => [
+              ...current.filter((existing) => existing.innovator !== item.innovator),
+              item
+            ]);
+            setStep('advice');
+          }
+        });
         
         setAdvice(adviceResponse.advice);
         setStep('advice');
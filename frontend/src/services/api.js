@@ -109,8 +109,8 @@ class InnovationBoardAPI {
         if (result.status === 'completed') {
           console.log('✅ Advice generation completed!');
           return result;
-        } else if (result.status === 'processing') {
-          console.log('⏳ Still processing, waiting...');
+        } else if (result.status === 'processing' || result.status === 'partial') {
+          console.log(`⏳ Still processing (${result.advice?.length || 0} advisors ready), waiting...`);
           await new Promise(resolve => setTimeout(resolve, interval));
           continue;
         } else {
@@ -128,6 +128,47 @@ class InnovationBoardAPI {
     throw new Error('Maximum polling attempts reached. Please try again.');
   }
 
+  /**
+   * Stream advice over Server-Sent Events, falling back to polling when streaming is unavailable
+   * @param {string} sessionId - The session ID
+   * @param {Object} handlers - Optional callbacks: onAdvice(advice)
+   * @returns {Promise<Object>} - Advice response once generation has completed
+   */
+  async streamAdvice(sessionId, { onAdvice } = {}) {
+    if (typeof window === 'undefined' || !window.EventSource) {
+      return this.pollForAdvice(sessionId);
+    }
+
+    const streamed = await new Promise((resolve) => {
+      const source = new EventSource(`${API}/sessions/${sessionId}/advice/stream`);
+      let settled = false;
+      const finish = (result) => {
+        if (settled) return;
+        settled = true;
+        source.close();
+        resolve(result);
+      };
+
+      source.addEventListener('advice', (event) => {
+        onAdvice?.(JSON.parse(event.data));
+      });
+      source.addEventListener('completed', () => finish('completed'));
+      source.addEventListener('failed', () => finish('failed'));
+      // The server closes long streams while generation may still be running
+      source.addEventListener('timeout', () => finish('timeout'));
+      source.onerror = () => {
+        console.log('⚠️ Advice stream interrupted, falling back to polling');
+        finish('interrupted');
+      };
+    });
+
+    if (streamed === 'failed') {
+      throw new Error('Advice generation failed. Please try again.');
+    }
+    // Completed streams still fetch the canonical payload; interrupted and timed-out ones resume by polling
+    return this.pollForAdvice(sessionId);
+  }
+
   /**
    * Test backend connectivity
    * @returns {Promise<Object>} - Status response
@@ -0,0 +1,15 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend is run from its own directory (`cd backend && uvicorn server:app`), so import it the same way
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+# AIAdvisoryService refuses to start without a key; the tests never send it anywhere
+os.environ.setdefault("EMERGENT_LLM_KEY", "test")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
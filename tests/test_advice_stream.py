@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from advice_stream import AdviceEventBroker, MongoEventRelay, create_event_relay, format_sse
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_subscribers_get_only_their_sessions_events():
+    broker = AdviceEventBroker()
+    async with broker.subscribe("s1") as first, broker.subscribe("s2") as second:
+        broker.publish("s1", "advice", {"innovator": "Steve Jobs"})
+        assert first.get_nowait() == {"event": "advice", "data": {"innovator": "Steve Jobs"}}
+        assert second.empty()
+        assert broker.subscribed_sessions() == ["s1", "s2"]
+    assert broker.subscribed_sessions() == []
+    # Nobody listening: publishing is a no-op
+    broker.publish("s1", "completed")
+
+
+async def test_a_full_subscriber_queue_drops_events_instead_of_blocking():
+    broker = AdviceEventBroker(max_queue_size=1)
+    async with broker.subscribe("s1") as queue:
+        broker.publish("s1", "status", {"status": "processing"})
+        broker.publish("s1", "completed")
+        assert queue.qsize() == 1
+        assert queue.get_nowait()["event"] == "status"
+
+
+def test_sse_frames():
+    assert format_sse("completed", {"session_id": "s1"}) == 'event: completed\ndata: {"session_id":"s1"}\n\n'
+
+
+async def test_relay_is_off_unless_enabled(monkeypatch):
+    monkeypatch.delenv("ADVICE_EVENTS_SHARED", raising=False)
+    assert create_event_relay(AdviceEventBroker(), None) is None
+    monkeypatch.setenv("ADVICE_EVENTS_SHARED", "true")
+    assert isinstance(create_event_relay(AdviceEventBroker(), None), MongoEventRelay)
+
+
+async def test_relay_delivers_events_published_by_another_process():
+    collection = AsyncMongoMockClient()["test_advice_stream"].advice_events
+    api, worker = AdviceEventBroker(), AdviceEventBroker()
+    relays = [MongoEventRelay(broker, collection, poll_interval=0.01) for broker in (api, worker)]
+    for relay in relays:
+        await relay.ensure_indexes()
+        relay.start()
+    try:
+        async with api.subscribe("s1") as queue:
+            worker.publish("s1", "advice", {"innovator": "Elon Musk"})
+            worker.publish("s1", "completed", {"session_id": "s1"})
+            # The stream's own process publishes too; it must not be delivered twice
+            api.publish("s1", "status", {"status": "processing"})
+            received = [await asyncio.wait_for(queue.get(), 2) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            assert queue.empty()
+    finally:
+        for relay in relays:
+            await relay.aclose()
+    assert received[0]["event"] == "status"
+    assert [message["event"] for message in received[1:]] == ["advice", "completed"]
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app_container import AppContainer
+from benchmarks.stub_services import StubAdvisoryService, StubClientPool
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def container(monkeypatch):
+    monkeypatch.setenv("WARM_ADVICE_ENABLED", "false")
+    return AppContainer(
+        database=AsyncMongoMockClient()["test_app_container"],
+        ai_service_factory=lambda limiter=None, **kwargs: StubAdvisoryService(limiter=limiter, **kwargs),
+        llm_check_seconds=60
+    )
+
+
+async def _probed(container: AppContainer):
+    while container.llm_reachable is None:
+        await asyncio.sleep(0.001)
+
+
+async def test_readiness_does_not_depend_on_the_llm_providers(container, monkeypatch):
+    async def unreachable(self, providers, timeout=3):
+        return {provider: False for provider in providers}
+
+    monkeypatch.setattr(StubClientPool, "warm", unreachable)
+    assert await container.readiness() == {"started": False, "ready": False}
+    await container.start()
+    try:
+        await asyncio.wait_for(_probed(container), 5)
+        assert await container.readiness() == {"started": True, "mongo": True, "ready": True}
+        assert container.llm_reachable is False
+        families = {family.name: family for family in await container.collect_metrics()}
+        assert [sample.value for sample in families["llm_reachable"].samples] == [0.0]
+    finally:
+        await container.aclose()
+    assert await container.readiness() == {"started": False, "ready": False}
+
+
+async def test_mongo_failure_fails_readiness(container):
+    await container.start()
+    try:
+        async def unreachable(*args, **kwargs):
+            raise ConnectionError("mongo down")
+
+        container.db.command = unreachable
+        assert await container.readiness() == {"started": True, "mongo": False, "ready": False}
+    finally:
+        await container.aclose()
+
+
+async def test_llm_check_off_loads_the_client_without_probing(container, monkeypatch):
+    loaded = []
+
+    async def probed(self, providers, timeout=3):
+        raise AssertionError("providers probed with the LLM check off")
+
+    monkeypatch.setattr(StubClientPool, "warm", probed)
+    monkeypatch.setattr(StubClientPool, "load", lambda self: loaded.append(True))
+    container.check_llm = False
+    await container.start()
+    try:
+        await container._tasks["llm_warmup"]
+        assert loaded == [True]
+        assert container.llm_reachable is None
+        assert "llm_reachable" not in {family.name for family in await container.collect_metrics()}
+    finally:
+        await container.aclose()
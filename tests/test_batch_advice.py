@@ -0,0 +1,84 @@
+import httpx
+import orjson
+import pytest
+from fastapi import FastAPI
+from mongomock_motor import AsyncMongoMockClient
+
+import advisory_routes
+from app_container import AppContainer
+from batch_advice import read_ndjson_items
+from benchmarks.stub_services import StubAdvisoryService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def container(monkeypatch):
+    monkeypatch.setenv("WARM_ADVICE_ENABLED", "false")
+    container = AppContainer(
+        database=AsyncMongoMockClient()["test_batch_advice"],
+        ai_service_factory=lambda limiter=None, **kwargs: StubAdvisoryService(limiter=limiter, **kwargs)
+    )
+    await container.start_services()
+    yield container
+    await container.aclose()
+
+
+@pytest.fixture
+async def client(container):
+    app = FastAPI()
+    app.state.container = container
+    app.include_router(advisory_routes.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def _post_batch(client, body: bytes, **params):
+    response = await client.post("/api/sessions/batch", content=body, params=params)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [orjson.loads(line) for line in response.content.splitlines()]
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def test_items_are_parsed_across_chunk_boundaries():
+    items = [item async for item in read_ndjson_items(_chunks(b'{"user_question": "Q1"}\n\n{"user_q', b'uestion": "Q2"}'))]
+    assert [(index, item.user_question) for index, item in items] == [(0, "Q1"), (1, "Q2")]
+    limited = [item async for item in read_ndjson_items(_chunks(b'{"user_question": "Q1"}\n{"user_question": "Q2"}\n'), 1)]
+    assert limited[1] == (1, "Batch is limited to 1 items")
+
+
+async def test_every_item_gets_a_result_or_error_line_then_a_summary(container, client):
+    body = b"\n".join([
+        orjson.dumps({"user_question": "Raise prices?", "personas": ["jobs"], "ref": "a"}),
+        b"{not json",
+        orjson.dumps({"probing_answers": {}}),
+        orjson.dumps({"user_question": "Hire?", "personas": ["bob"], "ref": "d"}),
+    ])
+    lines = await _post_batch(client, body, concurrency=2)
+    assert lines[0]["type"] == "started"
+    assert lines[0]["concurrency"] == 2
+    summary = lines[-1]
+    assert summary["type"] == "summary"
+    assert (summary["submitted"], summary["completed"], summary["failed"]) == (4, 1, 3)
+
+    by_index = {line["index"]: line for line in lines[1:-1]}
+    assert by_index[0]["type"] == "result"
+    assert (by_index[0]["ref"], by_index[0]["innovator_status"]) == ("a", {"Steve Jobs": "completed"})
+    assert by_index[1]["type"] == "error"
+    assert by_index[1]["detail"].startswith("Invalid JSON")
+    assert by_index[2]["detail"] == "user_question: Field required"
+    assert (by_index[3]["ref"], by_index[3]["detail"]) == ("d", "Unknown personas: bob")
+
+    stored = await container.db.advisory_sessions.find_one({"session_id": by_index[0]["session_id"]})
+    assert (stored["status"], stored["batch_id"]) == ("completed", summary["batch_id"])
+    assert await container.db.advisory_sessions.count_documents({}) == 1
+
+
+async def test_an_oversized_body_is_rejected(client, monkeypatch):
+    monkeypatch.setenv("BATCH_MAX_BYTES", "10")
+    response = await client.post("/api/sessions/batch", content=orjson.dumps({"user_question": "Raise prices?"}))
+    assert response.status_code == 413
@@ -0,0 +1,55 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import OperationFailure
+
+from db_indexes import ensure_indexes, ensure_ttl_index
+
+pytestmark = pytest.mark.anyio
+
+
+class ConflictingCollection:
+    """A collection whose TTL index already exists with another expiry, as the server reports it"""
+
+    def __init__(self, code=85):
+        self.name = "advisory_sessions"
+        self.database = self
+        self.code = code
+        self.commands = []
+
+    async def create_index(self, field, **kwargs):
+        raise OperationFailure("Index already exists with different options", code=self.code)
+
+    async def command(self, command):
+        self.commands.append(command)
+
+
+async def test_session_indexes_and_ttls_follow_the_environment(monkeypatch):
+    monkeypatch.setenv("SESSION_TTL_SECONDS", "3600")
+    db = AsyncMongoMockClient()["test_db_indexes"]
+    await ensure_indexes(db)
+    # Idempotent: a second startup finds everything in place
+    await ensure_indexes(db)
+
+    sessions = await db.advisory_sessions.index_information()
+    assert sessions["session_id_1"]["unique"]
+    assert sessions["created_at_1"]["expireAfterSeconds"] == 3600
+    assert sessions["status_1_created_at_-1__id_-1"]["key"] == [("status", 1), ("created_at", -1), ("_id", -1)]
+    for collection in (db.advice_jobs, db.follow_up_threads):
+        assert (await collection.index_information())["created_at_1"]["expireAfterSeconds"] == 3600
+    assert (await db.follow_up_threads.index_information())["session_id_1_persona_id_1"]["unique"]
+
+
+async def test_a_changed_ttl_is_applied_in_place():
+    collection = ConflictingCollection()
+    await ensure_ttl_index(collection, "created_at", 7200)
+    assert collection.commands == [{
+        "collMod": "advisory_sessions",
+        "index": {"keyPattern": {"created_at": 1}, "expireAfterSeconds": 7200}
+    }]
+
+
+async def test_other_index_failures_are_raised():
+    collection = ConflictingCollection(code=13)
+    with pytest.raises(OperationFailure):
+        await ensure_ttl_index(collection, "created_at", 7200)
+    assert collection.commands == []
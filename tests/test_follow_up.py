@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from ai_service import AIAdvisoryService
+from follow_up import WINDOW_MAX_TURNS, FollowUpLimitError, FollowUpService, select_window
+from persona_registry import Persona
+
+PERSONA = Persona(id="jobs", name="Steve Jobs", title="Apple Co-founder", confidence="96%", system_prompt="Be Steve.")
+SESSION = {"session_id": "s1", "user_question": "How do I grow?", "probing_answers": {"0": "Early stage"}}
+
+
+def _turns(*tokens):
+    return [{"question": f"q{i}", "answer": f"a{i}", "tokens": t} for i, t in enumerate(tokens)]
+
+
+def test_window_takes_newest_turns_within_budget():
+    turns = _turns(50, 50, 50, 50)
+    assert [t["question"] for t in select_window(turns, 0, 0, 120)] == ["q2", "q3"]
+
+
+def test_window_skips_summarized_turns():
+    turns = _turns(10, 10, 10, 10)
+    assert [t["question"] for t in select_window(turns, 0, 3, 1000)] == ["q3"]
+    # `turns` is a tail starting at absolute turn 5, so turns 5 and 6 are already in the summary
+    assert [t["question"] for t in select_window(turns, 5, 7, 1000)] == ["q2", "q3"]
+
+
+def test_window_keeps_the_newest_turn_even_over_budget():
+    assert [t["question"] for t in select_window(_turns(10, 500), 0, 0, 100)] == ["q1"]
+
+
+def test_fold_end_leaves_small_conversations_alone():
+    service = FollowUpService(None, None, context_tokens=100)
+    assert service._fold_end([20, 20, 20], 0) == 0
+    assert service._fold_end([20] * 10, 7) == 7
+
+
+def test_fold_end_folds_until_half_the_budget_remains():
+    service = FollowUpService(None, None, context_tokens=100)
+    tokens = [30, 30, 30, 30]
+    end = service._fold_end(tokens, 0)
+    assert end == 3
+    assert sum(tokens[end:]) <= 50
+    # The newest turn is always kept verbatim
+    assert service._fold_end([500, 500], 0) == 1
+
+
+def test_fold_end_bounds_the_number_of_unsummarized_turns():
+    service = FollowUpService(None, None, context_tokens=10_000)
+    tokens = [1] * WINDOW_MAX_TURNS
+    end = service._fold_end(tokens, 0)
+    assert len(tokens) - end == WINDOW_MAX_TURNS // 2
+
+
+class SlowFollowUps:
+    """Answers follow-ups after `release` is set; fails those whose question says so"""
+
+    build_context = AIAdvisoryService.build_context
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.calls = 0
+
+    async def generate_follow_up(self, persona, session_id, prompt):
+        self.calls += 1
+        await self.release.wait()
+        if "fail" in prompt.rsplit("follow-up question:", 1)[1]:
+            raise RuntimeError("provider down")
+        return "Ship it."
+
+
+@pytest.fixture
+async def threads():
+    collection = AsyncMongoMockClient()["test_follow_up"].follow_up_threads
+    await collection.create_index([("session_id", 1), ("persona_id", 1)], unique=True)
+    return collection
+
+
+@pytest.mark.anyio
+async def test_concurrent_questions_cannot_overrun_the_turn_limit(threads):
+    ai_service = SlowFollowUps()
+    service = FollowUpService(ai_service, threads, max_turns=2)
+    asks = [asyncio.ensure_future(service.ask(SESSION, PERSONA, "Focus.", f"q{i}")) for i in range(5)]
+    while ai_service.calls < 2 or sum(ask.done() for ask in asks) < 3:
+        await asyncio.sleep(0.001)
+    # The model is never called for the questions over the limit
+    assert ai_service.calls == 2
+    ai_service.release.set()
+    results = await asyncio.gather(*asks, return_exceptions=True)
+    assert sorted(index for index, _, _ in (r for r in results if isinstance(r, tuple))) == [0, 1]
+    assert sum(isinstance(r, FollowUpLimitError) for r in results) == 3
+    thread = await threads.find_one({"session_id": "s1"})
+    assert (thread["turn_count"], thread["answered_turns"], len(thread["turns"])) == (2, 2, 2)
+
+
+@pytest.mark.anyio
+async def test_failed_answers_give_their_turn_back(threads):
+    ai_service = SlowFollowUps()
+    ai_service.release.set()
+    service = FollowUpService(ai_service, threads, max_turns=1)
+    with pytest.raises(RuntimeError):
+        await service.ask(SESSION, PERSONA, "Focus.", "please fail")
+    index, turn, _ = await service.ask(SESSION, PERSONA, "Focus.", "q")
+    assert (index, turn.answer) == (0, "Ship it.")
+    with pytest.raises(FollowUpLimitError):
+        await service.ask(SESSION, PERSONA, "Focus.", "q")
+    assert [t["question"] for t in await service.history("s1", "jobs")] == ["q"]
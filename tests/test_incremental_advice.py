@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from mongomock_motor import AsyncMongoMockClient
+
+import advisory_routes
+from app_container import AppContainer
+from benchmarks.stub_services import StubAdvisoryService
+from models import AdvisorySession, SessionStatus
+
+pytestmark = pytest.mark.anyio
+
+
+class GatedAdvisoryService(StubAdvisoryService):
+    """Holds chosen personas' advice until released and fails others outright"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.gates = {}
+        self.failing = set()
+
+    async def _generate_single_advice(self, persona, context, session_id):
+        if persona.id in self.gates:
+            await self.gates[persona.id].wait()
+        if persona.id in self.failing:
+            raise RuntimeError("Stub LLM failure")
+        return await super()._generate_single_advice(persona, context, session_id)
+
+
+@pytest.fixture
+async def container(monkeypatch):
+    monkeypatch.setenv("WARM_ADVICE_ENABLED", "false")
+    container = AppContainer(
+        database=AsyncMongoMockClient()["test_incremental_advice"],
+        ai_service_factory=lambda limiter=None, **kwargs: GatedAdvisoryService(limiter=limiter, **kwargs)
+    )
+    await container.start_services()
+    yield container
+    await container.aclose()
+
+
+@pytest.fixture
+async def client(container):
+    app = FastAPI()
+    app.state.container = container
+    app.include_router(advisory_routes.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def _processing_session(container, session_id):
+    session = AdvisorySession(session_id=session_id, user_question="How do I grow my SaaS?",
+                              status=SessionStatus.PROCESSING)
+    await container.db.advisory_sessions.insert_one(session.model_dump(by_alias=True, exclude={"id"}))
+
+
+async def _advice_count(container, session_id, count):
+    while True:
+        session = await container.db.advisory_sessions.find_one({"session_id": session_id})
+        if len(session["advice"]) >= count:
+            return
+        await asyncio.sleep(0.001)
+
+
+async def test_finished_innovators_are_readable_before_the_slowest_one(container, client):
+    slow = container.ai_service.gates["musk"] = asyncio.Event()
+    await _processing_session(container, "s1")
+    generation = asyncio.ensure_future(advisory_routes.generate_advice(container, "s1", "How do I grow my SaaS?", {}))
+    try:
+        await asyncio.wait_for(_advice_count(container, "s1", 2), 5)
+        response = await client.get("/api/sessions/s1/advice")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == SessionStatus.PARTIAL.value
+        assert {entry["innovator"] for entry in body["advice"]} == {"Jeff Bezos", "Steve Jobs"}
+        assert body["innovator_status"] == {"Jeff Bezos": "completed", "Steve Jobs": "completed", "Elon Musk": "pending"}
+    finally:
+        slow.set()
+        await generation
+
+    body = (await client.get("/api/sessions/s1/advice")).json()
+    assert body["status"] == SessionStatus.COMPLETED.value
+    assert body["advice"][-1]["innovator"] == "Elon Musk"
+    assert set(body["innovator_status"].values()) == {"completed"}
+
+
+async def test_a_failed_innovator_is_marked_without_failing_the_session(container, client):
+    container.ai_service.failing.add("jobs")
+    await _processing_session(container, "s1")
+    await advisory_routes.generate_advice(container, "s1", "How do I grow my SaaS?", {}, persona_ids=["jobs", "musk"])
+    body = (await client.get("/api/sessions/s1/advice")).json()
+    assert body["status"] == SessionStatus.COMPLETED.value
+    assert body["innovator_status"] == {"Steve Jobs": "failed", "Elon Musk": "completed"}
+    assert len(body["advice"]) == 2
+
+
+async def test_a_session_still_processing_without_advice_is_accepted_not_ready(container, client):
+    await _processing_session(container, "s1")
+    response = await client.get("/api/sessions/s1/advice")
+    assert response.status_code == 202
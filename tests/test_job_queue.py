@@ -0,0 +1,87 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from job_queue import AdviceJobQueue
+from models import JobStatus, SessionStatus
+from worker import recover_orphaned_sessions
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["test_job_queue"]
+
+
+async def test_a_job_is_claimed_by_one_worker_at_a_time(db):
+    queue = AdviceJobQueue(db.advice_jobs)
+    await queue.enqueue("s1", "Raise prices?", {"q1": "a1"}, personas=["steve_jobs"])
+    # Enqueuing a session that already has a job is a no-op
+    await queue.enqueue("s1", "Raise prices?", {"q1": "a1"})
+    assert await queue.depth() == 1
+
+    job = await queue.claim("w1")
+    assert (job.session_id, job.worker_id, job.attempts, job.personas) == ("s1", "w1", 1, ["steve_jobs"])
+    assert await queue.claim("w2") is None
+    assert await queue.renew_lease(job)
+    await queue.complete(job)
+    assert await queue.get_job("s1") == {"status": JobStatus.COMPLETED.value}
+
+
+async def test_an_expired_lease_is_taken_over_and_the_old_worker_loses_it(db):
+    queue = AdviceJobQueue(db.advice_jobs, lease_seconds=0)
+    await queue.enqueue("s1", "Raise prices?", {})
+    stalled = await queue.claim("w1")
+    taken = await queue.claim("w2")
+    assert (taken.worker_id, taken.attempts) == ("w2", 2)
+    assert not await queue.renew_lease(stalled)
+
+
+async def test_failures_back_off_then_fail_for_good(db):
+    queue = AdviceJobQueue(db.advice_jobs, max_attempts=2, backoff_base_seconds=0)
+    await queue.enqueue("s1", "Raise prices?", {})
+    assert await queue.fail(await queue.claim("w1"), "provider down")
+    assert not await queue.fail(await queue.claim("w1"), "provider down")
+    assert await queue.claim("w1") is None
+    job = await db.advice_jobs.find_one({"session_id": "s1"})
+    assert (job["status"], job["attempts"], job["last_error"]) == (JobStatus.FAILED.value, 2, "provider down")
+
+
+async def test_a_retry_waits_out_its_backoff(db):
+    queue = AdviceJobQueue(db.advice_jobs, backoff_base_seconds=60)
+    await queue.enqueue("s1", "Raise prices?", {})
+    assert await queue.fail(await queue.claim("w1"), "provider down")
+    assert await queue.depth() == 1
+    assert await queue.claim("w1") is None
+
+
+async def test_reaping_fails_jobs_whose_last_lease_expired(db):
+    queue = AdviceJobQueue(db.advice_jobs, lease_seconds=0, max_attempts=1)
+    await queue.enqueue("s1", "Raise prices?", {})
+    await queue.enqueue("s2", "Hire or outsource?", {})
+    await queue.claim("w1")
+    assert await queue.reap_expired() == ["s1"]
+    assert await queue.get_job("s1") == {"status": JobStatus.FAILED.value}
+    assert await queue.get_job("s2") == {"status": JobStatus.QUEUED.value}
+
+
+async def test_orphaned_processing_sessions_are_requeued(db):
+    queue = AdviceJobQueue(db.advice_jobs)
+    sessions = [
+        {"session_id": "no_job", "status": SessionStatus.PROCESSING.value, "user_question": "Q1", "personas": ["elon_musk"]},
+        {"session_id": "finished_job", "status": SessionStatus.PROCESSING.value, "user_question": "Q2",
+         "probing_answers": {"q1": "a1"}},
+        {"session_id": "live_job", "status": SessionStatus.PROCESSING.value, "user_question": "Q3"},
+        {"session_id": "done", "status": SessionStatus.COMPLETED.value, "user_question": "Q4"},
+    ]
+    await db.advisory_sessions.insert_many(sessions)
+    await queue.enqueue("finished_job", "Q2", {"q1": "a1"})
+    await queue.complete(await queue.claim("w1"))
+    await queue.enqueue("live_job", "Q3", {})
+
+    assert await recover_orphaned_sessions(db, queue) == 2
+    assert await recover_orphaned_sessions(db, queue) == 0
+    jobs = {job["session_id"]: job async for job in db.advice_jobs.find()}
+    assert set(jobs) == {"no_job", "finished_job", "live_job"}
+    assert jobs["no_job"]["personas"] == ["elon_musk"]
+    assert (jobs["finished_job"]["status"], jobs["finished_job"]["attempts"]) == (JobStatus.QUEUED.value, 0)
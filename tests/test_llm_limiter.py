@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from llm_limiter import LlmAdmissionController, LlmBackpressureError, LlmPriority
+
+pytestmark = pytest.mark.anyio
+
+
+async def _hold(limiter: LlmAdmissionController, release: asyncio.Event, priority=LlmPriority.ADVICE):
+    async with limiter.admit(priority):
+        await release.wait()
+
+
+async def test_admits_higher_priority_first():
+    limiter = LlmAdmissionController(max_concurrent=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(limiter, release))
+    await asyncio.sleep(0)
+    order = []
+
+    async def call(priority: LlmPriority):
+        async with limiter.admit(priority):
+            order.append(priority)
+
+    waiters = [asyncio.create_task(call(p)) for p in (LlmPriority.SUMMARY, LlmPriority.ADVICE, LlmPriority.PROBING)]
+    await asyncio.sleep(0)
+    assert limiter.stats()["queue_depth"] == 3
+
+    release.set()
+    await asyncio.gather(holder, *waiters)
+    assert order == [LlmPriority.PROBING, LlmPriority.ADVICE, LlmPriority.SUMMARY]
+    assert limiter.stats()["in_flight"] == 0
+
+
+async def test_shed_rejects_once_queue_is_full():
+    limiter = LlmAdmissionController(max_concurrent=1, max_queue_depth=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(limiter, release))
+    queued = asyncio.create_task(_hold(limiter, release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(LlmBackpressureError) as raised:
+        async with limiter.admit(LlmPriority.PROBING, shed=True):
+            pass
+    assert raised.value.retry_after >= 1
+    assert limiter.stats()["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(holder, queued)
+
+
+async def test_cancelled_waiter_already_dropped_from_queue():
+    """A waiter that _dispatch discarded before it resumed must re-raise CancelledError, not ValueError"""
+    limiter = LlmAdmissionController(max_concurrent=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(limiter, release))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(_hold(limiter, release))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    # Another release dispatches before the cancelled task gets to run its cleanup
+    limiter._dispatch()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    release.set()
+    await holder
+    stats = limiter.stats()
+    assert (stats["in_flight"], stats["queue_depth"]) == (0, 0)
+
+
+async def test_slot_granted_while_cancelled_is_handed_back():
+    limiter = LlmAdmissionController(max_concurrent=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(limiter, release))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(_hold(limiter, asyncio.Event()))
+    await asyncio.sleep(0)
+
+    # The holder finishes and grants the slot, then the waiter is cancelled before it resumes
+    release.set()
+    await asyncio.sleep(0)
+    assert holder.done() and limiter.stats()["in_flight"] == 1
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.stats()["in_flight"] == 0
+
+
+async def test_token_budget_delays_admission_until_refill():
+    limiter = LlmAdmissionController(max_concurrent=4, tokens_per_minute=600)
+    async with limiter.admit(LlmPriority.ADVICE, estimated_tokens=600):
+        pass
+    # 6 tokens take 0.6s to refill at 10 tokens per second
+    started = asyncio.get_running_loop().time()
+    async with limiter.admit(LlmPriority.ADVICE, estimated_tokens=6):
+        pass
+    assert asyncio.get_running_loop().time() - started >= 0.5
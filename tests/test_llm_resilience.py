@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from llm_limiter import LlmBackpressureError
+from llm_resilience import CircuitBreaker, CircuitOpenError, HedgePolicy, LatencyTracker, hedged, percentile
+
+
+def _fail(breaker: CircuitBreaker, error: Exception = RuntimeError("provider down")):
+    with pytest.raises(type(error)):
+        with breaker.guard():
+            raise error
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60)
+    for _ in range(2):
+        _fail(breaker)
+    with breaker.guard():
+        pass
+    # A success resets the streak
+    for _ in range(2):
+        _fail(breaker)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    _fail(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as raised:
+        with breaker.guard():
+            pass
+    assert 0 < raised.value.retry_after <= 60
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_breaker_ignores_configured_errors():
+    breaker = CircuitBreaker(failure_threshold=1, ignore=(LlmBackpressureError,))
+    _fail(breaker, LlmBackpressureError(1))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_trial_decides_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    _fail(breaker)
+    # The cool-down is over, so the next call is the single trial
+    _fail(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with breaker.guard():
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        # Only one trial at a time
+        with pytest.raises(CircuitOpenError):
+            with breaker.guard():
+                pass
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.anyio
+async def test_hedged_returns_first_result_and_cancels_losers():
+    started, cancelled = [], []
+
+    async def attempt():
+        index = len(started)
+        started.append(index)
+        try:
+            # The original stalls; the hedge answers quickly
+            await asyncio.sleep(10 if index == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        return index
+
+    result, winner = await hedged(attempt, delay=0.05, max_hedges=1)
+    await asyncio.sleep(0)
+    assert (result, winner) == (1, 1)
+    assert cancelled == [0]
+
+
+@pytest.mark.parametrize("pct, expected", [(0, 1), (50, 5), (95, 10), (99, 10), (100, 10)])
+def test_percentile_is_nearest_rank(pct, expected):
+    assert percentile([7, 3, 10, 1, 5, 2, 9, 4, 8, 6], pct) == expected
+    assert percentile([], pct) == 0.0
+
+
+def test_hedge_delay_follows_the_observed_percentile():
+    policy = HedgePolicy(initial_delay_seconds=10, min_delay_seconds=0.5)
+    tracker = LatencyTracker(min_samples=20)
+    for seconds in range(1, 20):
+        tracker.observe("jobs", seconds / 10)
+    # Not enough samples yet
+    assert policy.hedge_delay(tracker, "jobs") == 10
+    tracker.observe("jobs", 2.0)
+    assert policy.hedge_delay(tracker, "jobs") == pytest.approx(1.9)
+    assert policy.hedge_delay(tracker, "musk") == 10
+    tracker.observe("fast", 0.01)
+    assert HedgePolicy(initial_delay_seconds=0.1, min_delay_seconds=0.5).hedge_delay(tracker, "fast") == 0.5
@@ -0,0 +1,31 @@
+import pytest
+
+from metrics import PROBING_QUESTIONS, MetricsRegistry, gauge_family, gauges
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_render_includes_prometheus_metrics_and_live_gauges():
+    registry = MetricsRegistry()
+    PROBING_QUESTIONS.labels(result="parsed").inc()
+
+    async def live():
+        return [
+            gauge_family("advisory_sessions", "Sessions by status", [({"status": "completed"}, 3)]),
+            *gauges("single_flight", "Shared advice calls", {"executions": 2, "enabled": True, "note": "x"}),
+        ]
+
+    async def broken():
+        raise RuntimeError("mongo down")
+
+    registry.add_collector(broken)
+    registry.add_collector(live)
+    text = (await registry.render()).decode()
+    assert 'probing_questions_total{result="parsed"}' in text
+    assert 'advisory_sessions{status="completed"} 3.0' in text
+    assert "single_flight_executions 2.0" in text
+    # Only numeric stats become gauges, and a failing collector does not fail the scrape
+    assert "single_flight_enabled" not in text and "single_flight_note" not in text
+
+    registry.remove_collector(live)
+    assert "advisory_sessions" not in (await registry.render()).decode()
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from benchmarks.stub_services import StubAdvisoryService, StubChat
+from llm_resilience import CircuitBreaker, HedgePolicy
+from model_router import ModelRouter, parse_chain
+
+
+class HangingChat(StubChat):
+    async def send_message(self, user_message) -> str:
+        if self.route.provider == "openai":
+            await asyncio.sleep(3600)
+        return await super().send_message(user_message)
+
+
+class HangingProviderService(StubAdvisoryService):
+    def _create_chat(self, session_id: str, system_message: str, route, response_format=None) -> StubChat:
+        return HangingChat(self, session_id, route)
+
+
+@pytest.mark.anyio
+async def test_hanging_route_trips_its_breaker_and_hedges_elsewhere():
+    router = ModelRouter(
+        {task: parse_chain("openai:gpt-4o,anthropic:claude") for task in ("probing", "advice", "follow_up", "summary")},
+        breaker_factory=lambda: CircuitBreaker(failure_threshold=3, reset_seconds=60)
+    )
+    service = HangingProviderService(
+        router=router, hedging=HedgePolicy(deadline_seconds=1, initial_delay_seconds=0.05, min_delay_seconds=0.05)
+    )
+    persona = service.personas.all()[0]
+
+    for index in range(6):
+        advice = await service.generate_innovator_advice("How do I grow?", {"0": "a"}, f"s{index}", persona_ids=[persona.id])
+        assert advice[0]["advice_text"].startswith("Stub advice")
+
+    openai, anthropic = parse_chain("openai:gpt-4o,anthropic:claude")
+    assert router.health(openai).breaker.state == CircuitBreaker.OPEN
+    assert router.candidates("advice")[0] == anthropic
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from pagination import InvalidCursorError, decode_cursor, encode_cursor, fetch_page
+
+
+def test_cursor_round_trip():
+    created_at, doc_id = datetime(2026, 1, 2, 3, 4, 5, 678000), ObjectId()
+    assert decode_cursor(encode_cursor(created_at, doc_id)) == (created_at, doc_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "bm9waXBl", "MjAyNi0wMS0wMnxub3QtYW4taWQ"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.anyio
+async def test_pages_cover_every_document_once_newest_first():
+    collection = AsyncMongoMockClient()["test_pagination"].items
+    base = datetime(2026, 1, 1)
+    # Groups of documents share a timestamp, so page boundaries fall inside ties on created_at
+    await collection.insert_many([
+        {"n": n, "created_at": base + timedelta(seconds=n // 3)} for n in range(23)
+    ])
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = await fetch_page(collection, {}, {"n": 1}, "created_at", 5, cursor)
+        pages += 1
+        assert all(set(doc) == {"n"} for doc in page)
+        seen.extend(doc["n"] for doc in page)
+        if cursor is None:
+            break
+
+    assert pages == 5
+    assert sorted(seen) == list(range(23))
+    assert [n // 3 for n in seen] == sorted((n // 3 for n in seen), reverse=True)
+
+
+@pytest.mark.anyio
+async def test_filtered_page_keeps_requested_sort_field():
+    collection = AsyncMongoMockClient()["test_pagination"].items
+    base = datetime(2026, 1, 1)
+    await collection.insert_many([
+        {"n": n, "status": "done" if n % 2 else "open", "created_at": base + timedelta(seconds=n)} for n in range(6)
+    ])
+
+    page, cursor = await fetch_page(collection, {"status": "done"}, {"n": 1, "created_at": 1}, "created_at", 10)
+    assert cursor is None
+    assert [doc["n"] for doc in page] == [5, 3, 1]
+    assert page[0]["created_at"] == base + timedelta(seconds=5)
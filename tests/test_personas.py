@@ -0,0 +1,96 @@
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from mongomock_motor import AsyncMongoMockClient
+
+import advisory_routes
+from app_container import AppContainer
+from benchmarks.stub_services import StubAdvisoryService
+from models import AdvisorySession
+from persona_registry import PersonaRegistry, UnknownPersonaError
+
+
+def _persona(persona_id, name):
+    return {"id": persona_id, "name": name, "title": f"{name} title", "confidence": "High", "prompt": [f"You are {name}."]}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = tmp_path / "personas.json"
+    path.write_text(json.dumps({
+        "shared_instructions": ["Answer in 200 words."],
+        "personas": [_persona("ada", "Ada Lovelace"), _persona("alan", "Alan Turing"), _persona("grace", "Grace Hopper")]
+    }))
+    return PersonaRegistry.load(str(path))
+
+
+def test_system_prompts_end_with_the_shared_instructions(registry):
+    assert registry.ids == ["ada", "alan", "grace"]
+    assert registry.get("ada").system_prompt == "You are Ada Lovelace.\n\nAnswer in 200 words."
+
+
+def test_selection_keeps_registry_order_and_defaults_to_everyone(registry):
+    assert [persona.id for persona in registry.select(["grace", "ada"])] == ["ada", "grace"]
+    assert [persona.id for persona in registry.select()] == ["ada", "alan", "grace"]
+
+
+def test_unknown_personas_are_rejected(registry):
+    with pytest.raises(UnknownPersonaError, match="Unknown personas: bob"):
+        registry.select(["ada", "bob"])
+    with pytest.raises(UnknownPersonaError):
+        registry.get("bob")
+    with pytest.raises(ValueError):
+        PersonaRegistry([])
+
+
+@pytest.fixture
+async def container(monkeypatch):
+    monkeypatch.setenv("WARM_ADVICE_ENABLED", "false")
+    container = AppContainer(
+        database=AsyncMongoMockClient()["test_personas"],
+        ai_service_factory=lambda limiter=None, **kwargs: StubAdvisoryService(limiter=limiter, **kwargs)
+    )
+    await container.start_services()
+    yield container
+    await container.aclose()
+
+
+@pytest.fixture
+async def client(container):
+    app = FastAPI()
+    app.state.container = container
+    app.include_router(advisory_routes.router)
+    await container.db.advisory_sessions.insert_one(
+        AdvisorySession(session_id="s1", user_question="How do I grow my SaaS?").model_dump(by_alias=True, exclude={"id"})
+    )
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.anyio
+async def test_personas_are_listed_for_selection(client):
+    response = await client.get("/api/personas")
+    assert [(persona["id"], persona["name"]) for persona in response.json()] == [
+        ("bezos", "Jeff Bezos"), ("jobs", "Steve Jobs"), ("musk", "Elon Musk")
+    ]
+    assert "system_prompt" not in response.json()[0]
+
+
+@pytest.mark.anyio
+async def test_a_submit_consults_only_the_selected_personas(container, client):
+    response = await client.post("/api/sessions/s1/probing-answers", json={"answers": {"0": "B2B"}, "personas": ["musk"]})
+    assert response.status_code == 200
+    session = await container.db.advisory_sessions.find_one({"session_id": "s1"})
+    assert session["personas"] == ["musk"]
+    assert session["innovator_status"] == {"Elon Musk": "pending"}
+    job = await container.job_queue.claim("w1")
+    assert job.personas == ["musk"]
+
+
+@pytest.mark.anyio
+async def test_a_submit_with_an_unknown_persona_is_rejected(container, client):
+    response = await client.post("/api/sessions/s1/probing-answers", json={"answers": {"0": "B2B"}, "personas": ["bob"]})
+    assert response.status_code == 400
+    assert (await container.db.advisory_sessions.find_one({"session_id": "s1"}))["status"] == "pending"
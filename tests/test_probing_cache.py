@@ -0,0 +1,95 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from probing_cache import ProbingQuestionCache, normalize_question, question_key
+
+pytestmark = pytest.mark.anyio
+
+DEFAULT_QUESTIONS = ["What is your budget?"]
+
+
+class FakeAdvisoryService:
+    """Counts generations; returns the canned fallback once `failing` is set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+
+    async def generate_probing_questions(self, user_question, session_id):
+        self.calls += 1
+        if self.failing:
+            return DEFAULT_QUESTIONS, [["Low", "High"]]
+        return [f"{user_question} #{self.calls}"], [["Yes", "No"]]
+
+    def is_default_probing_questions(self, questions):
+        return any(question in DEFAULT_QUESTIONS for question in questions)
+
+
+@pytest.fixture
+def collection():
+    return AsyncMongoMockClient()["test_probing_cache"].probing_cache
+
+
+def test_questions_differing_in_case_and_punctuation_share_a_key():
+    assert normalize_question("  Should I  RAISE prices?! ") == "should i raise prices"
+    assert question_key("Should I raise prices?") == question_key("should i raise   prices")
+
+
+async def test_repeats_are_served_from_memory(collection):
+    ai_service = FakeAdvisoryService()
+    cache = ProbingQuestionCache(ai_service, collection)
+    first = await cache.generate_probing_questions("Should I raise prices?", "s1")
+    assert await cache.generate_probing_questions("should i raise prices", "s2") == first
+    assert ai_service.calls == 1
+    assert cache.stats() == {
+        "memory_hits": 1, "mongo_hits": 0, "similarity_hits": 0, "misses": 1, "bypassed": 0,
+        "hits": 1, "entries": 1
+    }
+
+
+async def test_another_process_is_served_from_mongo(collection):
+    ai_service = FakeAdvisoryService()
+    first = await ProbingQuestionCache(ai_service, collection).generate_probing_questions("Hire or outsource?", "s1")
+    other = ProbingQuestionCache(ai_service, collection)
+    assert await other.generate_probing_questions("Hire or outsource?", "s2") == first
+    # The Mongo hit is promoted to the in-process tier
+    assert await other.generate_probing_questions("Hire or outsource?", "s3") == first
+    assert ai_service.calls == 1
+    assert (other.counters["mongo_hits"], other.counters["memory_hits"]) == (1, 1)
+
+
+async def test_bypass_always_generates_and_leaves_the_cache_alone(collection):
+    ai_service = FakeAdvisoryService()
+    cache = ProbingQuestionCache(ai_service, collection)
+    await cache.generate_probing_questions("Pivot now?", "s1", bypass=True)
+    await cache.generate_probing_questions("Pivot now?", "s2", bypass=True)
+    assert ai_service.calls == 2
+    assert cache.counters["bypassed"] == 2
+    assert await collection.count_documents({}) == 0
+
+
+async def test_fallback_questions_are_not_cached(collection):
+    ai_service = FakeAdvisoryService()
+    ai_service.failing = True
+    cache = ProbingQuestionCache(ai_service, collection)
+    assert (await cache.generate_probing_questions("Pivot now?", "s1"))[0] == DEFAULT_QUESTIONS
+    ai_service.failing = False
+    assert (await cache.generate_probing_questions("Pivot now?", "s2"))[0] == ["Pivot now? #2"]
+    assert cache.counters["misses"] == 2
+    assert await collection.count_documents({}) == 1
+
+
+async def test_similar_questions_hit_through_the_embedder(collection):
+    vectors = {"should i raise prices": [1.0, 0.0], "should i increase prices": [0.99, 0.1], "hire or outsource": [0.0, 1.0]}
+
+    async def embedder(text):
+        return vectors[text]
+
+    ai_service = FakeAdvisoryService()
+    cache = ProbingQuestionCache(ai_service, collection, embedder=embedder)
+    first = await cache.generate_probing_questions("Should I raise prices?", "s1")
+    assert await cache.generate_probing_questions("Should I increase prices?", "s2") == first
+    assert await cache.generate_probing_questions("Hire or outsource?", "s3") != first
+    assert ai_service.calls == 2
+    assert (cache.counters["similarity_hits"], cache.counters["misses"]) == (1, 2)
+    assert (await collection.find_one({"_id": question_key("Should I raise prices?")}))["embedding"] == [1.0, 0.0]
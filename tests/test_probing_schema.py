@@ -0,0 +1,61 @@
+import orjson
+import pytest
+
+from probing_schema import NOT_SURE_OPTION, ProbingParseResult, parse_probing_slots, repair_prompt
+
+QUESTIONS = ["Which market?", "Which model?", "Which stage?"]
+
+
+def _response(questions, options) -> str:
+    return orjson.dumps({"questions": questions, "options": options}).decode()
+
+
+def test_complete_response_parses_every_slot():
+    result = parse_probing_slots(_response(QUESTIONS, [["A", "B", "C", NOT_SURE_OPTION]] * 3))
+    assert result.complete
+    questions, options = result.as_lists()
+    assert questions == QUESTIONS
+    assert options == [["A", "B", "C", NOT_SURE_OPTION]] * 3
+
+
+def test_options_are_trimmed_capped_and_end_with_not_sure():
+    result = parse_probing_slots(_response(QUESTIONS[:1], [[" A ", "B", "", "C", "D", NOT_SURE_OPTION]]), count=1)
+    assert result.slots[0].options == ["A", "B", "C", NOT_SURE_OPTION]
+
+
+def test_invalid_slots_are_marked_missing_and_the_rest_kept():
+    result = parse_probing_slots(_response(["Which market?", "  ", "Which stage?"], [["A", "B"], ["A", "B"], ["A"]]))
+    assert result.missing == [1, 2]
+    assert result.slots[0].question == "Which market?"
+
+
+def test_short_response_leaves_trailing_slots_missing():
+    result = parse_probing_slots(_response(QUESTIONS[:2], [["A", "B"], ["A", "B"]]))
+    assert result.missing == [2]
+
+
+def test_code_fences_and_chatter_are_tolerated():
+    text = "Sure! Here you go:\n```json\n" + _response(QUESTIONS, [["A", "B"]] * 3) + "\n```"
+    assert parse_probing_slots(text).complete
+
+
+@pytest.mark.parametrize("text", ["not json", "[1, 2, 3]", ""])
+def test_non_object_response_raises_value_error(text):
+    with pytest.raises(ValueError):
+        parse_probing_slots(text)
+
+
+def test_fill_replaces_only_repaired_slots():
+    result = parse_probing_slots(_response(["Which market?", "", ""], [["A", "B"], [], []]))
+    repair = parse_probing_slots(_response(["Which model?"], [["A", "B"]]), count=2)
+    result.fill(result.missing, repair.slots)
+    assert result.missing == [2]
+    assert result.slots[1].question == "Which model?"
+
+
+def test_repair_prompt_lists_kept_questions():
+    result = ProbingParseResult([None, None, None])
+    result.fill([0], parse_probing_slots(_response(["Which market?"], [["A", "B"]]), count=1).slots)
+    prompt = repair_prompt("How do I grow?", result)
+    assert "Generate 2 more" in prompt
+    assert "- Which market?" in prompt
@@ -0,0 +1,140 @@
+import types
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from starlette.requests import Request
+
+import rate_limit
+from rate_limit import ADVICE_TOKENS_PER_PERSONA, RateLimiter, RateLimitExceeded, WindowCounter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [600.0]
+    monkeypatch.setattr(rate_limit.time, "time", lambda: now[0])
+    return now
+
+
+def _request(headers=None, peer="10.0.0.1") -> Request:
+    return Request({
+        "type": "http", "method": "POST", "path": "/api/sessions", "client": (peer, 1234),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    })
+
+
+async def test_window_counter_slides_across_the_boundary(clock):
+    counter = WindowCounter()
+    assert await counter.add("k", 60, 10) == 10
+    assert await counter.add("k", 60, 2) == 12
+    # A quarter into the next window, three quarters of the previous one still count
+    clock[0] = 675.0
+    assert await counter.add("k", 60, 1) == pytest.approx(12 * 0.75 + 1)
+    # Without sliding only the current window counts
+    assert await counter.add("k", 60, 1, sliding=False) == 2
+    # Two windows later nothing is left
+    clock[0] = 795.0
+    assert await counter.add("k", 60, 1) == 1
+
+
+async def test_window_counter_evicts_least_recent_keys(clock):
+    counter = WindowCounter(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        await counter.add(key, 60, 1)
+    assert await counter.add("b", 60, 1) == 1
+    assert await counter.add("a", 60, 0) == 0
+
+
+async def test_request_rate_rejections_are_not_counted(clock):
+    limiter = RateLimiter(WindowCounter(), ip_per_minute=2, ip_daily_tokens=0)
+    request = _request()
+    for _ in range(2):
+        await limiter.check("create_session", request)
+    for _ in range(3):
+        with pytest.raises(RateLimitExceeded) as raised:
+            await limiter.check("create_session", request)
+        assert raised.value.limit == "requests_per_minute"
+    clock[0] += 120
+    await limiter.check("create_session", request)
+
+
+@pytest.mark.parametrize("hops, forwarded, expected", [
+    (0, "1.1.1.1", "10.0.0.1"),
+    (1, "1.1.1.1, 2.2.2.2", "2.2.2.2"),
+    (2, "1.1.1.1, 2.2.2.2, 3.3.3.3", "2.2.2.2"),
+    # Fewer entries than trusted proxies: the header did not come through them
+    (2, "2.2.2.2", "10.0.0.1"),
+    (1, "", "10.0.0.1"),
+])
+async def test_client_ip_is_read_from_trusted_hops(hops, forwarded, expected):
+    limiter = RateLimiter(WindowCounter(), proxy_hops=hops)
+    headers = {"X-Forwarded-For": forwarded} if forwarded else {}
+    assert limiter.client(_request(headers)) == ("ip", expected)
+
+
+async def test_known_api_keys_are_limited_per_key():
+    limiter = RateLimiter(WindowCounter(), api_keys={"secret"})
+    scope, identity = limiter.client(_request({"X-API-Key": "secret"}))
+    assert scope == "api_key" and identity != "secret"
+    assert limiter.client(_request({"X-API-Key": "guess"})) == ("ip", "10.0.0.1")
+
+
+async def test_batch_items_are_charged_until_the_quota_runs_out(clock):
+    per_item = ADVICE_TOKENS_PER_PERSONA * 2
+    limiter = RateLimiter(WindowCounter(), ip_daily_tokens=per_item * 3, persona_count=4)
+    scope, identity = await limiter.check("batch", _request())
+    await limiter.charge_advice(scope, identity, ["jobs", "musk"])
+    await limiter.charge_advice(scope, identity, ["jobs", "bezos"])
+    # No persona selection means the whole board, which no longer fits
+    with pytest.raises(RateLimitExceeded):
+        await limiter.charge_advice(scope, identity)
+    await limiter.charge_advice(scope, identity, ["musk", "bezos"])
+    with pytest.raises(RateLimitExceeded) as raised:
+        await limiter.charge_advice(scope, identity, ["jobs"])
+    assert raised.value.limit == "daily_tokens"
+
+
+async def test_limiter_stays_off_until_the_proxy_setting_is_given(monkeypatch):
+    monkeypatch.delenv("RATE_LIMIT_ENABLED", raising=False)
+    monkeypatch.delenv("RATE_LIMIT_PROXY_HOPS", raising=False)
+    monkeypatch.delenv("RATE_LIMIT_TRUST_PROXY", raising=False)
+    assert await rate_limit.create_rate_limiter(None, 4) is None
+    monkeypatch.setenv("RATE_LIMIT_PROXY_HOPS", "0")
+    assert (await rate_limit.create_rate_limiter(None, 4)).proxy_hops == 0
+
+
+async def test_clients_behind_one_proxy_are_limited_separately(monkeypatch, clock):
+    monkeypatch.delenv("RATE_LIMIT_ENABLED", raising=False)
+    monkeypatch.delenv("RATE_LIMIT_PROXY_HOPS", raising=False)
+    monkeypatch.setenv("RATE_LIMIT_TRUST_PROXY", "true")
+    monkeypatch.setenv("RATE_LIMIT_IP_PER_MINUTE", "1")
+    limiter = await rate_limit.create_rate_limiter(None, 4)
+    # Both requests arrive from the proxy's address
+    alice = _request({"X-Forwarded-For": "1.1.1.1"}, peer="10.0.0.9")
+    bob = _request({"X-Forwarded-For": "2.2.2.2"}, peer="10.0.0.9")
+    assert await limiter.check("follow_up", alice) == ("ip", "1.1.1.1")
+    assert await limiter.check("follow_up", bob) == ("ip", "2.2.2.2")
+    with pytest.raises(RateLimitExceeded):
+        await limiter.check("follow_up", alice)
+
+
+async def test_middleware_rejects_over_limit_clients_before_the_handler():
+    from server import RequestGuardMiddleware
+
+    app = FastAPI()
+    app.state.container = types.SimpleNamespace(rate_limiter=RateLimiter(WindowCounter(), ip_per_minute=1))
+    handled = []
+
+    @app.post("/api/sessions")
+    async def create_session(request: Request):
+        handled.append(request.state.rate_limit_client)
+        return {}
+
+    app.add_middleware(RequestGuardMiddleware)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.post("/api/sessions")).status_code == 200
+        rejected = await client.post("/api/sessions")
+    assert rejected.status_code == 429 and int(rejected.headers["Retry-After"]) > 0
+    assert handled == [("ip", "127.0.0.1")]
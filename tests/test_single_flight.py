@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+class Call:
+    """An execution that blocks until released, recording whether it was cancelled"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"result {self.started}"
+
+
+async def test_concurrent_callers_share_one_execution():
+    group, call = SingleFlight(), Call()
+    callers = [asyncio.ensure_future(group.do("k", call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    call.release.set()
+    assert await asyncio.gather(*callers) == ["result 1"] * 3
+    assert call.started == 1
+    assert group.stats() == {
+        "executions": 1, "shared": 2, "cache_hits": 0, "abandoned": 0, "in_flight": 0, "cached_results": 0
+    }
+
+
+async def test_results_are_cached_for_the_ttl():
+    group, call = SingleFlight(result_ttl_seconds=60), Call()
+    call.release.set()
+    assert await group.do("k", call) == "result 1"
+    assert await group.do("k", call) == "result 1"
+    assert call.started == 1 and group.counters["cache_hits"] == 1
+
+
+async def test_one_caller_cancelling_leaves_the_others_waiting():
+    group, call = SingleFlight(), Call()
+    first = asyncio.ensure_future(group.do("k", call))
+    second = asyncio.ensure_future(group.do("k", call))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    call.release.set()
+    assert await second == "result 1"
+    assert call.cancelled == 0
+
+
+async def test_execution_is_cancelled_when_every_caller_is_gone():
+    group, call = SingleFlight(), Call()
+    callers = [asyncio.ensure_future(group.do("k", call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert call.cancelled == 1
+    assert group.stats()["abandoned"] == 1 and group.stats()["in_flight"] == 0
+    # A later caller starts afresh instead of joining the cancelled execution
+    call.release.set()
+    assert await group.do("k", call) == "result 2"
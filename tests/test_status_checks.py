@@ -0,0 +1,55 @@
+import types
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from mongomock_motor import AsyncMongoMockClient
+
+from server import StatusCheck, api_router
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["test_status_checks"]
+
+
+@pytest.fixture
+async def client(db):
+    app = FastAPI()
+    app.state.container = types.SimpleNamespace(db=db)
+    app.include_router(api_router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_status_checks_page_newest_first_with_the_cursor_in_a_header(db, client):
+    started = datetime(2026, 1, 1)
+    await db.status_checks.insert_many([
+        StatusCheck(client_name=f"client-{i}", timestamp=started + timedelta(minutes=i)).model_dump() for i in range(3)
+    ])
+
+    first = await client.get("/api/status", params={"limit": 2})
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "application/json"
+    assert [check["client_name"] for check in first.json()] == ["client-2", "client-1"]
+    # Exactly the StatusCheck fields, serialized by orjson without re-validation
+    assert first.json()[0].keys() == {"id", "client_name", "timestamp"}
+    assert first.json()[0]["timestamp"] == "2026-01-01T00:02:00"
+
+    second = await client.get("/api/status", params={"limit": 2, "cursor": first.headers["x-next-cursor"]})
+    assert [check["client_name"] for check in second.json()] == ["client-0"]
+    assert "x-next-cursor" not in second.headers
+
+
+async def test_a_created_status_check_is_listed(client):
+    created = (await client.post("/api/status", json={"client_name": "probe"})).json()
+    listed = (await client.get("/api/status")).json()
+    # Mongo keeps the timestamp to the millisecond
+    assert [(check["id"], check["client_name"]) for check in listed] == [(created["id"], "probe")]
+
+
+async def test_a_malformed_cursor_is_rejected(client):
+    assert (await client.get("/api/status", params={"cursor": "not-a-cursor"})).status_code == 400
@@ -0,0 +1,62 @@
+"""Concurrent duplicate POST /probing-answers must start exactly one advice job per session."""
+import asyncio
+import uuid
+from collections import Counter
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from mongomock_motor import AsyncMongoMockClient
+
+import advisory_routes
+from app_container import AppContainer
+from benchmarks.stub_services import StubAdvisoryService
+from models import AdvisorySession, SessionStatus
+
+pytestmark = pytest.mark.anyio
+
+SESSIONS = 10
+DUPLICATES = 10
+
+
+async def test_duplicate_submits_enqueue_one_job_per_session():
+    db = AsyncMongoMockClient()["test_submit_concurrency"]
+    # The container's services without its worker, so every accepted submit leaves its job queued
+    container = AppContainer(
+        database=db, ai_service_factory=lambda limiter=None, **kwargs: StubAdvisoryService(limiter=limiter, **kwargs)
+    )
+    await container.start_services()
+    enqueued = Counter()
+    original_enqueue = container.job_queue.enqueue
+
+    async def counting_enqueue(session_id, *args, **kwargs):
+        enqueued[session_id] += 1
+        await original_enqueue(session_id, *args, **kwargs)
+
+    container.job_queue.enqueue = counting_enqueue
+    app = FastAPI()
+    app.state.container = container
+    app.include_router(advisory_routes.router)
+
+    session_ids = [str(uuid.uuid4()) for _ in range(SESSIONS)]
+    await db.advisory_sessions.insert_many([
+        AdvisorySession(session_id=session_id, user_question="How do I grow my SaaS?").model_dump(
+            by_alias=True, exclude={"id"}
+        )
+        for session_id in session_ids
+    ])
+
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            responses = await asyncio.gather(*(
+                client.post(f"/api/sessions/{session_id}/probing-answers", json={"answers": {"0": "Early stage"}})
+                for session_id in session_ids for _ in range(DUPLICATES)
+            ))
+    finally:
+        await container.aclose()
+
+    assert {response.status_code for response in responses} == {200}
+    assert all(response.json()["processing"] for response in responses)
+    assert enqueued == Counter({session_id: 1 for session_id in session_ids})
+    assert await db.advice_jobs.count_documents({}) == SESSIONS
+    assert await db.advisory_sessions.count_documents({"status": SessionStatus.PROCESSING.value}) == SESSIONS
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from benchmarks.stub_services import StubAdvisoryService
+from probing_cache import question_key
+from warm_advice import WarmAdviceStore, create_warm_advice_scheduler, in_off_peak, warm_key
+
+QUESTION = "How do I grow my SaaS?"
+ANSWERS = {"0": "B2B"}
+
+
+@pytest.fixture
+async def ai_service():
+    service = StubAdvisoryService()
+    yield service
+    await service.aclose()
+
+
+@pytest.fixture
+async def store(ai_service):
+    db = AsyncMongoMockClient()["test_warm_advice"]
+    store = WarmAdviceStore(ai_service, db.warm_advice, db.advisory_sessions, fresh_seconds=3600)
+    await store.ensure_indexes()
+    yield store
+    await store.aclose()
+
+
+def _session(question, answers, batch_id=None):
+    return {
+        "session_id": str(uuid.uuid4()), "status": "completed", "created_at": datetime.utcnow(),
+        "question_key": question_key(question),
+        "user_question": question, "probing_answers": answers, "personas": [], "batch_id": batch_id,
+        "probing_questions": ["Which market?"], "probing_options": [["B2B", "B2C"]],
+    }
+
+
+async def _age(store, seconds):
+    key = warm_key(QUESTION, ANSWERS)
+    await store.collection.update_one({"_id": key}, {"$set": {"refreshed_at": datetime.utcnow() - timedelta(seconds=seconds)}})
+    return key
+
+
+def test_off_peak_hours_may_wrap_past_midnight():
+    assert in_off_peak(datetime(2026, 1, 1, 3), 2, 6)
+    assert not in_off_peak(datetime(2026, 1, 1, 6), 2, 6)
+    assert in_off_peak(datetime(2026, 1, 1, 23), 22, 4)
+    assert in_off_peak(datetime(2026, 1, 1, 1), 22, 4)
+    assert not in_off_peak(datetime(2026, 1, 1, 12), 22, 4)
+
+
+def test_lookback_defaults_to_the_session_ttl(monkeypatch, caplog):
+    monkeypatch.setenv("SESSION_TTL_SECONDS", "7200")
+    monkeypatch.delenv("WARM_ADVICE_LOOKBACK_SECONDS", raising=False)
+    assert create_warm_advice_scheduler(None).lookback_seconds == 7200
+
+    monkeypatch.setenv("WARM_ADVICE_LOOKBACK_SECONDS", "86400")
+    with caplog.at_level(logging.WARNING, logger="warm_advice"):
+        assert create_warm_advice_scheduler(None).lookback_seconds == 86400
+    assert "exceeds SESSION_TTL_SECONDS=7200" in caplog.text
+
+
+@pytest.mark.anyio
+async def test_popular_interactive_combinations_are_precomputed(store):
+    await store.sessions.insert_many(
+        [_session(QUESTION, ANSWERS) for _ in range(3)]
+        + [_session("Hire or outsource?", {}) for _ in range(2)]
+        + [_session(QUESTION, {"0": "B2C"}, batch_id="b1") for _ in range(5)]
+    )
+    assert await store.run_once(lookback_seconds=3600, min_count=3, top_n=10) == 1
+    # A second pass re-ranks the fresh entry instead of regenerating it
+    assert await store.run_once(lookback_seconds=3600, min_count=3, top_n=10) == 0
+
+    advice = await store.lookup_advice("how do I grow my SaaS", {"0": " B2B "})
+    assert [entry["innovator"] for entry in advice] == ["Jeff Bezos", "Steve Jobs", "Elon Musk"]
+    assert await store.lookup_probing(QUESTION) == (["Which market?"], [["B2B", "B2C"]])
+    assert await store.lookup_advice(QUESTION, {"0": "B2C"}) is None
+    assert store.stats()["refreshing"] == 0
+
+
+@pytest.mark.anyio
+async def test_stale_advice_is_served_while_one_refresh_runs(store, ai_service):
+    await store.sessions.insert_many([_session(QUESTION, ANSWERS) for _ in range(3)])
+    await store.run_once(lookback_seconds=3600, min_count=3, top_n=10)
+    key = await _age(store, 7200)
+    served = (await store.collection.find_one({"_id": key}))["advice"]
+
+    calls = ai_service.calls["advice"]
+    hits = await asyncio.gather(*(store.lookup_advice(QUESTION, ANSWERS) for _ in range(3)))
+    assert all(advice == served for advice in hits)
+    await asyncio.gather(*store._refreshing)
+
+    entry = await store.collection.find_one({"_id": key})
+    assert entry["refreshed_at"] > datetime.utcnow() - timedelta(seconds=60)
+    assert entry["refreshing_until"] is None
+    assert store.counters["refreshed"] == 1
+    assert ai_service.calls["advice"] - calls == 3
+
+
+@pytest.mark.anyio
+async def test_a_failed_refresh_keeps_the_stale_advice(store, ai_service):
+    await store.sessions.insert_many([_session(QUESTION, ANSWERS) for _ in range(3)])
+    await store.run_once(lookback_seconds=3600, min_count=3, top_n=10)
+    key = await _age(store, 7200)
+    stale = await store.collection.find_one({"_id": key})
+    ai_service.failure_rate = 1.0
+    assert not await store.refresh(key)
+    assert store.counters["refresh_failed"] == 1
+    assert (await store.collection.find_one({"_id": key}))["advice"] == stale["advice"]
+    ai_service.failure_rate = 0.0
+    # The refresh lease was released, so the next stale hit can try again
+    assert await store.refresh(key)